@@ -3,10 +3,9 @@ import unicodedata
 from allauth.socialaccount.providers.facebook.views import FacebookOAuth2Adapter
 from django.contrib.auth import get_user_model
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
-from google.oauth2 import id_token
 from django.conf import settings
-from google.auth.transport import requests as google_requests
 from allauth.socialaccount.providers.oauth2.client import OAuth2Error
+from authentication.services import GoogleIDTokenService, UsernameService
 User = get_user_model()
 
 class CustomFacebookOAuth2Adapter(FacebookOAuth2Adapter):
@@ -80,24 +79,7 @@ class CustomFacebookOAuth2Adapter(FacebookOAuth2Adapter):
         """
         Garantiza que el username sea único agregando sufijo numérico.
         """
-        username = base_username
-        
-        if not User.objects.filter(username=username).exists():
-            return username
-        
-        counter = 1
-        max_attempts = 9999  
-        
-        while counter < max_attempts:
-            username = f"{base_username}{counter}"
-            
-            if not User.objects.filter(username=username).exists():
-                return username
-            
-            counter += 1
-        
-        import time
-        return f"{base_username}{int(time.time())}"
+        return UsernameService.allocate(base_username)
     
 
 
@@ -111,29 +93,13 @@ class GoogleIDTokenAdapter(GoogleOAuth2Adapter):
     
     def validate_token(self, token):
         """Valida que el token venga de cualquiera de nuestras apps."""
-        import google.auth.transport.requests
-        from google.oauth2 import id_token
-        
-        allowed_ids = settings.GOOGLE_OAUTH2_ALLOWED_CLIENT_IDS
-        
-        for client_id in allowed_ids:
-            try:
-                idinfo = id_token.verify_oauth2_token(
-                    token,
-                    google.auth.transport.requests.Request(),
-                    client_id
-                )
-                return idinfo
-            except ValueError:
-                continue
-        
-        raise ValueError("Token no válido para ningún client_id registrado")
+        return GoogleIDTokenService.verify(token)
 
     def complete_login(self, request, app, token, **kwargs):
         id_token_str = token.token
 
         try:
-            idinfo = id_token.verify_oauth2_token(id_token_str)
+            idinfo = self.validate_token(id_token_str)
         except ValueError as e:
             raise OAuth2Error(f"ID token inválido: {e}")
 
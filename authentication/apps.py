@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        """Cambia el update_last_login de Django (un UPDATE + post_save por login) por el buffer"""
+        from django.contrib.auth.signals import user_logged_in
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        import authentication.signals
@@ -0,0 +1,152 @@
+import copy
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserPrincipalCache:
+    """
+    Cache del usuario autenticado en dos niveles.
+
+    - Redis guarda por usuario un estado {'version', 'rev'} y por rev todos los campos concretos
+      del usuario menos EXCLUDED_FIELDS: nunca el hash del password.
+    - Cada proceso tiene un LRU (user_id, rev) -> usuario para no deserializar en cada request.
+      El usuario se arma con Model.from_db.
+
+    Contrato: leer cualquier campo de request.user (first_name, last_login, date_joined, ...)
+    no hace consultas. Solo `password` queda diferido; quien lo necesite lo lee de la BD de forma
+    explícita (p. ej. EmailUpdateSerializer). Las relaciones (profile, ...) sí consultan.
+
+    Cada request lee solo el estado (una llamada a Redis, cero a la BD). Cualquier save del
+    usuario borra el estado (ver users.signals), así que el siguiente request recarga desde la BD
+    con una rev nueva y las copias viejas del LRU dejan de usarse.
+    """
+    STATE_KEY = 'auth:state:{user_id}'
+    USER_KEY = 'auth:user:{user_id}:{rev}'
+    EXCLUDED_FIELDS = ('password',)
+
+    _local = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _local_get(cls, key):
+        with cls._lock:
+            user = cls._local.get(key)
+            if user is not None:
+                cls._local.move_to_end(key)
+            return user
+
+    @classmethod
+    def _local_set(cls, key, user):
+        with cls._lock:
+            cls._local[key] = user
+            cls._local.move_to_end(key)
+            while len(cls._local) > settings.AUTH_USER_LRU_SIZE:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def principal_fields(cls):
+        """attname de los campos que viajan en cache, en el orden de concrete_fields"""
+        return [
+            field.attname for field in get_user_model()._meta.concrete_fields
+            if field.attname not in cls.EXCLUDED_FIELDS
+        ]
+
+    @staticmethod
+    def _principal(data):
+        """Usuario a partir de los campos en cache (from_db respeta el orden de concrete_fields)"""
+        User = get_user_model()
+        names = [field.attname for field in User._meta.concrete_fields if field.attname in data]
+        return User.from_db(router.db_for_read(User), names, [data[name] for name in names])
+
+    @classmethod
+    def get(cls, user_id):
+        """Regresa (version, usuario) desde cache o (None, None) si hay que ir a la BD"""
+        user_id = str(user_id)
+        state = cache.get(cls.STATE_KEY.format(user_id=user_id))
+        if not state:
+            return None, None
+
+        local_key = (user_id, state['rev'])
+        user = cls._local_get(local_key)
+        if user is None:
+            data = cache.get(cls.USER_KEY.format(user_id=user_id, rev=state['rev']))
+            if data is None:
+                return None, None
+            user = cls._principal(data)
+            cls._local_set(local_key, user)
+
+        return state['version'], user
+
+    @classmethod
+    def publish(cls, user):
+        user_id = str(user.pk)
+        rev = uuid.uuid4().hex
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        data = {name: getattr(user, name) for name in cls.principal_fields()}
+        cache.set_many({
+            cls.USER_KEY.format(user_id=user_id, rev=rev): data,
+            cls.STATE_KEY.format(user_id=user_id): {'version': user.auth_version, 'rev': rev},
+        }, timeout=timeout)
+        cls._local_set((user_id, rev), cls._principal(data))
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        cache.delete_many([cls.STATE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+    @classmethod
+    def clear_local(cls):
+        with cls._lock:
+            cls._local.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve request.user desde UserPrincipalCache en lugar de
+    hacer un SELECT a users_user en cada request.
+
+    El claim auth_version del token se compara contra la versión vigente del usuario;
+    al desactivar la cuenta o cambiar contraseña/correo la versión sube y los tokens
+    anteriores se rechazan de inmediato.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            version, user = UserPrincipalCache.get(user_id)
+        except Exception as e:
+            logger.warning(f"Cache de autenticación no disponible: {e}")
+            return super().get_user(validated_token)
+
+        if user is None:
+            user = super().get_user(validated_token)
+            version = user.auth_version
+            try:
+                UserPrincipalCache.publish(user)
+            except Exception as e:
+                logger.warning(f"No se pudo guardar el usuario {user_id} en cache: {e}")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if validated_token.get(settings.AUTH_VERSION_CLAIM, 0) != version:
+            raise AuthenticationFailed("El token fue revocado.", code="token_revoked")
+
+        # Copia por request: el LRU se comparte entre hilos
+        return copy.copy(user)
@@ -2,13 +2,13 @@
 Clases base que TODAS las vistas de autenticación heredarán.
 Esto garantiza comportamiento consistente.
 """
-import json
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from core.mixins import SentryErrorHandlerMixin
 from manza_spots.throttling import SensitiveOperationThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.tokens import RefreshToken
+from authentication.services import LastLoginService
 from django.utils import timezone
 from datetime import timedelta
 import logging
@@ -52,13 +52,13 @@ class BaseAuthenticationView(SentryErrorHandlerMixin):
                 'is_new_user': self._is_new_user(user)
             })
         
-        message = f"[bold cyan]{event_type}[/bold cyan]: {user.email if user else 'N/A'}"
-        details = json.dumps(log_data, indent=2, default=str)
+        # Los datos van como campos estructurados (core.logging.JSONFormatter), sin serializar aquí
+        message = f"{event_type}: {user.email if user else 'N/A'}"
         
         if success:
-            logger.info(f"{message}\n{details}", extra={'log_data': log_data})
+            logger.info(message, extra={'log_data': log_data})
         else:
-            logger.warning(f"{message}\n{details}", extra={'log_data': log_data})
+            logger.warning(message, extra={'log_data': log_data})
             
     def _is_new_user(self, user):
         """Detecta si el usuario fue creado recientemente (últimos 10 segundos)"""
@@ -71,6 +71,7 @@ class BaseAuthenticationView(SentryErrorHandlerMixin):
         TODAS las vistas de autenticación retornan el mismo formato.
         """
         refresh = RefreshToken.for_user(user)
+        LastLoginService.record(user)
         
         return {
             'access': str(refresh.access_token),
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.utils import timezone
+import logging
+from core.metrics import track_job
+
+logger = logging.getLogger(__name__)
+
+@track_job
+def purge_expired_tokens():
+    """
+    Borra por lotes los OutstandingToken expirados (y sus BlacklistedToken en cascada).
+    Los lotes cortos evitan locks largos sobre tablas que se escriben en cada login.
+    Con Redis además copia la blacklist vigente de la BD a RevocationStore.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+    from authentication.tokens import RevocationStore
+
+    try:
+        if RevocationStore.is_enabled():
+            imported = RevocationStore.import_from_database()
+            if imported:
+                logger.info(f'Blacklist de tokens: {imported} jti vigentes copiados a Redis')
+
+        batch_size = settings.TOKEN_PURGE_BATCH_SIZE
+        now = timezone.now()
+        total = 0
+
+        while True:
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lt=now)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+
+            if len(ids) < batch_size:
+                break
+
+        logger.info(f'Purga de tokens: {total} tokens expirados eliminados')
+        return total
+
+    except Exception as e:
+        logger.error(f'Error en purge_expired_tokens: {str(e)}')
+        raise
+
+
+@track_job
+def flush_last_login():
+    """Vuelca a Postgres los last_login acumulados en Redis"""
+    from authentication.services import LastLoginService
+
+    try:
+        updated = LastLoginService.flush()
+        if updated:
+            logger.info(f'last_login: {updated} usuarios actualizados')
+        return updated
+    except Exception as e:
+        logger.error(f'Error en flush_last_login: {str(e)}')
+        raise
@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from authentication.services import UsernameService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de asignación de usernames con N colisiones (no deja datos en la BD)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collisions', type=int, default=1000, help='Usernames ocupados con el mismo prefijo')
+        parser.add_argument('--base', default='benchusername', help='Prefijo a usar')
+
+    def _legacy_allocate(self, base_username):
+        """Algoritmo anterior: un exists() por cada sufijo probado"""
+        username = base_username
+        if not User.objects.filter(username=username).exists():
+            return username
+        counter = 1
+        while counter < 9999:
+            username = f"{base_username}{counter}"
+            if not User.objects.filter(username=username).exists():
+                return username
+            counter += 1
+        return f"{base_username}{int(time.time())}"
+
+    def _measure(self, func, base):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            username = func(base)
+            elapsed = time.perf_counter() - start
+        return username, elapsed, len(ctx.captured_queries)
+
+    def handle(self, *args, **options):
+        base = options['base']
+        collisions = options['collisions']
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [User(username=base, email=f'{base}@bench.local')] +
+                [User(username=f'{base}{i}', email=f'{base}{i}@bench.local') for i in range(1, collisions)]
+            )
+
+            for label, func in (('anterior', self._legacy_allocate), ('una consulta', UsernameService.allocate)):
+                username, elapsed, queries = self._measure(func, base)
+                self.stdout.write(f'{label}: {username} en {elapsed * 1000:.1f} ms, {queries} consultas')
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f'Benchmark terminado ({collisions} colisiones, datos revertidos)'))
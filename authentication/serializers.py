@@ -2,11 +2,19 @@
 import re
 from rest_framework import serializers
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer, TokenObtainPairSerializer,
+    TokenRefreshSerializer, TokenVerifySerializer
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
 from dj_rest_auth.registration.serializers import SocialLoginSerializer
 
+from authentication.tokens import RefreshToken, RevocationStore
 from core.responses.messages import AuthMessages
 
 User = get_user_model()
@@ -29,6 +37,7 @@ class SetNewPasswordSerializer(serializers.Serializer):
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Serializer que permite autenticación con username o email"""
+    token_class = RefreshToken
     
     username = serializers.CharField(required=False)
     email = serializers.EmailField(required=False)
@@ -59,6 +68,61 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 })
 
         return super().validate(attrs)
+#================================== TOKENS (REVOCACIÓN) ==========================================
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Igual que TokenRefreshSerializer de simplejwt pero con revocación en Redis
+    (authentication.tokens.RefreshToken) y rechazando refresh tokens emitidos
+    antes del último cambio de auth_version del usuario.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages['no_active_account'],
+                    'no_active_account',
+                )
+            if refresh.payload.get(settings.AUTH_VERSION_CLAIM, 0) != user.auth_version:
+                raise AuthenticationFailed('El token fue revocado.', 'token_revoked')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        if not RevocationStore.is_enabled():
+            return super().validate(attrs)
+
+        token = UntypedToken(attrs['token'])
+        if RevocationStore.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise serializers.ValidationError('Token is blacklisted')
+
+        return {}
+
+
+class RevocableTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = RefreshToken
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     """Serializer para creación de usuarios con contraseña"""
     password = serializers.CharField(
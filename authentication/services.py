@@ -7,14 +7,25 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.core.mail import send_mail
+from django.core.cache import cache
 from django.conf import settings
+from django.db import connection
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+import threading
+import time
+import requests
+from redis.exceptions import RedisError
+from google.auth import jwt as google_jwt
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from itsdangerous import URLSafeTimedSerializer
 from decouple import config
 from core.responses.messages import AuthMessages
 from core.services.email_service import ConfirmUserEmail, PasswordResetEmail
+from core.utils.redis import get_redis_client, make_key
 
 FRONTEND_URL = config('FRONTEND_URL')
 
@@ -35,7 +46,7 @@ class AuthenticationService:
     @staticmethod
     def generate_tokens_for_user(user):
         """Genera tokens JWT para un usuario"""
-        from rest_framework_simplejwt.tokens import RefreshToken
+        from authentication.tokens import RefreshToken
         
         refresh = RefreshToken.for_user(user)
         return {
@@ -131,6 +142,7 @@ class PasswordResetService:
             raise ValidationError('Token inválido o expirado.')
         
         user.set_password(new_password)
+        user.bump_auth_version()
         user.save()
         logger.info(f"Password reset successful for {user.email}")
         
@@ -178,7 +190,8 @@ class ChangePasswordService:
             )
 
         user.set_password(new_password)
-        user.save(update_fields=['password'])
+        user.bump_auth_version()
+        user.save(update_fields=['password', 'auth_version'])
 
 
 
@@ -205,7 +218,7 @@ class LoginService:
         if user.is_active or not user.check_password(password):
             return None
 
-        if user.last_login is None:
+        if not LastLoginService.has_logged_in(user):
             confirm_url = UsersRegisterService.get_confirmation_url(user)
             ConfirmUserEmail.send_email(
                 to_email=user.email,
@@ -235,4 +248,297 @@ class LoginService:
     @staticmethod
     def check_provider_only_account(user) -> bool:
         """True si el usuario no tiene contraseña utilizable (registrado via provider)."""
-        return user is not None and not user.has_usable_password()
\ No newline at end of file
+        return user is not None and not user.has_usable_password()
+
+
+class GoogleIDTokenService:
+    """
+    Verificación local de ID Tokens de Google.
+
+    Los certificados públicos de Google se descargan una sola vez y se guardan
+    en el cache compartido (Redis) durante el max-age que indica Google en
+    Cache-Control, además de una copia en memoria del proceso. Con eso el login
+    no hace ninguna llamada HTTP mientras los certificados estén vigentes.
+
+    Un kid desconocido fuerza una descarga (Google rotó llaves), pero a lo más una cada
+    FORCED_REFRESH_COOLDOWN segundos: un kid inventado no puede provocar una llamada a
+    Google por cada intento de login. Los demás procesos toman las llaves rotadas del
+    cache compartido en vez de esperar a que venza su copia en memoria.
+    """
+    CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+    CACHE_KEY = 'google:oauth2:certs'
+    REFRESH_COOLDOWN_KEY = 'google:oauth2:certs:forced-refresh'
+    DEFAULT_MAX_AGE = 3600
+    FORCED_REFRESH_COOLDOWN = 60
+    VALID_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+    _session = None
+    _certs = None
+    _certs_expires_at = 0
+    _forced_refresh_at = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_session(cls):
+        """Sesión HTTP reutilizable (mantiene el pool de conexiones keep-alive)"""
+        if cls._session is None:
+            cls._session = requests.Session()
+        return cls._session
+
+    @staticmethod
+    def _parse_max_age(cache_control):
+        match = re.search(r'max-age=(\d+)', cache_control or '')
+        return int(match.group(1)) if match else GoogleIDTokenService.DEFAULT_MAX_AGE
+
+    @classmethod
+    def _fetch_certs(cls):
+        """Descarga los certificados de Google y los publica en el cache compartido"""
+        response = cls._get_session().get(cls.CERTS_URL, timeout=5)
+        response.raise_for_status()
+
+        certs = response.json()
+        max_age = cls._parse_max_age(response.headers.get('Cache-Control'))
+        expires_at = time.time() + max_age
+
+        try:
+            cache.set(cls.CACHE_KEY, {'certs': certs, 'expires_at': expires_at}, timeout=max_age)
+        except Exception as e:
+            logger.warning(f"No se pudieron guardar los certificados de Google en cache: {e}")
+
+        logger.info(f"Certificados de Google actualizados (max-age={max_age}s)")
+        return certs, expires_at
+
+    @classmethod
+    def get_certs(cls, force_refresh=False):
+        """Regresa los certificados vigentes: memoria del proceso -> cache compartido -> Google"""
+        if not force_refresh and cls._certs and cls._certs_expires_at > time.time():
+            return cls._certs
+
+        with cls._lock:
+            if not force_refresh and cls._certs and cls._certs_expires_at > time.time():
+                return cls._certs
+
+            cached = None
+            if not force_refresh:
+                try:
+                    cached = cache.get(cls.CACHE_KEY)
+                except Exception as e:
+                    logger.warning(f"No se pudo leer el cache de certificados de Google: {e}")
+
+            if cached and cached['expires_at'] > time.time():
+                certs, expires_at = cached['certs'], cached['expires_at']
+            else:
+                certs, expires_at = cls._fetch_certs()
+
+            cls._certs = certs
+            cls._certs_expires_at = expires_at
+            return certs
+
+    @classmethod
+    def _allow_forced_refresh(cls):
+        """True si no hubo otro refresco forzado (en este proceso ni en otro) dentro del cooldown"""
+        now = time.time()
+        with cls._lock:
+            if now - cls._forced_refresh_at < cls.FORCED_REFRESH_COOLDOWN:
+                return False
+            cls._forced_refresh_at = now
+
+        try:
+            return cache.add(cls.REFRESH_COOLDOWN_KEY, now, timeout=cls.FORCED_REFRESH_COOLDOWN)
+        except Exception as e:
+            logger.warning(f"No se pudo coordinar el refresco de certificados de Google: {e}")
+            return True
+
+    @classmethod
+    def _adopt_shared_certs(cls):
+        """
+        Relee el cache compartido sin pasar por la copia del proceso. Si otro proceso ya
+        guardó certificados distintos (rotados) se adoptan y se regresan; si no, None.
+        """
+        try:
+            cached = cache.get(cls.CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"No se pudo leer el cache de certificados de Google: {e}")
+            return None
+
+        with cls._lock:
+            if not cached or cached['expires_at'] <= time.time() or cached['certs'] == cls._certs:
+                return None
+            cls._certs = cached['certs']
+            cls._certs_expires_at = cached['expires_at']
+            return cls._certs
+
+    @classmethod
+    def verify(cls, token):
+        """
+        Verifica firma, expiración, emisor y audiencia del ID Token en una sola pasada.
+
+        Raises:
+            ValueError: Si el token no es válido para ninguno de nuestros client_id
+        """
+        audience = [client_id for client_id in settings.GOOGLE_OAUTH2_ALLOWED_CLIENT_IDS if client_id]
+
+        try:
+            idinfo = google_jwt.decode(token, certs=cls.get_certs(), audience=audience)
+        except ValueError as e:
+            # Google rota sus llaves; si el kid no está en nuestra copia se refresca una vez.
+            # Dentro del cooldown no se llama a Google, pero el proceso que sí refrescó dejó las
+            # llaves nuevas en el cache compartido: se toman de ahí y se reintenta una vez
+            if 'Certificate for key id' not in str(e):
+                raise
+            if cls._allow_forced_refresh():
+                certs = cls.get_certs(force_refresh=True)
+            else:
+                certs = cls._adopt_shared_certs()
+                if certs is None:
+                    raise
+            idinfo = google_jwt.decode(token, certs=certs, audience=audience)
+
+        if idinfo.get('iss') not in cls.VALID_ISSUERS:
+            raise ValueError(f"Emisor inválido: {idinfo.get('iss')}")
+
+        return idinfo
+
+
+class LastLoginService:
+    """
+    Registro de last_login con escrituras agrupadas.
+
+    Con Redis cada login solo hace HSET en un hash user_id -> timestamp y un job periódico
+    (authentication.jobs.flush_last_login) lo vuelca a Postgres con un solo
+    UPDATE ... FROM (VALUES ...) por lote. Así una ráfaga de logins no bloquea filas de
+    users_user ni dispara el post_save del usuario. Sin Redis se hace un UPDATE directo.
+    """
+    HASH_KEY = 'auth:last_login'
+    FLUSH_BATCH_SIZE = 1000
+
+    @staticmethod
+    def record(user, when=None):
+        when = when or timezone.now()
+        user.last_login = when
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.hset(make_key(LastLoginService.HASH_KEY), str(user.pk), when.timestamp())
+                return
+            except RedisError as e:
+                logger.warning(f"No se pudo registrar last_login en Redis: {e}")
+
+        User.objects.filter(pk=user.pk).update(last_login=when)
+
+    @staticmethod
+    def has_logged_in(user) -> bool:
+        """Considera también los logins que siguen en el buffer sin volcar"""
+        if user.last_login is not None:
+            return True
+
+        client = get_redis_client()
+        if client is None:
+            return False
+        try:
+            return bool(client.hexists(make_key(LastLoginService.HASH_KEY), str(user.pk)))
+        except RedisError as e:
+            logger.warning(f"No se pudo consultar last_login en Redis: {e}")
+            return False
+
+    @staticmethod
+    def _pop_pending(client):
+        """Toma y vacía el hash de forma atómica (los logins nuevos caen en un hash nuevo)"""
+        key = make_key(LastLoginService.HASH_KEY)
+        pipe = client.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        pending, _ = pipe.execute()
+        return pending
+
+    @staticmethod
+    def write_many(entries):
+        """
+        Escribe [(user_id, datetime), ...] con un UPDATE por lote.
+        Nunca retrocede un last_login más reciente que ya esté en la BD.
+        """
+        table = User._meta.db_table
+        total = 0
+
+        for start in range(0, len(entries), LastLoginService.FLUSH_BATCH_SIZE):
+            batch = entries[start:start + LastLoginService.FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s::bigint, %s::timestamptz)'] * len(batch))
+            params = [value for entry in batch for value in entry]
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS u
+                    SET last_login = v.last_login
+                    FROM (VALUES {values}) AS v(id, last_login)
+                    WHERE u.id = v.id
+                      AND (u.last_login IS NULL OR u.last_login < v.last_login)
+                    """,
+                    params
+                )
+                total += cursor.rowcount
+
+        return total
+
+    @staticmethod
+    def flush():
+        """Vuelca el buffer de Redis a Postgres. Regresa las filas actualizadas"""
+        client = get_redis_client()
+        if client is None:
+            return 0
+
+        pending = LastLoginService._pop_pending(client)
+        if not pending:
+            return 0
+
+        entries = [
+            (int(user_id), datetime.fromtimestamp(float(ts), tz=dt_timezone.utc))
+            for user_id, ts in pending.items()
+        ]
+
+        try:
+            return LastLoginService.write_many(entries)
+        except Exception:
+            # Se regresan al hash para el siguiente intento (sin pisar logins más nuevos)
+            pipe = client.pipeline()
+            for user_id, ts in pending.items():
+                pipe.hsetnx(make_key(LastLoginService.HASH_KEY), user_id, ts)
+            pipe.execute()
+            raise
+
+
+class UsernameService:
+    """Asignación de usernames únicos para altas vía proveedores sociales."""
+    MAX_SUFFIX_DIGITS = 6
+
+    @staticmethod
+    def allocate(base_username):
+        """
+        Regresa base_username o base_username + el menor sufijo numérico libre.
+
+        Trae en una sola consulta (LIKE 'base%' sobre el índice varchar_pattern_ops)
+        todos los usernames que podrían chocar y elige el sufijo en memoria. Si otro
+        alta gana la carrera, el unique de username lo detecta y
+        CustomSocialAccountAdapter.save_user reintenta.
+        """
+        max_length = User._meta.get_field('username').max_length
+        base_username = base_username[:max_length]
+        # Si el sufijo no cabe se recorta la base: la consulta cubre también esos prefijos
+        prefix = base_username[:max_length - UsernameService.MAX_SUFFIX_DIGITS]
+        taken = set(
+            User.objects
+            .filter(username__startswith=prefix)
+            .values_list('username', flat=True)
+        )
+
+        if base_username not in taken:
+            return base_username
+
+        counter = 1
+        while True:
+            suffix = str(counter)
+            candidate = base_username[:max_length - len(suffix)] + suffix
+            if candidate not in taken:
+                return candidate
+            counter += 1
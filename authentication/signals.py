@@ -0,0 +1,10 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from authentication.services import LastLoginService
+
+
+@receiver(user_logged_in, dispatch_uid='buffered_update_last_login')
+def registrar_last_login(sender, user, **kwargs):
+    """Reemplaza django.contrib.auth.models.update_last_login (ver LastLoginService)"""
+    LastLoginService.record(user)
@@ -537,4 +537,421 @@ class RegistrationIntegrationTests(TestCase):
         # Verificar que se llamó send_email dos veces (registro + reenvío)
         self.assertEqual(mock_send_email.call_count, 2)
 
-        
\ No newline at end of file
+        
+
+from django.core.cache import cache
+from django.test import override_settings
+from authentication.services import GoogleIDTokenService
+
+
+@override_settings(GOOGLE_OAUTH2_ALLOWED_CLIENT_IDS=['web-id', 'android-id', 'ios-id'])
+class GoogleIDTokenServiceTests(TestCase):
+    """Tests para la verificación local de ID Tokens de Google"""
+
+    def setUp(self):
+        cache.delete(GoogleIDTokenService.CACHE_KEY)
+        cache.delete(GoogleIDTokenService.REFRESH_COOLDOWN_KEY)
+        GoogleIDTokenService._certs = None
+        GoogleIDTokenService._certs_expires_at = 0
+        GoogleIDTokenService._forced_refresh_at = 0
+
+        self.response = MagicMock()
+        self.response.json.return_value = {'kid1': 'cert1'}
+        self.response.headers = {'Cache-Control': 'public, max-age=19800, must-revalidate'}
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_certificados_se_descargan_una_sola_vez(self, mock_session, mock_decode):
+        """Varios logins seguidos solo descargan los certificados una vez"""
+        mock_session.return_value.get.return_value = self.response
+        mock_decode.return_value = {'sub': '123', 'iss': 'https://accounts.google.com'}
+
+        for _ in range(3):
+            GoogleIDTokenService.verify('token')
+
+        mock_session.return_value.get.assert_called_once()
+        self.assertEqual(mock_decode.call_count, 3)
+
+        # Otro proceso (sin copia en memoria) los toma del cache compartido
+        GoogleIDTokenService._certs = None
+        GoogleIDTokenService.verify('token')
+        mock_session.return_value.get.assert_called_once()
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_verifica_audiencia_en_una_sola_llamada(self, mock_session, mock_decode):
+        """La audiencia se valida contra todos los client_id en una sola decodificación"""
+        mock_session.return_value.get.return_value = self.response
+        mock_decode.return_value = {'sub': '123', 'iss': 'accounts.google.com'}
+
+        GoogleIDTokenService.verify('token')
+
+        mock_decode.assert_called_once_with(
+            'token', certs={'kid1': 'cert1'}, audience=['web-id', 'android-id', 'ios-id']
+        )
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_emisor_invalido(self, mock_session, mock_decode):
+        """Rechaza tokens firmados por un emisor distinto a Google"""
+        mock_session.return_value.get.return_value = self.response
+        mock_decode.return_value = {'sub': '123', 'iss': 'https://evil.example.com'}
+
+        with self.assertRaises(ValueError):
+            GoogleIDTokenService.verify('token')
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_refresca_certificados_si_google_rota_llaves(self, mock_session, mock_decode):
+        """Si el kid no está en la copia local se descargan los certificados de nuevo"""
+        mock_session.return_value.get.return_value = self.response
+        mock_decode.side_effect = [
+            ValueError('Certificate for key id kid2 not found.'),
+            {'sub': '123', 'iss': 'accounts.google.com'},
+        ]
+
+        GoogleIDTokenService.verify('token')
+
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_kid_desconocido_no_refresca_dentro_del_cooldown(self, mock_session, mock_decode):
+        """Tokens con kid inventado solo provocan una descarga por cooldown; el resto se rechaza"""
+        mock_session.return_value.get.return_value = self.response
+        mock_decode.side_effect = ValueError('Certificate for key id fake not found.')
+
+        for _ in range(5):
+            with self.assertRaises(ValueError):
+                GoogleIDTokenService.verify('token')
+
+        # Descarga inicial + un solo refresco forzado
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+
+        # Otro proceso ve el cooldown en el cache compartido
+        GoogleIDTokenService._forced_refresh_at = 0
+        with self.assertRaises(ValueError):
+            GoogleIDTokenService.verify('token')
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+
+    @patch('authentication.services.google_jwt.decode')
+    @patch.object(GoogleIDTokenService, '_get_session')
+    def test_otro_proceso_toma_las_llaves_rotadas_del_cache(self, mock_session, mock_decode):
+        """El proceso que no gana el refresco forzado acepta el kid nuevo desde el cache compartido"""
+        rotated = MagicMock()
+        rotated.json.return_value = {'kid1': 'cert1', 'kid2': 'cert2'}
+        rotated.headers = self.response.headers
+        mock_session.return_value.get.side_effect = [self.response, rotated]
+
+        def decode(token, certs, audience):
+            if 'kid2' not in certs:
+                raise ValueError('Certificate for key id kid2 not found.')
+            return {'sub': '123', 'iss': 'https://accounts.google.com'}
+        mock_decode.side_effect = decode
+
+        # Dos procesos con la misma copia vieja en memoria
+        stale = GoogleIDTokenService.get_certs()
+        stale_expires_at = GoogleIDTokenService._certs_expires_at
+
+        # Proceso A: gana el refresco forzado y publica las llaves rotadas
+        GoogleIDTokenService.verify('token')
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+
+        # Proceso B: sigue con la copia vieja y el cooldown compartido lo frena
+        GoogleIDTokenService._certs = stale
+        GoogleIDTokenService._certs_expires_at = stale_expires_at
+        GoogleIDTokenService._forced_refresh_at = 0
+
+        self.assertEqual(GoogleIDTokenService.verify('token')['sub'], '123')
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+        self.assertIn('kid2', GoogleIDTokenService._certs)
+
+
+from rest_framework.test import APIRequestFactory
+from rest_framework.exceptions import AuthenticationFailed
+from authentication.backends import CachedJWTAuthentication, UserPrincipalCache
+from authentication.services import ChangePasswordService
+from authentication.tokens import RefreshToken
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Tests para la autenticación JWT con usuario en cache"""
+
+    def setUp(self):
+        cache.clear()
+        UserPrincipalCache.clear_local()
+        self.factory = APIRequestFactory()
+        self.backend = CachedJWTAuthentication()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123',
+            is_active=True
+        )
+
+    def _request(self, user=None):
+        access = RefreshToken.for_user(user or self.user).access_token
+        return self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_segundo_request_no_consulta_bd(self):
+        """Después del primer request el usuario sale del cache sin tocar la BD"""
+        request = self._request()
+        self.backend.authenticate(request)
+
+        with self.assertNumQueries(0):
+            user, _ = self.backend.authenticate(request)
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_cache_no_guarda_el_password(self):
+        """En Redis viajan todos los campos del usuario menos el password, que queda diferido"""
+        self.backend.authenticate(self._request())
+
+        state = cache.get(UserPrincipalCache.STATE_KEY.format(user_id=self.user.pk))
+        data = cache.get(UserPrincipalCache.USER_KEY.format(user_id=self.user.pk, rev=state['rev']))
+        self.assertEqual(set(data), set(UserPrincipalCache.principal_fields()))
+        self.assertNotIn('password', data)
+
+        # El token trae el id como str y publish() usa el pk entero: ambos llegan al LRU
+        with self.assertNumQueries(0):
+            version, user = UserPrincipalCache.get(self.user.pk)
+            version_str, user_str = UserPrincipalCache.get(str(self.user.pk))
+        self.assertIs(user, user_str)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertEqual((user.username, user.is_active, version), ('cacheuser', True, self.user.auth_version))
+
+    def test_campos_del_usuario_en_cache_no_consultan(self):
+        """Con el usuario en cache, leer sus campos (los que usan serializers y permisos) no hace consultas"""
+        request = self._request()
+        self.backend.authenticate(request)
+
+        with self.assertNumQueries(0):
+            user, _ = self.backend.authenticate(request)
+            for name in UserPrincipalCache.principal_fields():
+                getattr(user, name)
+            user.get_full_name()
+
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        self.assertEqual(user.date_joined, self.user.date_joined)
+
+    def test_cambio_password_revoca_tokens(self):
+        """Un token emitido antes del cambio de contraseña se rechaza de inmediato"""
+        request = self._request()
+        self.backend.authenticate(request)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ChangePasswordService.change_password(self.user, 'testpass123', 'NuevaPass123!')
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate(request)
+
+        # Los tokens nuevos sí son válidos
+        self.user.refresh_from_db()
+        user, _ = self.backend.authenticate(self._request(self.user))
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_desactivar_usuario_revoca_tokens(self):
+        """Desactivar al usuario invalida sus tokens aunque el usuario esté en cache"""
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        request = self._request()
+        self.backend.authenticate(request)
+
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/api/v1/users/{self.user.pk}/deactivate/')
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.backend.authenticate(request)
+
+
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from authentication.jobs import purge_expired_tokens
+from authentication.tokens import RevocationStore
+
+
+class TokenRevocationTests(TestCase):
+    """Tests para la revocación de refresh tokens y la purga de tokens expirados"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = '/api/v1/auth/token/refresh/'
+        self.user = User.objects.create_user(
+            username='refreshuser',
+            email='refresh@example.com',
+            password='testpass123',
+            is_active=True
+        )
+
+    @patch('authentication.tokens.RevocationStore.is_enabled', return_value=True)
+    def test_refresh_con_redis_no_crece_la_bd(self, mock_enabled):
+        """Con Redis el login y la rotación no insertan filas en token_blacklist"""
+        refresh = str(RefreshToken.for_user(self.user))
+
+        response = self.client.post(self.url, {'refresh': refresh})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OutstandingToken.objects.count(), 0)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+        # El refresh token rotado ya no se puede reutilizar
+        response = self.client.post(self.url, {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_rechazado_tras_cambio_de_auth_version(self):
+        """Un refresh token anterior al cambio de contraseña ya no emite access tokens"""
+        refresh = str(RefreshToken.for_user(self.user))
+
+        self.user.bump_auth_version()
+        self.user.save()
+
+        response = self.client.post(self.url, {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_purga_tokens_expirados_por_lotes(self):
+        """La purga borra solo los tokens expirados, en lotes"""
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{i}', token='x',
+                created_at=now - timedelta(days=10), expires_at=now - timedelta(days=3)
+            )
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            user=self.user, jti='vigente', token='x',
+            created_at=now, expires_at=now + timedelta(days=7)
+        )
+
+        with self.settings(TOKEN_PURGE_BATCH_SIZE=2):
+            deleted = purge_expired_tokens()
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['vigente'])
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+
+    def test_importa_solo_blacklist_nueva(self):
+        """Cada corrida del job solo copia a Redis lo que se agregó a la blacklist desde la anterior"""
+        now = timezone.now()
+
+        def blacklist(jti, when):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=jti, token='x', created_at=when, expires_at=now + timedelta(days=7)
+            )
+            BlacklistedToken.objects.filter(pk=BlacklistedToken.objects.create(token=token).pk).update(
+                blacklisted_at=when
+            )
+
+        blacklist('viejo', now - timedelta(days=1))
+        self.assertEqual(RevocationStore.import_from_database(), 1)
+        self.assertTrue(RevocationStore.is_revoked('viejo'))
+
+        blacklist('nuevo', now + timedelta(seconds=1))
+        self.assertEqual(RevocationStore.import_from_database(), 1)
+        self.assertTrue(RevocationStore.is_revoked('nuevo'))
+
+
+from django.db.models.signals import post_save
+from redis.exceptions import RedisError
+from authentication.services import LastLoginService
+
+
+class LastLoginServiceTests(TestCase):
+    """Tests para el registro agrupado de last_login"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='lastlogin',
+            email='lastlogin@example.com',
+            password='testpass123',
+            is_active=True
+        )
+
+    def test_login_registra_last_login_sin_post_save(self):
+        """El login guarda last_login sin disparar el post_save del usuario"""
+        receiver = MagicMock()
+        post_save.connect(receiver, sender=User)
+        try:
+            response = APIClient().post('/api/v1/auth/login/', {
+                'username': 'lastlogin',
+                'password': 'testpass123'
+            })
+        finally:
+            post_save.disconnect(receiver, sender=User)
+
+        self.assertEqual(response.status_code, 200)
+        receiver.assert_not_called()
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_redis_caido_no_rompe_has_logged_in(self):
+        """Si Redis falla al consultar el buffer se asume que no hay login pendiente"""
+        client = MagicMock()
+        client.hexists.side_effect = RedisError('Redis caído')
+
+        with patch('authentication.services.get_redis_client', return_value=client):
+            self.assertFalse(LastLoginService.has_logged_in(self.user))
+
+        client.hexists.assert_called_once()
+
+    def test_volcado_no_retrocede_last_login(self):
+        """El UPDATE por lotes solo avanza last_login"""
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        newer = timezone.now()
+        older = newer - timedelta(hours=1)
+        User.objects.filter(pk=self.user.pk).update(last_login=newer)
+
+        updated = LastLoginService.write_many([(self.user.pk, older), (other.pk, newer)])
+
+        self.assertEqual(updated, 1)
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.last_login, newer)
+        self.assertEqual(other.last_login, newer)
+
+
+from authentication.services import UsernameService
+
+
+class UsernameServiceTests(TestCase):
+    """Tests para la asignación de usernames únicos en altas sociales"""
+
+    def test_username_libre_se_usa_tal_cual(self):
+        self.assertEqual(UsernameService.allocate('juanperez'), 'juanperez')
+
+    def test_mil_colisiones_en_una_sola_consulta(self):
+        """Con 1,000 usernames ocupados se encuentra el siguiente libre con una consulta"""
+        User.objects.bulk_create(
+            [User(username='juanperez', email='juanperez@example.com')] +
+            [User(username=f'juanperez{i}', email=f'juanperez{i}@example.com') for i in range(1, 1000)] +
+            [User(username='juanperezz', email='juanperezz@example.com')]
+        )
+
+        with self.assertNumQueries(1):
+            username = UsernameService.allocate('juanperez')
+
+        self.assertEqual(username, 'juanperez1000')
+
+    def test_usa_el_primer_hueco(self):
+        """Si se liberó un sufijo intermedio se reutiliza"""
+        User.objects.bulk_create([
+            User(username=name, email=f'{name}@example.com')
+            for name in ['maria', 'maria1', 'maria3']
+        ])
+
+        self.assertEqual(UsernameService.allocate('maria'), 'maria2')
+
+    def test_base_al_maximo_no_corta_el_sufijo(self):
+        """Con la base en el largo máximo se recorta la base, no el contador"""
+        max_length = User._meta.get_field('username').max_length
+        base = 'x' * max_length
+        User.objects.bulk_create([
+            User(username=name, email=f'{i}@example.com')
+            for i, name in enumerate([base, base[:-1] + '1'])
+        ])
+
+        self.assertEqual(UsernameService.allocate(base), base[:-1] + '2')
@@ -0,0 +1,110 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from core.utils.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStore:
+    """
+    Lista de tokens revocados en Redis.
+
+    Cada jti revocado es una clave con TTL igual al tiempo que le queda al token, así que
+    Redis la borra sola cuando el token ya expiró y el tamaño se mantiene acotado a los
+    tokens vivos. Si el cache no es Redis se usan las tablas de token_blacklist.
+    """
+    KEY = 'jwt:revoked:{jti}'
+    # Hasta dónde ya se copió la blacklist de la BD (vive en Redis: si Redis se vacía, se copia todo)
+    IMPORT_MARK_KEY = 'jwt:revoked:imported-until'
+    # Margen hacia atrás por blacklists de transacciones que hacen commit después de la corrida
+    IMPORT_OVERLAP_SECONDS = 300
+
+    @staticmethod
+    def is_enabled():
+        return get_redis_client() is not None
+
+    @classmethod
+    def _ttl(cls, exp):
+        return max(1, int(exp - time.time()))
+
+    @classmethod
+    def revoke(cls, jti, exp):
+        """Marca el jti como revocado. Regresa False si ya lo estaba (reuso del token)"""
+        return cache.add(cls.KEY.format(jti=jti), 1, timeout=cls._ttl(exp))
+
+    @classmethod
+    def is_revoked(cls, jti):
+        return cache.get(cls.KEY.format(jti=jti)) is not None
+
+    @classmethod
+    def import_from_database(cls):
+        """
+        Copia a Redis los tokens de la blacklist en BD que siguen vigentes. Solo las filas
+        nuevas desde la corrida anterior (menos IMPORT_OVERLAP_SECONDS); la primera vez, todas.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        started_at = timezone.now()
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=started_at)
+        mark = cache.get(cls.IMPORT_MARK_KEY)
+        if mark is not None:
+            rows = rows.filter(blacklisted_at__gt=mark)
+
+        count = 0
+        for jti, expires_at in rows.values_list('token__jti', 'token__expires_at').iterator(chunk_size=1000):
+            cls.revoke(jti, expires_at.timestamp())
+            count += 1
+
+        cache.set(cls.IMPORT_MARK_KEY, started_at - timedelta(seconds=cls.IMPORT_OVERLAP_SECONDS), timeout=None)
+        return count
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    RefreshToken que incluye la versión de autenticación del usuario.
+    El access token hereda el claim, así CachedJWTAuthentication puede rechazar
+    tokens emitidos antes de una desactivación o cambio de contraseña/correo.
+
+    Con Redis la revocación usa RevocationStore y no se insertan filas en
+    OutstandingToken/BlacklistedToken.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        if RevocationStore.is_enabled():
+            # Token.for_user sin el insert a OutstandingToken de BlacklistMixin
+            token = super(tokens.BlacklistMixin, cls).for_user(user)
+        else:
+            token = super().for_user(user)
+        token[settings.AUTH_VERSION_CLAIM] = user.auth_version
+        return token
+
+    def check_blacklist(self):
+        if not RevocationStore.is_enabled():
+            return super().check_blacklist()
+
+        if RevocationStore.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not RevocationStore.is_enabled():
+            return super().blacklist()
+
+        # SET NX: si dos requests usan el mismo refresh token al mismo tiempo solo uno gana
+        if not RevocationStore.revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+    def outstand(self):
+        if not RevocationStore.is_enabled():
+            return super().outstand()
+        return None
@@ -20,7 +20,7 @@ from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.tokens import RefreshToken
 from core.responses.messages import AuthMessages
 from authentication.base import BaseAuthenticationView
 
@@ -30,6 +30,7 @@ User = get_user_model()
 @auto_schema(**LOGIN_SCHEMA)
 class LoginView(BaseJWTView, GenericAPIView):
     """Vista de login personalizada con soporte para username o email"""
+    query_budgets = {'post': 8}
     permission_classes = [AllowAny]
     throttle_classes = [LoginThrottle]
     serializer_class = LoginSerializer
@@ -82,14 +83,14 @@ class LoginView(BaseJWTView, GenericAPIView):
 
 @auto_schema(**TOKEN_REFRESH)
 class TokenRefreshView(TokenRefreshView):
-    pass
+    query_budgets = {'post': 6}
 
 
 @auto_schema(**TOKEN_VERIFY)
 class TokenVerifyView(TokenVerifyView):
-    pass
+    query_budgets = {'post': 2}
 
 
 @auto_schema(**LOGOUT)
 class LogoutView(TokenBlacklistView):
-    pass
\ No newline at end of file
+    query_budgets = {'post': 4}
\ No newline at end of file
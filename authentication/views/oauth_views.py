@@ -23,6 +23,7 @@ User = get_user_model()
 
 @auto_schema(**GOOGLE)
 class GoogleLoginView(BaseOAuthView, SocialLoginView):
+    query_budgets = {'post': 12}
     adapter_class = GoogleIDTokenAdapter    
     client_class = OAuth2Client
     serializer_class = GoogleIDTokenSerializer 
@@ -85,6 +86,7 @@ class GoogleLoginView(BaseOAuthView, SocialLoginView):
 
 @auto_schema(**FACEBOOK)
 class FacebookLoginView(BaseOAuthView, SocialLoginView):
+    query_budgets = {'post': 12}
     adapter_class = CustomFacebookOAuth2Adapter
     client_class = OAuth2Client
     sentry_operation_name = "facebook_authentication"
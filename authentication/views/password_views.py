@@ -18,6 +18,7 @@ from rest_framework.permissions import IsAuthenticated
 
 @auto_schema(**PASSWORD_RESET_REQUEST)
 class PasswordResetRequestView(BaseAuthenticationView, generics.GenericAPIView):
+    query_budgets = {'post': 3}
     serializer_class = PasswordResetRequestSerializer
     sentry_operation_name = "password_reset_request"
     sentry_operation_name = "sensitive"
@@ -52,6 +53,7 @@ class PasswordResetRequestView(BaseAuthenticationView, generics.GenericAPIView):
 
 @auto_schema(**PASSWORD_RESET_CONFIRM)
 class PasswordResetConfirmView(BaseAuthenticationView, generics.GenericAPIView):
+    query_budgets = {'post': 5}
     serializer_class = SetNewPasswordSerializer
     sentry_operation_name = "password_reset_confirm"
     sentry_operation_name = "sensitive"
@@ -87,6 +89,7 @@ class PasswordResetConfirmView(BaseAuthenticationView, generics.GenericAPIView):
 
 @auto_schema(**CHANGE_PASSWORD)
 class ChangePasswordView(BaseAuthenticationView, generics.GenericAPIView):
+    query_budgets = {'post': 5}
     serializer_class = ChangePasswordSerializer
     permission_classes = [IsAuthenticated]
     sentry_operation_name = "change_password"
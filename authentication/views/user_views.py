@@ -28,6 +28,7 @@ User = get_user_model()
 
 @auto_schema(**REGISTRATION)
 class RegistrationAPIView(SentryErrorHandlerMixin,CreateAPIView):
+    query_budgets = {'post': 8}
     permission_classes = [AllowAny]
     serializer_class = UserCreateSerializer
     throttle_classes =  [RegisterThrottle]
@@ -71,6 +72,7 @@ class RegistrationAPIView(SentryErrorHandlerMixin,CreateAPIView):
     
 @auto_schema(**RESEND_TOKEN)
 class ResendTokenAPIView(SentryErrorHandlerMixin, CreateAPIView):
+    query_budgets = {'post': 3}
     permission_classes = [AllowAny]
     throttle_classes =  [SensitiveOperationThrottle]
     serializer_class = ResendTokenSerializer
@@ -127,6 +129,7 @@ class ResendTokenAPIView(SentryErrorHandlerMixin, CreateAPIView):
 
 @auto_schema(**VERIFY_EMAIL)
 class VerifyEmailAPIView(SentryErrorHandlerMixin, APIView):
+    query_budgets = {'get': 5}
     permission_classes = [AllowAny]
     throttle_classes = [SensitiveOperationThrottle]
     serializer_class = VerifyEmailSerializer
@@ -184,6 +187,7 @@ class VerifyEmailAPIView(SentryErrorHandlerMixin, APIView):
             )
 
         user.email = new_email
+        user.bump_auth_version()
         user.save()
 
         self.logger.info(
@@ -13,4 +13,27 @@ def custom_str(self):
 SocialAccount.__str__ = custom_str
 
 # Volver a registrar
-admin.site.register(SocialAccount, SocialAccountAdmin)
\ No newline at end of file
+admin.site.register(SocialAccount, SocialAccountAdmin)
+
+from django.utils import timezone
+from core.models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at', 'last_error']
+    ordering = ['-created_at']
+    actions = ['retry_emails']
+
+    @admin.action(description="Reintentar envío de los correos seleccionados")
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} correo(s) regresados a la cola.")
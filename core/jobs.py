@@ -0,0 +1,15 @@
+import logging
+from core.metrics import track_job
+
+logger = logging.getLogger(__name__)
+
+@track_job
+def process_email_queue():
+    """Envía los correos pendientes de la cola de salida"""
+    from core.services.email_service import EmailQueueService
+
+    try:
+        return EmailQueueService.process_queue()
+    except Exception as e:
+        logger.error(f'Error en process_email_queue: {str(e)}')
+        raise
@@ -0,0 +1,148 @@
+"""
+Piezas del pipeline de logging (ver LOGGING en settings).
+
+- RequestIDFilter / request_id_var: agrega el id del request a cada registro.
+- JSONFormatter: una línea JSON compacta por registro.
+- QueueListenerHandler: el hilo del request solo encola; un QueueListener por proceso
+  escribe en los handlers reales (consola, archivos).
+- ProcessSafeRotatingFileHandler: rotación por tamaño segura con varios workers de gunicorn.
+"""
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+# Atributos estándar de LogRecord que no se repiten como campos extra
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+class RequestIDFilter(logging.Filter):
+    def filter(self, record):
+        # En el hilo del listener el contextvar ya no existe: se respeta el valor que puso la cola
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea el registro como JSON en una sola línea, incluyendo los campos de extra={...}"""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'pid': record.process,
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+
+        return json.dumps(data, default=str, ensure_ascii=False, separators=(',', ':'))
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler que arranca su propio QueueListener con los handlers indicados.
+
+    En LOGGING se declara con handlers=['cfg://handlers.console', ...]. Si la cola se llena
+    se descarta el registro en lugar de bloquear el request.
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        targets = [handlers[i] for i in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                # dictConfig reintenta cuando el handler destino ya existe
+                raise ValueError('target not configured yet')
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=respect_handler_level)
+        self.listener.start()
+
+    def prepare(self, record):
+        """
+        Copia el registro con el mensaje ya resuelto y el traceback como texto,
+        sin formatearlo aquí (cada handler destino aplica su propio formatter).
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class ProcessSafeRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler que serializa rotación y escritura entre procesos con flock
+    y reabre el archivo si otro proceso ya lo rotó.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self._lock_file = open(f'{self.baseFilename}.lock', 'a') if fcntl else None
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            rotated = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = self._open()
+
+    def emit(self, record):
+        if self._lock_file is None:
+            return super().emit(record)
+
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                super().emit(record)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from core.services.email_service import EmailTemplateRegistry
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark del render de correos: render_to_string + strip_tags vs plantillas compiladas'
+
+    TEMPLATES = {
+        'emails/confirm_email.html': 'confirm_url',
+        'emails/password_reset.html': 'reset_url',
+        'emails/update_email.html': 'confirm_url',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=5000,
+            help='Correos a renderizar por plantilla (simula una campaña de re-verificación)'
+        )
+
+    def _measure(self, func, count):
+        start = time.perf_counter()
+        for i in range(count):
+            func(i)
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        count = options['count']
+        EmailTemplateRegistry.clear()
+
+        for template_name, url_key in self.TEMPLATES.items():
+            def context(i):
+                return {'nombre': f'usuario{i}', url_key: f'https://manzaspots.com/confirm/{i}/token?x=1&y=2'}
+
+            legacy = self._measure(
+                lambda i: strip_tags(render_to_string(template_name, context(i))),
+                count
+            )
+            compiled = self._measure(
+                lambda i: EmailTemplateRegistry.render(template_name, context(i)),
+                count
+            )
+
+            self.stdout.write(
+                f'{template_name}: render_to_string+strip_tags {legacy * 1000 / count:.3f} ms/correo | '
+                f'registro {compiled * 1000 / count:.3f} ms/correo | '
+                f'{legacy / compiled:.1f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Benchmark terminado ({count} correos por plantilla)'))
@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.core.management.base import BaseCommand
+from rich.console import Console
+from rich.logging import RichHandler
+
+from core.logging import JSONFormatter, ProcessSafeRotatingFileHandler, QueueListenerHandler, RequestIDFilter
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark del costo de logging por evento en el hilo del request (anterior vs cola + JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20000, help='Eventos de log a emitir')
+
+    def _event(self, i):
+        return {
+            'event_type': 'jwt_login_success',
+            'success': True,
+            'user_id': i,
+            'user_email': f'user{i}@example.com',
+            'is_new_user': False,
+            'method': 'username_email',
+        }
+
+    def _legacy(self, logger, i):
+        log_data = self._event(i)
+        message = f"[bold cyan]{log_data['event_type']}[/bold cyan]: {log_data['user_email']}"
+        details = json.dumps(log_data, indent=2, default=str)
+        logger.info(f"{message}\n{details}", extra={'log_data': log_data})
+
+    def _current(self, logger, i):
+        log_data = self._event(i)
+        logger.info(f"{log_data['event_type']}: {log_data['user_email']}", extra={'log_data': log_data})
+
+    def _run(self, name, handlers, emit, count):
+        logger = logging.getLogger(f'bench.{name}')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        for handler in handlers:
+            logger.addHandler(handler)
+
+        start = time.perf_counter()
+        for i in range(count):
+            emit(logger, i)
+        elapsed = time.perf_counter() - start
+
+        for handler in handlers:
+            logger.removeHandler(handler)
+            handler.close()
+        return elapsed
+
+    def handle(self, *args, **options):
+        count = options['count']
+        devnull = open(os.devnull, 'w')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rich = RichHandler(console=Console(file=devnull), rich_tracebacks=True, markup=True)
+            rotating = RotatingFileHandler(os.path.join(tmp, 'legacy.log'), maxBytes=15 * 1024 * 1024, backupCount=2)
+            rotating.setFormatter(logging.Formatter('{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{'))
+            legacy = self._run('legacy', [rich, rotating], self._legacy, count)
+
+            console = logging.StreamHandler(devnull)
+            json_file = ProcessSafeRotatingFileHandler(os.path.join(tmp, 'json.log'), maxBytes=15 * 1024 * 1024, backupCount=2)
+            for handler in (console, json_file):
+                handler.setFormatter(JSONFormatter())
+            queue_handler = QueueListenerHandler([console, json_file], queue_size=count + 1)
+            queue_handler.addFilter(RequestIDFilter())
+            queued = self._run('queue', [queue_handler], self._current, count)
+
+        devnull.close()
+
+        self.stdout.write(f'anterior (rich + json indent + archivo): {legacy * 1e6 / count:.1f} µs/evento')
+        self.stdout.write(f'cola + JSON compacto:                    {queued * 1e6 / count:.1f} µs/evento')
+        self.stdout.write(self.style.SUCCESS(f'Benchmark terminado ({count} eventos, {legacy / queued:.1f}x)'))
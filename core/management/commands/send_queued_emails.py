@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.email_service import EmailQueueService
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la cola de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Se queda drenando la cola indefinidamente (worker dedicado)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=int,
+            default=5,
+            help='Segundos de espera entre pasadas cuando se usa --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = EmailQueueService.process_queue()
+
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Correos enviados: {sent}, fallidos: {failed}')
+                )
+
+            if not options['loop']:
+                break
+
+            time.sleep(options['sleep'])
@@ -0,0 +1,121 @@
+"""
+Métricas de Prometheus (expuestas en /metrics, ver core.views.metrics_view).
+
+Con varios workers de gunicorn se usa el modo multiproceso de prometheus_client: cada proceso
+escribe sus valores en PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py lo prepara y marca los
+workers muertos) y /metrics los suma al momento de la lectura. Sin esa variable (runserver,
+tests) se usa el registro normal en memoria.
+"""
+import functools
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# Buckets pensados para una API: la mayoría de respuestas debe caer por debajo de 500 ms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200)
+
+# El método llega tal cual del cliente; cualquier otro valor se agrupa en 'other'
+# para no crear una serie por cada verbo inventado
+HTTP_METHODS = frozenset({'GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'})
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Latencia de los requests por vista y acción',
+    ['view', 'action', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Consultas SQL ejecutadas por request',
+    ['view', 'action'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Tiempo total en SQL por request',
+    ['view', 'action'],
+    buckets=LATENCY_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Lecturas del cache de Django por namespace de la llave',
+    ['namespace', 'result'],
+)
+
+THROTTLE_REJECTIONS = Counter(
+    'throttle_rejections_total',
+    'Requests rechazados por throttling',
+    ['scope'],
+)
+
+JOB_DURATION = Histogram(
+    'scheduler_job_duration_seconds',
+    'Duración de los jobs de APScheduler',
+    ['job', 'status'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def get_registry():
+    """Registro a exponer: agregado de todos los workers en modo multiproceso"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    return generate_latest(get_registry())
+
+
+def get_method_label(request):
+    method = request.method
+    return method if method in HTTP_METHODS else 'other'
+
+
+def get_view_labels(request):
+    """
+    (vista, acción) del request resuelto. Para ViewSets la acción es la del router
+    (list, retrieve, nearby...); para APIView es el método HTTP.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', ''
+
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    view = view_class.__name__ if view_class else func.__name__
+
+    actions = getattr(func, 'actions', None)
+    if actions:
+        return view, actions.get(request.method.lower(), '')
+    return view, get_method_label(request).lower()
+
+
+def record_cache_lookup(key, hits, misses):
+    namespace = key.split(':', 1)[0] if ':' in key else 'other'
+    if hits:
+        CACHE_REQUESTS.labels(namespace, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(namespace, 'miss').inc(misses)
+
+
+def track_job(func):
+    """Mide la duración de un job de APScheduler (conserva el nombre para el jobstore)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            result = func(*args, **kwargs)
+            status = 'success'
+            return result
+        finally:
+            JOB_DURATION.labels(func.__name__, status).observe(time.perf_counter() - start)
+    return wrapper
@@ -0,0 +1,148 @@
+import logging
+import re
+import time
+import uuid
+
+import sentry_sdk
+from django.conf import settings
+from django.db import connection
+
+from core import metrics
+from core.logging import request_id_var
+from core.query_budget import QueryBudgetExceeded, get_query_budget
+
+logger = logging.getLogger(__name__)
+
+# Ids aceptados desde el cliente o el balanceador (evita inyectar basura en los logs)
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIDMiddleware:
+    """
+    Asigna un id a cada request (o respeta X-Request-ID si viene del proxy) para
+    correlacionar todas las líneas de log del mismo request. Se regresa en la respuesta.
+    """
+    header = 'HTTP_X_REQUEST_ID'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get(self.header, '')
+        if not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class SentrySlowRequestMiddleware:
+    """
+    Las trazas se muestrean por endpoint (core.sentry.traces_sampler); para no perder los
+    requests lentos que quedaron fuera de la muestra se envía un evento ligero con la ruta
+    y la duración. Los errores siempre se envían como eventos (sujetos al límite por huella).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not sentry_sdk.is_initialized():
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= settings.SENTRY_SLOW_REQUEST_MS:
+            transaction = sentry_sdk.get_current_scope().transaction
+            if transaction is None or not transaction.sampled:
+                self._capture_slow_request(request, response, duration_ms)
+
+        return response
+
+    def _capture_slow_request(self, request, response, duration_ms):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else request.path
+
+        with sentry_sdk.new_scope() as scope:
+            scope.level = 'warning'
+            scope.fingerprint = ['slow-request', request.method, route]
+            scope.set_tags({'route': route, 'method': request.method, 'status_code': response.status_code})
+            scope.set_extra('duration_ms', round(duration_ms))
+            sentry_sdk.capture_message(f'Request lento: {request.method} {route}')
+
+
+class _QueryStats:
+    """execute_wrapper que cuenta consultas y tiempo en SQL del request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Latencia, consultas SQL y tiempo en BD por vista/acción para /metrics"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _QueryStats()
+        start = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view, action = metrics.get_view_labels(request)
+        status_class = f'{response.status_code // 100}xx'
+        metrics.REQUEST_LATENCY.labels(view, action, metrics.get_method_label(request), status_class).observe(duration)
+        metrics.REQUEST_QUERIES.labels(view, action).observe(stats.count)
+        metrics.REQUEST_DB_TIME.labels(view, action).observe(stats.duration)
+
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Solo desarrollo (QUERY_BUDGET_MODE): compara las consultas del request con el presupuesto
+    de la vista (ver core.query_budget). En modo 'warn' deja un warning y el header
+    X-Query-Budget; en modo 'raise' lanza QueryBudgetExceeded para que el N+1 no pase inadvertido.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = settings.QUERY_BUDGET_MODE
+
+    def __call__(self, request):
+        stats = _QueryStats()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+
+        budget = get_query_budget(request)
+        if budget is None or stats.count <= budget:
+            return response
+
+        view, action = metrics.get_view_labels(request)
+        message = f'{view}.{action} hizo {stats.count} consultas (presupuesto {budget}): {request.method} {request.path}'
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message)
+        response['X-Query-Budget'] = f'{stats.count}/{budget}'
+        return response
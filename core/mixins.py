@@ -9,9 +9,11 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import DatabaseError, IntegrityError
 from smtplib import SMTPException
 from requests.exceptions import RequestException, Timeout, ConnectionError
+from django.utils import timezone
 from django.utils.html import format_html
 from django.db import transaction
 from core.responses.messages import ErrorMessages
+from core.utils.pagination import EstimatedCountPaginator
 
 
 class SentryErrorHandlerMixin:
@@ -346,34 +348,31 @@ class SentryErrorHandlerMixin:
         )
     
     def _capture_to_sentry(self, exception, level, tags, extra, request=None):
-        """Capturar excepción en Sentry con contexto"""
-        with sentry_sdk.push_scope() as scope:
+        """
+        Capturar excepción en Sentry con contexto.
+        Sin Sentry inicializado (DEBUG, tests) no se arma el scope. Del usuario solo se manda el id.
+        """
+        if not sentry_sdk.is_initialized():
+            return
+
+        with sentry_sdk.new_scope() as scope:
             scope.level = level
-            
-            # Agregar tags
-            for key, value in tags.items():
-                scope.set_tag(key, str(value))
-            
-            # Agregar extra
+            scope.set_tags({key: str(value) for key, value in tags.items()})
+
             for key, value in extra.items():
                 scope.set_extra(key, value)
-            
+
             # Agregar contexto de request si existe
             if request:
                 scope.set_context("request", {
-                    "ip": request.META.get('REMOTE_ADDR'),
-                    "user_agent": request.META.get('HTTP_USER_AGENT', '')[:200],
                     "path": request.path,
                     "method": request.method
                 })
-                
-                if hasattr(request, 'user') and request.user.is_authenticated:
-                    scope.set_user({
-                        'id': request.user.id,
-                        'email': request.user.email,
-                        'username': request.user.username
-                    })
-            
+
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    scope.set_user({'id': user.pk})
+
             sentry_sdk.capture_exception(exception)
 
 
@@ -474,12 +473,27 @@ class SoftDeleteAdminMixin:
     actions = ['action_restore', 'action_deactivate']
 
     def action_restore(self, request, queryset):
-        queryset.update(deleted_at=None, is_active=True)
+        queryset.update(deleted_at=None, is_active=True, updated_at=timezone.now())
         self.message_user(request, f"{queryset.count()} registro(s) restaurados.")
     action_restore.short_description = "Restaurar registros seleccionados"
 
     def action_deactivate(self, request, queryset):
-        queryset.update(is_active=False)
+        queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(request, f"{queryset.count()} registro(s) desactivados.")
     action_deactivate.short_description = "Desactivar registros seleccionados"
 
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist del admin para tablas con millones de filas: conteo estimado
+    (ver core.utils.pagination) y sin el COUNT(*) extra del total sin filtrar.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            base_queryset=self.get_queryset(request),
+        )
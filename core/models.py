@@ -6,9 +6,11 @@ class SoftDeleteQuerySet(models.QuerySet):
     """QuerySet personalizado para soft delete"""
     
     def delete(self):
-        """Soft delete para múltiples registros"""
+        """Soft delete para múltiples registros (updated_at marca la baja para la sincronización)"""
+        now = timezone.now()
         return self.update(
-            deleted_at=timezone.now(),
+            deleted_at=now,
+            updated_at=now,
             is_active=False
         )
     
@@ -109,4 +111,37 @@ class BaseModel(models.Model):
         return self.deleted_at is not None
     
     def __str__(self):
-        return f"{self.__class__.__name__} - {self.pk}"
\ No newline at end of file
+        return f"{self.__class__.__name__} - {self.pk}"
+
+class OutboundEmail(models.Model):
+    """
+    Cola de correos salientes.
+    Las vistas solo encolan; un worker los envía en lotes reutilizando una sola conexión SMTP,
+    reintenta con backoff exponencial y deja en FAILED (dead letter) los que agotan los intentos.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendiente'
+        SENT = 'sent', 'Enviado'
+        FAILED = 'failed', 'Fallido'
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
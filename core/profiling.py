@@ -0,0 +1,206 @@
+"""
+Perfilado bajo demanda de requests en producción (solo staff).
+
+1. Un usuario staff pide un token firmado: POST /api/v1/profiling/token/
+2. Lo manda en el header X-Profile-Token (o ?_profile=<token>) en cualquier request de /api/v1/
+3. El request se ejecuta con profiler (pyinstrument si está instalado, si no cProfile) y con
+   el log completo de SQL; el reporte se guarda en cache y su id llega en X-Profile-Id.
+   Con X-Profile-Mode: inline (o ?_profile_mode=inline) el reporte reemplaza la respuesta.
+4. GET /api/v1/profiling/<id>/ regresa el reporte.
+
+Sin header ni parámetro el middleware solo hace dos búsquedas en request.META.
+"""
+import cProfile
+import io
+import pstats
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.utils import timezone
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # dependencia opcional: se usa cProfile
+    SamplingProfiler = None
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_TOKEN'
+PROFILE_MODE_HEADER = 'HTTP_X_PROFILE_MODE'
+PROFILE_PARAM = '_profile'
+PROFILE_MODE_PARAM = '_profile_mode'
+PROFILED_PATH_PREFIX = '/api/v1/'
+
+
+class ProfilingTokenService:
+    """Tokens firmados (TimestampSigner) que identifican al staff que pidió el perfilado"""
+    salt = 'core.profiling'
+
+    @classmethod
+    def make_token(cls, user):
+        return signing.TimestampSigner(salt=cls.salt).sign(str(user.pk))
+
+    @classmethod
+    def get_user(cls, token):
+        """Usuario staff activo dueño del token, o None si el token es inválido o expiró"""
+        try:
+            user_id = signing.TimestampSigner(salt=cls.salt).unsign(
+                token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+            )
+        except signing.BadSignature:
+            return None
+
+        return get_user_model().objects.filter(pk=user_id, is_staff=True, is_active=True).first()
+
+
+class ProfileStore:
+    """Reportes de perfilado en el cache compartido (visibles desde cualquier worker)"""
+
+    @staticmethod
+    def _key(profile_id):
+        return f'profiling:{profile_id}'
+
+    @classmethod
+    def save(cls, report):
+        cache.set(cls._key(report['id']), report, settings.PROFILING_RESULT_TTL)
+
+    @classmethod
+    def get(cls, profile_id):
+        return cache.get(cls._key(profile_id))
+
+
+class SQLRecorder:
+    """execute_wrapper que guarda cada consulta con su duración"""
+
+    def __init__(self, max_queries):
+        self.max_queries = max_queries
+        self.queries = []
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < self.max_queries:
+                self.queries.append({'sql': sql, 'duration_ms': round(elapsed * 1000, 3), 'many': many})
+
+    def as_dict(self):
+        # Las consultas repetidas con el mismo SQL son la huella típica de un N+1
+        repeated = Counter(query['sql'] for query in self.queries)
+        return {
+            'count': self.count,
+            'duration_ms': round(self.duration * 1000, 3),
+            'repeated': [
+                {'sql': sql, 'count': count}
+                for sql, count in repeated.most_common(10) if count > 1
+            ],
+            'queries': self.queries,
+            'truncated': self.count > len(self.queries),
+        }
+
+
+class _Profiler:
+    """pyinstrument (muestreo) si está disponible; si no cProfile"""
+
+    def __init__(self):
+        if SamplingProfiler is not None:
+            self.engine = 'pyinstrument'
+            self._profiler = SamplingProfiler()
+        else:
+            self.engine = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.engine == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.engine == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def as_dict(self):
+        if self.engine == 'pyinstrument':
+            return {
+                'engine': self.engine,
+                'text': self._profiler.output_text(unicode=True, color=False),
+                'html': self._profiler.output_html(),
+            }
+
+        output = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(settings.PROFILING_CPROFILE_LINES)
+        return {'engine': self.engine, 'text': output.getvalue()}
+
+
+class ProfilingMiddleware:
+    """
+    Perfila el request cuando trae un token de perfilado válido (ver docstring del módulo).
+    Va al inicio de MIDDLEWARE para que el perfil cubra el resto de middlewares y la vista.
+    Con tokens inválidos el request sigue normal, sin perfilar.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(PROFILE_HEADER)
+        if token is None and PROFILE_PARAM not in request.META.get('QUERY_STRING', ''):
+            return self.get_response(request)
+
+        token = token or request.GET.get(PROFILE_PARAM)
+        if not token or not request.path.startswith(PROFILED_PATH_PREFIX):
+            return self.get_response(request)
+
+        user = ProfilingTokenService.get_user(token)
+        if user is None:
+            return self.get_response(request)
+
+        return self._profile(request, user)
+
+    def _profile(self, request, user):
+        recorder = SQLRecorder(settings.PROFILING_MAX_QUERIES)
+        profiler = _Profiler()
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        duration = time.perf_counter() - start
+
+        report = {
+            'id': uuid.uuid4().hex,
+            'created_at': timezone.now().isoformat(),
+            'requested_by': user.pk,
+            'request_id': getattr(request, 'request_id', None),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status_code': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'sql': recorder.as_dict(),
+            'profile': profiler.as_dict(),
+        }
+        ProfileStore.save(report)
+
+        mode = request.META.get(PROFILE_MODE_HEADER) or request.GET.get(PROFILE_MODE_PARAM)
+        if mode == 'inline':
+            response = JsonResponse(report)
+
+        response['X-Profile-Id'] = report['id']
+        return response
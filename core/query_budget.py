@@ -0,0 +1,35 @@
+"""
+Presupuesto de consultas SQL por acción de cada vista.
+
+Las vistas declaran:
+
+    query_budgets = {'list': 4, 'retrieve': 3, 'favorites': 6}
+
+con la acción del router (ViewSets) o el método HTTP en minúsculas (APIView). El presupuesto
+es por request y NO depende del tamaño de página: si una página de 50 hace más consultas que
+una de 5 hay un N+1. QueryBudgetMiddleware lo vigila en desarrollo y los tests de
+spots_routes lo verifican para todas las rutas de la API.
+"""
+from core.metrics import get_view_labels
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_view_class(callback):
+    return getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+
+
+def get_query_budget(request):
+    """Presupuesto de la vista/acción resuelta en el request, o None si no declara"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    budgets = getattr(get_view_class(match.func), 'query_budgets', None)
+    if budgets is None:
+        return None
+
+    _, action = get_view_labels(request)
+    return budgets.get(action)
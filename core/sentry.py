@@ -0,0 +1,152 @@
+"""
+Políticas de Sentry (se conectan en sentry_sdk.init dentro de settings).
+
+- traces_sampler: tasa de trazas por endpoint (SENTRY_TRACE_RULES) en lugar de trazar todo.
+- before_send: limita los eventos repetidos con la misma huella (mismo tipo de error en la
+  misma línea) a SENTRY_ERROR_BURST por ventana; los descartados se reportan como conteo
+  en el siguiente evento que sí se envía.
+"""
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+_compiled_rules = None
+
+
+def _get_rules():
+    """Compila SENTRY_TRACE_RULES una sola vez: [(métodos | None, regex, tasa)]"""
+    global _compiled_rules
+    if _compiled_rules is None:
+        _compiled_rules = [
+            (set(methods) if methods else None, re.compile(pattern), float(rate))
+            for methods, pattern, rate in settings.SENTRY_TRACE_RULES
+        ]
+    return _compiled_rules
+
+
+def _request_from_context(sampling_context):
+    """Regresa (método, path) desde el contexto de muestreo de WSGI o ASGI"""
+    environ = sampling_context.get('wsgi_environ')
+    if environ:
+        return environ.get('REQUEST_METHOD', ''), environ.get('PATH_INFO', '')
+
+    scope = sampling_context.get('asgi_scope')
+    if scope:
+        return scope.get('method', ''), scope.get('path', '')
+
+    return None, None
+
+
+def traces_sampler(sampling_context):
+    """
+    Decide la tasa de muestreo de cada transacción.
+
+    Si el servicio que nos llamó ya decidió (parent_sampled) se respeta para no romper la traza.
+    Para requests HTTP gana la primera regla de SENTRY_TRACE_RULES que coincida con método y path;
+    lo demás (jobs, comandos) usa SENTRY_TRACES_SAMPLE_RATE.
+    """
+    parent_sampled = sampling_context.get('parent_sampled')
+    if parent_sampled is not None:
+        return float(parent_sampled)
+
+    method, path = _request_from_context(sampling_context)
+    if path is not None:
+        for methods, pattern, rate in _get_rules():
+            if (methods is None or method in methods) and pattern.search(path):
+                return rate
+
+    return settings.SENTRY_TRACES_SAMPLE_RATE
+
+
+class FingerprintRateLimiter:
+    """
+    Ventana fija por huella de error, en memoria del proceso.
+
+    allow(key) regresa (permitido, descartados_en_la_ventana_anterior).
+    """
+
+    def __init__(self, max_events, window_seconds, max_keys=1000):
+        self.max_events = max_events
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            window = self._windows.get(key)
+
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._evict(now)
+                self._windows[key] = [now, 1, 0]
+                return True, suppressed
+
+            if window[1] < self.max_events:
+                window[1] += 1
+                return True, 0
+
+            window[2] += 1
+            return False, 0
+
+    def _evict(self, now):
+        """Quita ventanas vencidas; si no alcanza, empieza de cero"""
+        expired = [k for k, w in self._windows.items() if now - w[0] >= self.window_seconds]
+        for key in expired:
+            del self._windows[key]
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+
+
+_limiter = None
+
+
+def get_error_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = FingerprintRateLimiter(
+            settings.SENTRY_ERROR_BURST,
+            settings.SENTRY_ERROR_WINDOW_SECONDS,
+        )
+    return _limiter
+
+
+def get_event_fingerprint(event, hint):
+    """
+    Huella del evento: fingerprint explícito si lo hay; si no, tipo de excepción más el
+    último frame del traceback; para mensajes, el texto sin formatear.
+    """
+    fingerprint = event.get('fingerprint')
+    if fingerprint and fingerprint != ['{{ default }}']:
+        return '|'.join(str(part) for part in fingerprint)
+
+    exc_info = (hint or {}).get('exc_info')
+    if exc_info and exc_info[0] is not None:
+        exc_type, _, tb = exc_info
+        frame = traceback.extract_tb(tb)[-1] if tb is not None else None
+        location = f'{frame.filename}:{frame.lineno}' if frame else ''
+        return f'{exc_type.__module__}.{exc_type.__qualname__}@{location}'
+
+    logentry = event.get('logentry') or {}
+    return f"{event.get('logger', '')}:{logentry.get('message') or event.get('message', '')}"
+
+
+def before_send(event, hint):
+    """Descarta ráfagas de eventos idénticos (p. ej. miles de DatabaseError cuando cae la BD)"""
+    allowed, suppressed = get_error_limiter().allow(get_event_fingerprint(event, hint))
+    if not allowed:
+        return None
+
+    if suppressed:
+        event.setdefault('extra', {})['suppressed_events'] = suppressed
+    return event
@@ -1,21 +1,100 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from datetime import timedelta
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template import TemplateDoesNotExist
+from django.template.loader import select_template
+from django.utils import timezone, translation
 from django.utils.html import strip_tags
 import logging
+import threading
+
+from core.utils.background import run_in_background
 
 logger = logging.getLogger(__name__)
 
+class EmailTemplateRegistry:
+    """
+    Registro de plantillas de correo compiladas.
+
+    Cada plantilla (HTML y su variante .txt) se busca y compila una sola vez por locale y se
+    reutiliza en cada envío: el texto estático de la plantilla queda en el árbol compilado y
+    solo se evalúan las variables. Si existe emails/<locale>/<nombre> se usa esa versión, si no
+    la plantilla base. Sin .txt la parte de texto se obtiene con strip_tags (una vez por render).
+    """
+    _compiled = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _candidates(template_name, locale):
+        folder, _, filename = template_name.rpartition('/')
+        names = []
+        if locale:
+            for code in dict.fromkeys([locale, locale.split('-')[0]]):
+                names.append(f"{folder}/{code}/{filename}" if folder else f"{code}/{filename}")
+        names.append(template_name)
+        return names
+
+    @classmethod
+    def get(cls, template_name, locale=None):
+        """Regresa (html_template, text_template | None) compiladas para el locale"""
+        locale = (locale or settings.LANGUAGE_CODE).lower()
+        key = (template_name, locale)
+
+        compiled = cls._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        with cls._lock:
+            compiled = cls._compiled.get(key)
+            if compiled is not None:
+                return compiled
+
+            candidates = cls._candidates(template_name, locale)
+            html_template = select_template(candidates)
+
+            text_candidates = [name.rsplit('.', 1)[0] + '.txt' for name in candidates]
+            try:
+                text_template = select_template(text_candidates)
+            except TemplateDoesNotExist:
+                text_template = None
+
+            compiled = (html_template, text_template)
+            cls._compiled[key] = compiled
+            return compiled
+
+    @classmethod
+    def render(cls, template_name, context, locale=None):
+        """Renderiza (texto_plano, html) desde las plantillas compiladas"""
+        locale = locale or settings.LANGUAGE_CODE
+        html_template, text_template = cls.get(template_name, locale)
+
+        with translation.override(locale):
+            html_content = html_template.render(context)
+            if text_template is not None:
+                plain_message = text_template.render(context)
+            else:
+                plain_message = strip_tags(html_content)
+
+        return plain_message, html_content
+
+    @classmethod
+    def clear(cls):
+        cls._compiled.clear()
+
+
 class EmailService:
+    FROM_EMAIL = 'noreply@tuapp.com'
+
     @classmethod
-    def send_template_email(cls, subject, to_email, template_name, **context):
+    def send_template_email(cls, subject, to_email, template_name, locale=None, **context):
         """
-        Envía un correo basado en una plantilla HTML.
+        Renderiza un correo basado en una plantilla HTML y lo deja en la cola de salida.
         Permite pasar cualquier cantidad de variables al contexto.
-        
+        El envío real lo hace EmailQueueService fuera del request.
+
         Ejemplo de uso:
             send_template_email(
                 subject='Restablecer contraseña',
@@ -25,41 +104,269 @@ class EmailService:
                 reset_url='http://localhost:8000/auth/reset-password/...'
             )
         """
-        try: 
-            html_content = render_to_string(template_name, context)
-            plain_message = strip_tags(html_content) 
-            
-            result = send_mail(
+        try:
+            plain_message, html_content = EmailTemplateRegistry.render(template_name, context, locale)
+
+            EmailQueueService.enqueue(
                 subject,
                 plain_message,
-                'noreply@tuapp.com',
-                [to_email],
+                cls.FROM_EMAIL,
+                to_email,
                 html_message=html_content
             )
-            
-            return result == 1
-            
+
+            return True
+
         except Exception as e:
-            logger.exception(f"Error al enviar correo a {to_email}: {e}")
+            logger.exception(f"Error al encolar correo a {to_email}: {e}")
             return False
 
+    @classmethod
+    def send_bulk_template_email(cls, subject, template_name, recipients, locale=None):
+        """
+        Encola el mismo correo para muchos destinatarios (campañas de re-verificación, avisos).
+        Usa las plantillas compiladas y un solo INSERT por lote.
+
+        Args:
+            recipients: iterable de (to_email, context)
+
+        Returns:
+            int: Correos encolados
+        """
+        from core.models import OutboundEmail
+
+        emails = []
+        for to_email, context in recipients:
+            plain_message, html_content = EmailTemplateRegistry.render(template_name, context, locale)
+            emails.append(OutboundEmail(
+                subject=subject,
+                body=plain_message,
+                from_email=cls.FROM_EMAIL,
+                to_email=to_email,
+                html_body=html_content,
+            ))
+
+        OutboundEmail.objects.bulk_create(emails, batch_size=500)
+
+        if emails and settings.EMAIL_QUEUE_SEND_ON_COMMIT:
+            transaction.on_commit(lambda: run_in_background(EmailQueueService.process_queue))
+
+        return len(emails)
+
+
+class EmailQueueService:
+    """
+    Envío de la cola de correos (core.models.OutboundEmail).
+
+    - enqueue: inserta el correo y, al hacer commit, dispara un drenado en segundo plano
+      para que el correo salga en segundos sin que el request espere al SMTP.
+    - process_queue: toma un lote con SELECT ... FOR UPDATE SKIP LOCKED y le pone un lease
+      (varios workers no se pisan), abre UNA conexión SMTP para todo el lote, guarda cada
+      resultado al enviarlo y reprograma los fallidos con backoff exponencial hasta
+      EMAIL_QUEUE_MAX_ATTEMPTS; después quedan como FAILED.
+    """
+
+    @staticmethod
+    def enqueue(subject, body, from_email, to_email, html_message=''):
+        from core.models import OutboundEmail
+
+        email = OutboundEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email,
+            to_email=to_email,
+            html_body=html_message or '',
+        )
+
+        if settings.EMAIL_QUEUE_SEND_ON_COMMIT:
+            transaction.on_commit(lambda: run_in_background(EmailQueueService.process_queue))
+
+        return email
+
+    @staticmethod
+    def get_retry_delay(attempts):
+        """Backoff exponencial: base * 2^(intentos-1), con tope"""
+        delay = settings.EMAIL_QUEUE_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        return timedelta(seconds=min(delay, settings.EMAIL_QUEUE_RETRY_MAX_SECONDS))
+
+    @staticmethod
+    def _build_message(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=[email.to_email],
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    @staticmethod
+    def _claim(batch_size):
+        """
+        Toma un lote en una transacción corta: SELECT ... FOR UPDATE SKIP LOCKED y el lease
+        (next_attempt_at = ahora + EMAIL_QUEUE_LEASE_SECONDS, intento ya contado). Mientras
+        dura el lease ningún otro worker lo toma; si este worker muere a medio lote, los
+        correos no enviados vuelven a la cola al vencer el lease.
+        """
+        from core.models import OutboundEmail
+
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    status=OutboundEmail.Status.PENDING,
+                    next_attempt_at__lte=now
+                )
+                .order_by('next_attempt_at', 'id')[:batch_size]
+            )
+            if not emails:
+                return emails
+
+            lease_until = now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE_SECONDS)
+            for email in emails:
+                email.attempts += 1
+                email.next_attempt_at = lease_until
+                email.updated_at = now
+            OutboundEmail.objects.bulk_update(emails, ['attempts', 'next_attempt_at', 'updated_at'])
+        return emails
+
+    @classmethod
+    def _record(cls, email, error=None):
+        """Guarda el resultado de un envío en cuanto termina (fuera de la transacción del lote)"""
+        from core.models import OutboundEmail
+
+        now = timezone.now()
+        if error is None:
+            email.status = OutboundEmail.Status.SENT
+            email.sent_at = now
+            email.last_error = ''
+        else:
+            email.last_error = str(error)[:1000]
+            if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+                email.status = OutboundEmail.Status.FAILED
+                logger.error(
+                    f"Correo {email.pk} a {email.to_email} movido a dead letter "
+                    f"tras {email.attempts} intentos: {error}"
+                )
+            else:
+                email.next_attempt_at = now + cls.get_retry_delay(email.attempts)
+                logger.warning(
+                    f"Fallo al enviar correo {email.pk} (intento {email.attempts}), "
+                    f"reintento a las {email.next_attempt_at}: {error}"
+                )
+        email.updated_at = now
+
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            status=email.status,
+            next_attempt_at=email.next_attempt_at,
+            last_error=email.last_error,
+            sent_at=email.sent_at,
+            updated_at=now,
+        )
+
+    @classmethod
+    def _release(cls, emails, error):
+        """
+        Devuelve a la cola un lote que no llegó a enviarse (no abrió el SMTP): descuenta el
+        intento que contó _claim y lo reprograma con el primer escalón del backoff, para
+        que una caída del servidor no consuma los reintentos de cada correo.
+        """
+        from core.models import OutboundEmail
+
+        now = timezone.now()
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            attempts=F('attempts') - 1,
+            next_attempt_at=now + cls.get_retry_delay(1),
+            last_error=str(error)[:1000],
+            updated_at=now,
+        )
+
+    @classmethod
+    def process_batch(cls, batch_size=None):
+        """
+        Envía un lote de correos pendientes. Los envíos SMTP corren fuera de cualquier
+        transacción y cada resultado se guarda al terminar su envío.
+
+        Si no se puede abrir la conexión, el lote se libera sin contar el intento y se
+        regresa (0, 0), lo que detiene el drenado de process_queue.
+
+        Returns:
+            tuple: (enviados, fallidos)
+        """
+        batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+        sent = failed = 0
+
+        emails = cls._claim(batch_size)
+        if not emails:
+            return sent, failed
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"No se pudo abrir la conexión SMTP, se liberan {len(emails)} correos: {e}")
+            cls._release(emails, e)
+            return sent, failed
+
+        try:
+            for email in emails:
+                try:
+                    cls._build_message(email, connection).send()
+                except Exception as e:
+                    cls._record(email, e)
+                    failed += 1
+                else:
+                    cls._record(email)
+                    sent += 1
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        return sent, failed
+
+    @classmethod
+    def process_queue(cls, max_batches=None):
+        """Drena la cola lote por lote hasta que no quede nada listo para enviar o el SMTP no responda"""
+        total_sent = total_failed = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            sent, failed = cls.process_batch()
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+            batches += 1
+
+        if total_sent or total_failed:
+            logger.info(f"Cola de correos: {total_sent} enviados, {total_failed} fallidos")
+
+        return total_sent, total_failed
+
+
 class PasswordResetEmail:
     @staticmethod
     def send_email(to_email, **context):
         subject = "Restablecimiento de contraseña"
         template_name = 'emails/password_reset.html'
         EmailService.send_template_email(subject, to_email, template_name, **context)
-        
+
 class ConfirmUserEmail:
     @staticmethod
     def send_email(to_email, **context):
         subject = "Confirmacion de cuenta"
         template_name = 'emails/confirm_email.html'
-        EmailService.send_template_email(subject, to_email, template_name, **context)  
+        EmailService.send_template_email(subject, to_email, template_name, **context)
 
 class UpdateUserEmail:
     @staticmethod
     def send_email(to_email, **context):
         subject = "Confirmacion de cuenta"
         template_name = 'emails/update_email.html'
-        EmailService.send_template_email(subject, to_email, template_name, **context)  
\ No newline at end of file
+        EmailService.send_template_email(subject, to_email, template_name, **context)
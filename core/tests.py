@@ -1,3 +1,522 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core import mail
+from django.utils import timezone
+from unittest.mock import patch
 
-# Create your tests here.
+from core.models import OutboundEmail
+from core.services.email_service import ConfirmUserEmail, EmailQueueService
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_QUEUE_MAX_ATTEMPTS=3,
+    EMAIL_QUEUE_RETRY_BASE_SECONDS=30,
+)
+class EmailQueueServiceTests(TestCase):
+    """Tests para la cola de correos salientes"""
+
+    def test_enviar_correo_solo_encola(self):
+        """El envío desde la vista solo encola, no toca el SMTP"""
+        ConfirmUserEmail.send_email(
+            to_email='test@example.com',
+            confirm_url='http://example.com/confirm/token123',
+            nombre='testuser'
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+        self.assertEqual(email.to_email, 'test@example.com')
+        self.assertIn('http://example.com/confirm/token123', email.html_body)
+
+    def test_lote_usa_una_sola_conexion(self):
+        """Todos los correos del lote salen por la misma conexión"""
+        for i in range(5):
+            EmailQueueService.enqueue('Asunto', 'Cuerpo', 'noreply@tuapp.com', f'user{i}@example.com')
+
+        with patch('core.services.email_service.get_connection', wraps=mail.get_connection) as mock_conn:
+            sent, failed = EmailQueueService.process_queue()
+
+        self.assertEqual((sent, failed), (5, 0))
+        mock_conn.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.Status.SENT).exists())
+
+    def test_reintento_con_backoff_y_dead_letter(self):
+        """Un fallo reprograma el correo y al agotar intentos queda como FAILED"""
+        email = EmailQueueService.enqueue('Asunto', 'Cuerpo', 'noreply@tuapp.com', 'user@example.com')
+
+        with patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('SMTP caído')):
+            EmailQueueService.process_queue()
+
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertIn('SMTP caído', email.last_error)
+
+            for _ in range(2):
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                EmailQueueService.process_queue()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(email.attempts, 3)
+
+    def test_cada_envio_se_guarda_al_terminar(self):
+        """Si el worker cae a medio lote, lo ya enviado queda SENT y lo demás espera al lease"""
+        for i in range(3):
+            EmailQueueService.enqueue('Asunto', 'Cuerpo', 'noreply@tuapp.com', f'user{i}@example.com')
+
+        # El segundo envío simula que el proceso muere (no es Exception: nadie lo atrapa)
+        with patch.object(EmailQueueService, '_build_message') as build:
+            build.return_value.send.side_effect = [1, KeyboardInterrupt()]
+            with self.assertRaises(KeyboardInterrupt):
+                EmailQueueService.process_batch()
+
+        statuses = list(OutboundEmail.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(statuses[0], OutboundEmail.Status.SENT)
+        self.assertEqual(statuses[1:], [OutboundEmail.Status.PENDING] * 2)
+        # Los no enviados siguen en lease: otro worker no los reenvía de inmediato
+        self.assertEqual(EmailQueueService.process_batch(), (0, 0))
+
+    def test_smtp_caido_no_consume_intentos(self):
+        """Si la conexión no abre, el lote se libera sin contar el intento y el drenado se detiene"""
+        for i in range(3):
+            EmailQueueService.enqueue('Asunto', 'Cuerpo', 'noreply@tuapp.com', f'user{i}@example.com')
+
+        with self.settings(EMAIL_QUEUE_BATCH_SIZE=2), \
+                patch('core.services.email_service.get_connection') as mock_conn:
+            mock_conn.return_value.open.side_effect = OSError('SMTP caído')
+            self.assertEqual(EmailQueueService.process_queue(), (0, 0))
+
+        # Solo se intentó abrir una vez: el resto de la cola no se tocó
+        mock_conn.assert_called_once()
+        emails = list(OutboundEmail.objects.order_by('id'))
+        self.assertEqual([email.attempts for email in emails], [0, 0, 0])
+        self.assertEqual({email.status for email in emails}, {OutboundEmail.Status.PENDING})
+        self.assertIn('SMTP caído', emails[0].last_error)
+        self.assertGreater(emails[0].next_attempt_at, timezone.now())
+
+    def test_backoff_exponencial_con_tope(self):
+        """El tiempo entre reintentos se duplica hasta el máximo configurado"""
+        with self.settings(EMAIL_QUEUE_RETRY_MAX_SECONDS=100):
+            self.assertEqual(EmailQueueService.get_retry_delay(1).total_seconds(), 30)
+            self.assertEqual(EmailQueueService.get_retry_delay(2).total_seconds(), 60)
+            self.assertEqual(EmailQueueService.get_retry_delay(3).total_seconds(), 100)
+
+
+from django.template.loader import select_template
+from core.services.email_service import EmailService, EmailTemplateRegistry
+
+
+class EmailTemplateRegistryTests(TestCase):
+    """Tests para el registro de plantillas de correo compiladas"""
+
+    def setUp(self):
+        EmailTemplateRegistry.clear()
+
+    def test_plantillas_se_compilan_una_sola_vez(self):
+        """Renders repetidos reutilizan la plantilla compilada"""
+        context = {'nombre': 'testuser', 'confirm_url': 'http://example.com/confirm/1'}
+
+        with patch('core.services.email_service.select_template', wraps=select_template) as mock_select:
+            for _ in range(3):
+                EmailTemplateRegistry.render('emails/confirm_email.html', context)
+
+        # Una búsqueda para el HTML y otra para la variante .txt
+        self.assertEqual(mock_select.call_count, 2)
+
+    def test_texto_plano_usa_variante_txt(self):
+        """La parte de texto sale del .txt, sin escapar la URL"""
+        text, html = EmailTemplateRegistry.render(
+            'emails/password_reset.html',
+            {'nombre': 'testuser', 'reset_url': 'http://example.com/reset/?a=1&b=2'}
+        )
+
+        self.assertIn('http://example.com/reset/?a=1&b=2', text)
+        self.assertNotIn('<', text)
+        self.assertIn('a=1&amp;b=2', html)
+
+    def test_envio_masivo_encola_todos(self):
+        """El envío masivo encola un correo por destinatario"""
+        recipients = [
+            (f'user{i}@example.com', {'nombre': f'user{i}', 'confirm_url': f'http://example.com/{i}'})
+            for i in range(20)
+        ]
+
+        count = EmailService.send_bulk_template_email('Confirmacion de cuenta', 'emails/confirm_email.html', recipients)
+
+        self.assertEqual(count, 20)
+        self.assertEqual(OutboundEmail.objects.count(), 20)
+        self.assertIn('http://example.com/7', OutboundEmail.objects.get(to_email='user7@example.com').body)
+
+
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from unittest.mock import MagicMock
+from manza_spots.throttling import BurstRateThrottle, LoginThrottle
+
+
+class ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = [LoginThrottle, BurstRateThrottle]
+
+    def get(self, request):
+        return Response({'ok': True})
+
+
+class RedisRateThrottleTests(TestCase):
+    """Tests para los throttles GCRA en Redis"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    @patch.object(LoginThrottle, 'THROTTLE_RATES', {'login': '2/hour', 'burst': '30/min'})
+    @patch.object(BurstRateThrottle, 'THROTTLE_RATES', {'login': '2/hour', 'burst': '30/min'})
+    def test_sin_redis_usa_throttle_de_drf(self):
+        """Con cache LocMem se conserva el comportamiento original de DRF"""
+        view = ThrottledView.as_view()
+
+        responses = [view(self.factory.get('/')) for _ in range(3)]
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 429])
+
+    @patch.object(LoginThrottle, 'THROTTLE_RATES', {'login': '5/hour', 'burst': '30/min'})
+    @patch.object(BurstRateThrottle, 'THROTTLE_RATES', {'login': '5/hour', 'burst': '30/min'})
+    @patch('manza_spots.throttling._get_gcra_script')
+    @patch('manza_spots.throttling.get_redis_client')
+    def test_un_solo_round_trip_para_todos_los_scopes(self, mock_client, mock_script):
+        """Todos los scopes de la vista se revisan en una sola llamada al script"""
+        mock_client.return_value = MagicMock()
+        script = MagicMock(return_value=[720000, 0])
+        mock_script.return_value = script
+
+        response = ThrottledView.as_view()(self.factory.get('/'))
+
+        self.assertEqual(response.status_code, 429)
+        script.assert_called_once()
+        kwargs = script.call_args.kwargs
+        self.assertEqual(len(kwargs['keys']), 2)
+        # login 5/hour -> intervalo de 720 s; burst 30/min -> intervalo de 2 s
+        self.assertEqual(kwargs['args'], [720000, 3600000, 2000, 60000])
+        self.assertEqual(response['Retry-After'], '720')
+
+
+import json
+import logging
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.logging import JSONFormatter, RequestIDFilter, request_id_var
+from core.middleware import RequestIDMiddleware
+
+
+class RequestIDLoggingTests(TestCase):
+    """Tests para el id de request y el formato JSON de los logs"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _log_record(self, msg, **extra):
+        record = logging.makeLogRecord({'name': 'auth', 'levelname': 'INFO', 'msg': msg, **extra})
+        RequestIDFilter().filter(record)
+        return json.loads(JSONFormatter().format(record))
+
+    def test_respeta_request_id_valido(self):
+        """Un X-Request-ID válido se propaga a los logs y a la respuesta"""
+        seen = {}
+
+        def view(request):
+            seen['log'] = self._log_record('dentro del request')
+            return HttpResponse()
+
+        response = RequestIDMiddleware(view)(self.factory.get('/', HTTP_X_REQUEST_ID='abc-123'))
+
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+        self.assertEqual(seen['log']['request_id'], 'abc-123')
+        self.assertEqual(request_id_var.get(), '-')
+
+    def test_genera_id_si_el_header_es_invalido(self):
+        """Headers con caracteres raros se reemplazan por un id generado"""
+        response = RequestIDMiddleware(lambda request: HttpResponse())(
+            self.factory.get('/', HTTP_X_REQUEST_ID='bad id\n')
+        )
+
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_json_compacto_con_campos_extra(self):
+        """El formatter genera una sola línea con los datos de extra={...}"""
+        record = logging.makeLogRecord({
+            'name': 'auth', 'levelname': 'INFO', 'msg': 'jwt_login_success: a@b.com',
+            'log_data': {'user_id': 1, 'success': True},
+        })
+
+        line = JSONFormatter().format(record)
+        data = json.loads(line)
+
+        self.assertNotIn('\n', line)
+        self.assertEqual(data['msg'], 'jwt_login_success: a@b.com')
+        self.assertEqual(data['log_data'], {'user_id': 1, 'success': True})
+
+
+import sentry_sdk
+from django.db import DatabaseError
+from sentry_sdk.transport import Transport
+from core import sentry as sentry_policies
+from core.mixins import SentryErrorHandlerMixin
+
+
+class StubTransport(Transport):
+    """Transporte local: guarda los envelopes en lugar de mandarlos a Sentry"""
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.envelopes = []
+
+    def capture_envelope(self, envelope):
+        self.envelopes.append(envelope)
+
+    def items(self, item_type):
+        return [item for envelope in self.envelopes for item in envelope.items if item.type == item_type]
+
+
+@override_settings(
+    SENTRY_ERROR_BURST=3,
+    SENTRY_ERROR_WINDOW_SECONDS=60,
+    SENTRY_TRACES_SAMPLE_RATE=0.05,
+)
+class SentryPolicyTests(TestCase):
+    """Tests para el muestreo de trazas y el límite de eventos repetidos en Sentry"""
+
+    def setUp(self):
+        sentry_policies._limiter = None
+        self.transport = StubTransport()
+        sentry_sdk.init(
+            dsn='https://public@sentry.example.com/1',
+            transport=self.transport,
+            before_send=sentry_policies.before_send,
+            traces_sampler=sentry_policies.traces_sampler,
+            default_integrations=False,
+        )
+
+    def tearDown(self):
+        self._shutdown_sentry()
+        sentry_policies._limiter = None
+
+    def _shutdown_sentry(self):
+        sentry_sdk.get_client().close()
+        sentry_sdk.get_global_scope().set_client(None)
+
+    def _raise_database_error(self):
+        raise DatabaseError('could not connect to server')
+
+    def test_rafaga_de_errores_identicos_se_limita(self):
+        """1000 DatabaseError iguales terminan en solo SENTRY_ERROR_BURST eventos"""
+        mixin = SentryErrorHandlerMixin()
+        for _ in range(1000):
+            try:
+                self._raise_database_error()
+            except DatabaseError as e:
+                mixin._capture_to_sentry(e, level='error', tags={'error_type': 'database'}, extra={})
+        sentry_sdk.flush()
+
+        events = self.transport.items('event')
+        self.assertEqual(len(events), 3)
+
+    def test_descartados_se_reportan_en_la_siguiente_ventana(self):
+        """Al abrir una ventana nueva el evento lleva el conteo de lo que se descartó"""
+        limiter = sentry_policies.get_error_limiter()
+
+        results = [limiter.allow('db', now=0) for _ in range(10)]
+        self.assertEqual(sum(allowed for allowed, _ in results), 3)
+
+        self.assertEqual(limiter.allow('db', now=61), (True, 7))
+
+    def test_sampler_por_endpoint(self):
+        """Auth se muestrea alto, listados bajo y lo demás con la tasa por defecto"""
+        def rate(method, path, **extra):
+            return sentry_policies.traces_sampler({
+                'wsgi_environ': {'REQUEST_METHOD': method, 'PATH_INFO': path}, **extra
+            })
+
+        self.assertEqual(rate('POST', '/api/v1/auth/login/'), 0.5)
+        self.assertEqual(rate('POST', '/api/v1/spots/10/captions/'), 0.5)
+        self.assertEqual(rate('GET', '/api/v1/spots/'), 0.01)
+        self.assertEqual(rate('GET', '/api/v1/users/5/'), 0.05)
+        self.assertEqual(rate('GET', '/api/v1/spots/', parent_sampled=True), 1.0)
+
+    def test_sin_sentry_no_se_arma_scope(self):
+        """Con Sentry apagado la captura no hace nada"""
+        self._shutdown_sentry()
+
+        with patch('sentry_sdk.new_scope') as mock_scope:
+            SentryErrorHandlerMixin()._capture_to_sentry(
+                DatabaseError('x'), level='error', tags={}, extra={}
+            )
+
+        mock_scope.assert_not_called()
+
+
+from django.contrib.auth import get_user_model
+from django.urls import ResolverMatch
+from prometheus_client import REGISTRY
+from core.middleware import MetricsMiddleware
+from core.utils.cache import InstrumentedLocMemCache
+from core.views import metrics_view
+
+
+class MetricsTests(TestCase):
+    """Tests para las métricas de Prometheus"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_cuenta_consultas_por_request(self):
+        """El middleware registra latencia y número de consultas de la vista"""
+        def view(request):
+            User = get_user_model()
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse()
+
+        labels = {'view': 'view', 'action': 'get'}
+        before = self._sample('http_request_db_queries_sum', **labels)
+        request = self.factory.get('/')
+        request.resolver_match = ResolverMatch(view, (), {})
+
+        MetricsMiddleware(view)(request)
+
+        self.assertEqual(self._sample('http_request_db_queries_sum', **labels) - before, 2)
+        self.assertEqual(
+            self._sample('http_request_duration_seconds_count', method='GET', status='2xx', **labels), 1
+        )
+
+    def test_metodo_desconocido_se_agrupa_en_other(self):
+        """Un verbo arbitrario del cliente no crea series nuevas en la latencia"""
+        def view(request):
+            return HttpResponse()
+
+        labels = {'view': 'view', 'action': 'other', 'status': '2xx'}
+        before = self._sample('http_request_duration_seconds_count', method='other', **labels)
+        request = self.factory.generic('FOO123', '/')
+        request.resolver_match = ResolverMatch(view, (), {})
+
+        MetricsMiddleware(view)(request)
+
+        self.assertEqual(self._sample('http_request_duration_seconds_count', method='other', **labels) - before, 1)
+        self.assertIsNone(REGISTRY.get_sample_value(
+            'http_request_duration_seconds_count', {'method': 'FOO123', **labels}
+        ))
+
+    def test_cache_cuenta_hits_y_misses(self):
+        """Las lecturas del cache se cuentan por namespace de la llave"""
+        test_cache = InstrumentedLocMemCache('metrics-test', {})
+        hits = self._sample('cache_requests_total', namespace='metricstest', result='hit')
+        misses = self._sample('cache_requests_total', namespace='metricstest', result='miss')
+
+        test_cache.set('metricstest:a', 1)
+        self.assertEqual(test_cache.get('metricstest:a'), 1)
+        self.assertIsNone(test_cache.get('metricstest:b'))
+        self.assertEqual(test_cache.get_many(['metricstest:a', 'metricstest:c']), {'metricstest:a': 1})
+
+        self.assertEqual(self._sample('cache_requests_total', namespace='metricstest', result='hit') - hits, 2)
+        self.assertEqual(self._sample('cache_requests_total', namespace='metricstest', result='miss') - misses, 2)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_endpoint_exige_token(self):
+        """/metrics responde 401 sin el token y el texto de Prometheus con él"""
+        self.assertEqual(metrics_view(self.factory.get('/metrics')).status_code, 401)
+
+        response = metrics_view(self.factory.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_endpoint_cerrado_sin_token_configurado(self):
+        """Sin METRICS_TOKEN en producción /metrics no es público"""
+        self.assertEqual(metrics_view(self.factory.get('/metrics')).status_code, 404)
+
+
+from core.profiling import ProfileStore, ProfilingMiddleware, ProfilingTokenService
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Tests para el perfilado bajo demanda"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        User = get_user_model()
+        self.staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123', is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='normal', email='normal@example.com', password='testpass123'
+        )
+
+    def _view(self, request):
+        get_user_model().objects.count()
+        get_user_model().objects.count()
+        return HttpResponse('ok')
+
+    def test_sin_header_no_perfila(self):
+        """Sin token el request pasa directo, sin profiler"""
+        with patch('core.profiling._Profiler') as mock_profiler:
+            response = ProfilingMiddleware(self._view)(self.factory.get('/api/v1/spots/'))
+
+        mock_profiler.assert_not_called()
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_token_de_staff_guarda_reporte(self):
+        """Con token válido se guarda perfil y SQL, y el id llega en X-Profile-Id"""
+        token = ProfilingTokenService.make_token(self.staff)
+
+        response = ProfilingMiddleware(self._view)(
+            self.factory.get('/api/v1/spots/', HTTP_X_PROFILE_TOKEN=token)
+        )
+
+        report = ProfileStore.get(response['X-Profile-Id'])
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(report['path'], '/api/v1/spots/')
+        self.assertGreaterEqual(report['sql']['count'], 2)
+        self.assertEqual(report['sql']['repeated'][0]['count'], 2)
+        self.assertTrue(report['profile']['text'])
+
+    def test_modo_inline_regresa_reporte(self):
+        """Con _profile_mode=inline el reporte reemplaza la respuesta"""
+        token = ProfilingTokenService.make_token(self.staff)
+
+        response = ProfilingMiddleware(self._view)(
+            self.factory.get('/api/v1/spots/', {'_profile': token, '_profile_mode': 'inline'})
+        )
+
+        self.assertEqual(json.loads(response.content)['id'], response['X-Profile-Id'])
+
+    def test_token_de_usuario_normal_se_ignora(self):
+        """Un token firmado para alguien que no es staff no activa el perfilado"""
+        token = ProfilingTokenService.make_token(self.user)
+
+        response = ProfilingMiddleware(self._view)(
+            self.factory.get('/api/v1/spots/', HTTP_X_PROFILE_TOKEN=token)
+        )
+
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_endpoints_solo_staff(self):
+        """El token y los reportes solo los obtiene staff"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post('/api/v1/profiling/token/').status_code, 403)
+
+        client.force_authenticate(self.staff)
+        token = client.post('/api/v1/profiling/token/').json()['token']
+        self.assertIsNotNone(ProfilingTokenService.get_user(token))
+        self.assertEqual(client.get('/api/v1/profiling/noexiste/').status_code, 404)
@@ -0,0 +1,8 @@
+from django.urls import path
+from core.views import ProfileReportView, ProfilingTokenView
+
+core_patterns = ([
+    # ========== Perfilado bajo demanda (staff) ==========
+    path('profiling/token/', ProfilingTokenView.as_view(), name='profiling_token'),
+    path('profiling/<str:profile_id>/', ProfileReportView.as_view(), name='profiling_report'),
+], 'core')
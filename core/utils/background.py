@@ -0,0 +1,33 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Pool compartido por proceso para E/S bloqueante que no debe frenar la respuesta
+# (borrado de archivos en R2, llamadas a APIs externas, etc.)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='background-io')
+
+
+def _run(func, *args, **kwargs):
+    """Ejecuta la tarea cerrando las conexiones de BD que el hilo haya abierto"""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Error en tarea en segundo plano {getattr(func, '__name__', func)}")
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Envía la tarea al pool de hilos sin esperar su resultado."""
+    return _executor.submit(_run, func, *args, **kwargs)
+
+
+def run_in_background_on_commit(func, *args, **kwargs):
+    """
+    Programa la tarea para cuando la transacción actual haga commit.
+    Si se hace rollback la tarea nunca se ejecuta (evita borrar archivos de registros que siguen vivos).
+    """
+    transaction.on_commit(lambda: run_in_background(func, *args, **kwargs))
@@ -0,0 +1,36 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from core.metrics import record_cache_lookup
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Cuenta hits y misses de las lecturas para /metrics.
+    Se etiqueta por el namespace de la llave (auth:..., google:..., jwt:...).
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            record_cache_lookup(key, 0, 1)
+            return default
+        record_cache_lookup(key, 1, 0)
+        return value
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+
+    def get_many(self, keys, version=None):
+        # RedisCache resuelve get_many con un MGET, sin pasar por get()
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        if keys:
+            record_cache_lookup(keys[0], len(found), len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
@@ -0,0 +1,61 @@
+"""
+Paginador del admin para tablas grandes.
+
+El changelist hace un COUNT(*) por página; en PostgreSQL eso recorre toda la tabla.
+- Sin filtros se usa la estimación del planner (pg_class.reltuples), que es O(1). El filtro
+  base del admin (p. ej. el del SoftDeleteManager) no cuenta: solo los del changelist y la búsqueda.
+- Con filtros o búsqueda se cuenta de verdad, pero con statement_timeout; si no alcanza
+  se regresa la estimación de la tabla completa (cota superior).
+Por debajo de ADMIN_COUNT_ESTIMATE_THRESHOLD filas siempre se cuenta exacto.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections, transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model, using='default'):
+    """Filas estimadas de la tabla del modelo (-1 o 0 si nunca se ha analizado)"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connections[using].ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, base_queryset=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        # Queryset del admin antes de filtros y búsqueda (ver LargeTableAdminMixin.get_paginator)
+        self.base_queryset = base_queryset
+
+    def _is_filtered(self, queryset):
+        where = queryset.query.where
+        if self.base_queryset is None:
+            return bool(where)
+        return where != self.base_queryset.query.where
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != 'postgresql':
+            return super().count
+
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+        if estimate < settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+            return super().count
+
+        if not self._is_filtered(queryset):
+            return estimate
+
+        try:
+            with transaction.atomic(using=queryset.db):
+                with connections[queryset.db].cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = %s', [settings.ADMIN_COUNT_TIMEOUT_MS])
+                return queryset.count()
+        except OperationalError:
+            return estimate
@@ -0,0 +1,23 @@
+import logging
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis_client(alias='default', write=True):
+    """
+    Cliente redis-py del cache de Django (mismo pool de conexiones que CACHES).
+    Regresa None cuando el cache no es Redis (LocMem en desarrollo y tests),
+    para que cada llamador use su camino alterno.
+    """
+    backend = caches[alias]
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(write=write)
+
+
+def make_key(key, alias='default'):
+    """Aplica KEY_PREFIX/VERSION del cache para no chocar con otras apps en el mismo Redis"""
+    return caches[alias].make_key(key)
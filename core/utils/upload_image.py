@@ -56,3 +56,9 @@ def upload_user_thumbnail(instance, filename):
     """
     return generate_upload_path('User', instance, filename, purpose='Thumbnail', owner_field='user')
 
+def upload_region_pack(instance, filename):
+    """
+    Ruta para los paquetes offline por región
+    Resultado: RegionPacks/{slug}/{filename}
+    """
+    return f"RegionPacks/{instance.slug}/{filename}"
@@ -1,3 +1,64 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.metrics import render_metrics
+from core.profiling import ProfileStore, ProfilingTokenService
+
+
+def metrics_view(request):
+    """
+    Endpoint de scrape de Prometheus (agregado de todos los workers).
+    Exige METRICS_TOKEN; sin token configurado solo responde con DEBUG (fuera de eso, 404).
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=404)
+    else:
+        provided = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(provided.encode(), token.encode()):
+            return HttpResponse(status=401)
+
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+@extend_schema(
+    summary="Token de perfilado",
+    description=(
+        "Genera un token firmado para perfilar requests de /api/v1/ enviándolo en el header "
+        "X-Profile-Token. El reporte queda disponible en /api/v1/profiling/<id>/ (header X-Profile-Id)."
+    ),
+    tags=["profiling"],
+)
+class ProfilingTokenView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        return Response({
+            'token': ProfilingTokenService.make_token(request.user),
+            'expires_in': settings.PROFILING_TOKEN_MAX_AGE,
+        })
+
+
+@extend_schema(
+    summary="Reporte de perfilado",
+    description="Perfil (pyinstrument o cProfile) y log de SQL de un request perfilado.",
+    tags=["profiling"],
+    responses={200: OpenApiResponse(description="Reporte"), 404: OpenApiResponse(description="No existe o expiró")},
+)
+class ProfileReportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        report = ProfileStore.get(profile_id)
+        if report is None:
+            return Response({'detail': 'Reporte no encontrado o expirado.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(report)
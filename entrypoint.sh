@@ -7,8 +7,6 @@ python manage.py migrate --noinput
 echo "Recolectando archivos estaticos..."
 python manage.py collectstatic --noinput
 
-echo "Levantando gunicorn en el puerto ${PORT:-8000}..."
-exec gunicorn manza_spots.wsgi:application \
-    --bind 0.0.0.0:${PORT:-8000} \
-    --workers 3 \
-    --timeout 60
\ No newline at end of file
+# La configuracion (puerto, workers, timeout y modo wsgi/asgi) vive en gunicorn.conf.py
+echo "Levantando gunicorn (${SERVER_MODE:-wsgi}) en el puerto ${PORT:-8000}..."
+exec gunicorn
\ No newline at end of file
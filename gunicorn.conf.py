@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# Gunicorn lo carga automaticamente desde el directorio de trabajo (/app).
+# El modo de servidor se elige con SERVER_MODE:
+#   - wsgi (default): workers sync clasicos, un request a la vez por worker.
+#   - asgi: workers de uvicorn, cada request corre en su propio hilo y la
+#     E/S externa (Google, SMTP, R2) deja de bloquear al worker completo.
+import os
+import shutil
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_WORKERS', '3'))
+timeout = int(os.environ.get('WEB_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'manza_spots.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'manza_spots.wsgi:application'
+    worker_class = 'sync'
+
+# Metricas de Prometheus en modo multiproceso: cada worker escribe sus valores en este
+# directorio y /metrics los agrega. Debe existir antes de que los workers importen Django.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+
+def on_starting(server):
+    """Limpia los archivos de metricas de un arranque anterior"""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Marca el worker como muerto para que sus gauges no se sigan reportando"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
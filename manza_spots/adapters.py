@@ -1,8 +1,17 @@
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from allauth.account.utils import user_email
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+import logging
+import re
+
+from authentication.services import UsernameService
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Reintentos si otro alta toma el mismo username entre la consulta y el INSERT
+USERNAME_ALLOCATION_RETRIES = 3
 
 class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
 
@@ -24,4 +33,29 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
             sociallogin.connect(request, user)
 
         except User.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
+
+    def save_user(self, request, sociallogin, form=None):
+        """
+        Guarda el usuario nuevo dentro de un savepoint; si el username lo ganó un alta
+        concurrente (IntegrityError del unique) se asigna el siguiente libre y se reintenta.
+        """
+        for attempt in range(USERNAME_ALLOCATION_RETRIES):
+            try:
+                with transaction.atomic():
+                    return super().save_user(request, sociallogin, form)
+            except IntegrityError:
+                username = sociallogin.user.username
+                if (
+                    attempt == USERNAME_ALLOCATION_RETRIES - 1
+                    or not username
+                    or not User.objects.filter(username=username).exists()
+                ):
+                    raise
+
+                base_username = re.sub(r'\d+$', '', username) or username
+                sociallogin.user.username = UsernameService.allocate(base_username)
+                logger.info(
+                    f"Username {username} tomado por un alta concurrente, reintentando con "
+                    f"{sociallogin.user.username}"
+                )
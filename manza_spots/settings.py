@@ -23,11 +23,33 @@ warnings.filterwarnings(
 )
 
 #------------------------------ CONFIGURACION DE SENTRY ----------------------------------------
+# Tasa por defecto para transacciones que no coinciden con ninguna regla (jobs, comandos, etc.)
+SENTRY_TRACES_SAMPLE_RATE = config('SENTRY_TRACES_SAMPLE_RATE', default=0.05, cast=float)
+
+# Reglas de muestreo por endpoint: (métodos | None, regex del path, tasa). Gana la primera que coincida.
+SENTRY_TRACE_RULES = [
+    (None, r'^/api/v1/auth/', config('SENTRY_AUTH_TRACES_RATE', default=0.5, cast=float)),
+    (('POST', 'PUT', 'PATCH'), r'^/api/v1/(spots|routes)/.+/(captions|photos)/|^/api/v1/users/profile/thumb/',
+        config('SENTRY_UPLOAD_TRACES_RATE', default=0.5, cast=float)),
+    (('GET', 'HEAD'), r'^/api/v1/(spots|routes)/', config('SENTRY_LIST_TRACES_RATE', default=0.01, cast=float)),
+    (None, r'^/(static|media|admin/jsi18n)/', 0.0),
+]
+
+# Requests más lentos que esto generan un evento aunque su traza no se haya muestreado
+SENTRY_SLOW_REQUEST_MS = config('SENTRY_SLOW_REQUEST_MS', default=2000, cast=int)
+
+# Máximo de eventos con la misma huella por ventana y proceso (ráfagas de DatabaseError, etc.)
+SENTRY_ERROR_BURST = config('SENTRY_ERROR_BURST', default=5, cast=int)
+SENTRY_ERROR_WINDOW_SECONDS = config('SENTRY_ERROR_WINDOW_SECONDS', default=60, cast=int)
+
 if not config('DEBUG', default=True, cast=bool):
+    from core.sentry import before_send, traces_sampler
+
     sentry_sdk.init(
         dsn=config('SDK_SENTRY', default=None),
-        send_default_pii=True,
-        traces_sample_rate=1.0,
+        send_default_pii=config('SENTRY_SEND_PII', default=False, cast=bool),
+        traces_sampler=traces_sampler,
+        before_send=before_send,
     )
 
 
@@ -86,6 +108,10 @@ INSTALLED_APPS = [
 
 #----------------------------- MIDDLEWARE ----------------------------------------------------
 MIDDLEWARE = [
+    'core.middleware.RequestIDMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SentrySlowRequestMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -98,6 +124,11 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+# Presupuesto de consultas por vista (core.query_budget): off | warn | raise
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='warn' if DEBUG else 'off')
+if QUERY_BUDGET_MODE != 'off':
+    MIDDLEWARE.insert(MIDDLEWARE.index('core.middleware.MetricsMiddleware') + 1, 'core.middleware.QueryBudgetMiddleware')
+
 
 #----------------------------- DIRECCION DE LOS TEMPLATES(EN ESTE CASO SOLO LOS DE EMAILS) ----------------------------------------------------
 TEMPLATES = [
@@ -131,6 +162,19 @@ DATABASES = {
     }
 }
 
+# En modo ASGI (ver gunicorn.conf.py) cada request corre en su propio hilo y Django cierra la
+# conexion al terminar, asi que CONN_MAX_AGE no sirve; el pool de psycopg reutiliza las conexiones.
+SERVER_MODE = config('SERVER_MODE', default='wsgi').lower()
+
+if config('DB_POOL', default=SERVER_MODE == 'asgi', cast=bool):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+    }
+
 AUTH_USER_MODEL = 'users.User'
 #-------------------------------------- PASSWORD VALIDATORS --------------------------------------------
 AUTH_PASSWORD_VALIDATORS = [
@@ -161,7 +205,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login lo registra authentication.services.LastLoginService (escrituras agrupadas)
+    'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': config('SECRET_KEY'),
@@ -179,9 +224,20 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'TOKEN_OBTAIN_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenObtainPairSerializer',
-    'TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.RevocableTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'authentication.serializers.RevocableTokenVerifySerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'authentication.serializers.RevocableTokenBlacklistSerializer',
 }
 
+# Claim con la versión de autenticación del usuario (ver authentication.backends.CachedJWTAuthentication)
+AUTH_VERSION_CLAIM = 'auth_version'
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+AUTH_USER_LRU_SIZE = config('AUTH_USER_LRU_SIZE', default=2048, cast=int)
+# Purga por lotes de OutstandingToken/BlacklistedToken expirados (authentication.jobs)
+TOKEN_PURGE_BATCH_SIZE = config('TOKEN_PURGE_BATCH_SIZE', default=5000, cast=int)
+# Cada cuánto se vuelca a Postgres el buffer de last_login en Redis
+LAST_LOGIN_FLUSH_INTERVAL_SECONDS = config('LAST_LOGIN_FLUSH_INTERVAL_SECONDS', default=60, cast=int)
+
 
 # ---------------------------------------------- CORS ----------------------------------------
 CORS_ALLOW_ALL_ORIGINS = DEBUG
@@ -238,22 +294,42 @@ if 'test' in sys.argv:
 else:
     EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
-EMAIL_HOST = 'smtp.resend.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = 'resend'
+# En desarrollo se puede apuntar a un sink SMTP local (mailpit en docker-compose) con EMAIL_HOST/EMAIL_PORT
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.resend.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='resend')
 EMAIL_HOST_PASSWORD = config('RESEND_API_KEY')
 DEFAULT_FROM_EMAIL = f'no-reply@{DOMAIN}'
 EMAIL_TIMEOUT = 10
 
+# Cola de correos salientes (core.models.OutboundEmail)
+EMAIL_QUEUE_BATCH_SIZE = config('EMAIL_QUEUE_BATCH_SIZE', default=50, cast=int)
+EMAIL_QUEUE_MAX_ATTEMPTS = config('EMAIL_QUEUE_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_QUEUE_RETRY_BASE_SECONDS = config('EMAIL_QUEUE_RETRY_BASE_SECONDS', default=30, cast=int)
+EMAIL_QUEUE_RETRY_MAX_SECONDS = config('EMAIL_QUEUE_RETRY_MAX_SECONDS', default=3600, cast=int)
+EMAIL_QUEUE_INTERVAL_SECONDS = config('EMAIL_QUEUE_INTERVAL_SECONDS', default=30, cast=int)
+# Tiempo que un worker retiene un lote mientras envía (mayor que BATCH_SIZE * EMAIL_TIMEOUT);
+# si el worker muere, los correos no enviados vuelven a la cola al vencer
+EMAIL_QUEUE_LEASE_SECONDS = config('EMAIL_QUEUE_LEASE_SECONDS', default=600, cast=int)
+# Dispara un envío en segundo plano al hacer commit del encolado (sin esperar al job periódico)
+EMAIL_QUEUE_SEND_ON_COMMIT = config('EMAIL_QUEUE_SEND_ON_COMMIT', default=True, cast=bool)
+
 
 # ---------------------------------------- LOGGING -------------------------------------------
+# En DEBUG: consola con rich y escritura directa (tracebacks legibles).
+# Fuera de DEBUG: líneas JSON compactas con request_id, y los handlers reales detrás de un
+# QueueHandler para que el request solo encole (core.logging). La rotación de archivos es
+# segura con varios workers de gunicorn.
+LOG_JSON = config('LOG_JSON', default=not DEBUG, cast=bool)
+LOG_QUEUE = config('LOG_QUEUE', default=not DEBUG, cast=bool)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
+            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {request_id} {message}',
             'style': '{',
         },
         'simple': {
@@ -264,6 +340,9 @@ LOGGING = {
             'format': "%(message)s",
             'datefmt': "[%X]",
         },
+        'json': {
+            '()': 'core.logging.JSONFormatter',
+        },
     },
     'filters': {
         'require_debug_false': {
@@ -272,6 +351,9 @@ LOGGING = {
         'require_debug_true': {
             '()': 'django.utils.log.RequireDebugTrue',
         },
+        'request_id': {
+            '()': 'core.logging.RequestIDFilter',
+        },
     },
     'handlers': {
         'console': {
@@ -281,50 +363,70 @@ LOGGING = {
             'rich_tracebacks': True,
             'markup': True,
             'log_time_format': "%H:%M:%S",
+        } if DEBUG else {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filters': ['request_id'],
         },
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'core.logging.ProcessSafeRotatingFileHandler',
             'filename': LOG_DIR / 'django.log',
             'maxBytes': 1024 * 1024 * 15,  # 15MB
             'backupCount': 10,
-            'formatter': 'verbose',
-            'filters': ['require_debug_false']
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filters': ['require_debug_false', 'request_id'],
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'core.logging.ProcessSafeRotatingFileHandler',
             'filename': LOG_DIR / 'errors.log',
             'maxBytes': 1024 * 1024 * 15,
             'backupCount': 10,
-            'formatter': 'verbose',
-            'filters': ['require_debug_false']
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filters': ['require_debug_false', 'request_id'],
+        },
+        # El request_id se toma aquí (hilo del request); el listener escribe en los destinos
+        'queue': {
+            '()': 'core.logging.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file', 'cfg://handlers.error_file'],
+            'filters': ['request_id'],
+        },
+        'queue_errors': {
+            '()': 'core.logging.QueueListenerHandler',
+            'handlers': ['cfg://handlers.error_file'],
+            'filters': ['request_id'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'] if LOG_QUEUE else ['console', 'file'],
             'level': 'INFO',
             'propagate': False,
         },
         'django.request': {
-            'handlers': ['error_file'],
+            'handlers': ['queue_errors'] if LOG_QUEUE else ['error_file'],
             'level': 'ERROR',
             'propagate': False,
         },
         'authentication': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'] if LOG_QUEUE else ['console', 'file', 'error_file'],
             'level': 'INFO',
             'propagate': True,
         },
         'users': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'] if LOG_QUEUE else ['console', 'file', 'error_file'],
             'level': 'INFO',
             'propagate': True,
         },
     },
 }
 
+if not LOG_QUEUE:
+    # Sin cola no se crean los listeners
+    del LOGGING['handlers']['queue'], LOGGING['handlers']['queue_errors']
+
 #-------------------------------------------- SOCIALACCOUNT_PROVIDERS DE ALLAUTH -------------------------------------------
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
@@ -382,8 +484,8 @@ if os.name == 'nt':
 #Configuracion de los limites de peticiones de la api
 if config('ACTIVE_RATES', default=False, cast=bool):
     DEFAULT_THROTTLE_CLASSES = (
-            'rest_framework.throttling.AnonRateThrottle',
-            'rest_framework.throttling.UserRateThrottle',
+            'manza_spots.throttling.AnonRateThrottle',
+            'manza_spots.throttling.UserRateThrottle',
             'manza_spots.throttling.BurstRateThrottle',
     )
     DEFAULT_THROTTLE_RATES = {
@@ -397,8 +499,8 @@ if config('ACTIVE_RATES', default=False, cast=bool):
     }
 else:
     DEFAULT_THROTTLE_CLASSES = (
-            'rest_framework.throttling.AnonRateThrottle',
-            'rest_framework.throttling.UserRateThrottle',
+            'manza_spots.throttling.AnonRateThrottle',
+            'manza_spots.throttling.UserRateThrottle',
             'manza_spots.throttling.BurstRateThrottle',
     )
     DEFAULT_THROTTLE_RATES = {
@@ -416,7 +518,7 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
     ),
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -453,6 +555,8 @@ SPECTACULAR_SETTINGS = {
         {'name': 'routes', 'description': 'Rutas y recorridos'},
         {'name': 'routes-photos', 'description': 'Fotos de las rutas'},
         {'name': 'routes-favorite', 'description' : 'Rutas favoritas'},
+        {'name': 'sync', 'description': 'Sincronización incremental de la app móvil'},
+        {'name': 'region-packs', 'description': 'Paquetes offline por región'},
     ],
 
 
@@ -473,7 +577,7 @@ SPECTACULAR_SETTINGS = {
 if config('CACHES_REDIS', default=False, cast=bool):
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'BACKEND': 'core.utils.cache.InstrumentedRedisCache',
             'LOCATION': config('REDIS_URL'),
             'OPTIONS': {
                 'socket_connect_timeout': 5,
@@ -484,12 +588,75 @@ if config('CACHES_REDIS', default=False, cast=bool):
 else:
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'BACKEND': 'core.utils.cache.InstrumentedLocMemCache',
             'LOCATION': 'rate-limit-cache',
         }
     }
 
 
+#------------------------------ METRICAS (PROMETHEUS) -------------------------------------------
+# /metrics exige "Authorization: Bearer <token>"; sin token solo responde con DEBUG
+METRICS_TOKEN = config('METRICS_TOKEN', default=None)
+
+#------------------------------ PERFILADO BAJO DEMANDA (STAFF) ---------------------------------
+# Vigencia de los tokens de X-Profile-Token y de los reportes guardados en cache
+PROFILING_TOKEN_MAX_AGE = config('PROFILING_TOKEN_MAX_AGE', default=3600, cast=int)
+PROFILING_RESULT_TTL = config('PROFILING_RESULT_TTL', default=24 * 3600, cast=int)
+PROFILING_MAX_QUERIES = config('PROFILING_MAX_QUERIES', default=500, cast=int)
+PROFILING_CPROFILE_LINES = 60
+
+#------------------------------ SINCRONIZACIÓN DE FAVORITOS (APP MÓVIL) -------------------------
+# Operaciones máximas por lote en POST /api/v1/favorites/sync/
+FAVORITES_SYNC_MAX_OPERATIONS = config('FAVORITES_SYNC_MAX_OPERATIONS', default=500, cast=int)
+
+#------------------------------ ADMIN (TABLAS GRANDES) ------------------------------------------
+# Desde cuántas filas el changelist usa el conteo estimado (ver core.utils.pagination)
+ADMIN_COUNT_ESTIMATE_THRESHOLD = config('ADMIN_COUNT_ESTIMATE_THRESHOLD', default=50000, cast=int)
+# Tiempo máximo del COUNT exacto con filtros antes de caer a la estimación
+ADMIN_COUNT_TIMEOUT_MS = config('ADMIN_COUNT_TIMEOUT_MS', default=200, cast=int)
+
+#------------------------------ COLA DE MODERACIÓN DE SPOTS -------------------------------------
+# Tiempo que un lote queda reservado para el revisor que lo pidió
+MODERATION_LEASE_SECONDS = config('MODERATION_LEASE_SECONDS', default=600, cast=int)
+MODERATION_CLAIM_MAX = config('MODERATION_CLAIM_MAX', default=50, cast=int)
+# Spots máximos por decisión en lote
+MODERATION_DECISION_MAX = config('MODERATION_DECISION_MAX', default=500, cast=int)
+
+#------------------------------ SINCRONIZACIÓN INCREMENTAL (APP MÓVIL) --------------------------
+# Filas máximas por colección en cada respuesta de GET /api/v1/sync/
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=1000, cast=int)
+# Vigencia del sync_token; uno vencido obliga a sincronizar desde cero
+SYNC_TOKEN_MAX_AGE = config('SYNC_TOKEN_MAX_AGE', default=30 * 24 * 3600, cast=int)
+# Margen por diferencia de reloj entre los servidores de la app y la BD
+SYNC_CLOCK_SKEW_SECONDS = config('SYNC_CLOCK_SKEW_SECONDS', default=2, cast=int)
+
+#------------------------------ PAQUETES OFFLINE POR REGIÓN -------------------------------------
+# Cada cuánto se revisa si el contenido de alguna región cambió (ver spots_routes.region_packs)
+REGION_PACK_REBUILD_INTERVAL_SECONDS = config('REGION_PACK_REBUILD_INTERVAL_SECONDS', default=900, cast=int)
+# Tolerancia de simplificación de los paths en grados (~5 m)
+REGION_PACK_SIMPLIFY_TOLERANCE = config('REGION_PACK_SIMPLIFY_TOLERANCE', default=0.00005, cast=float)
+REGION_PACK_THUMBNAIL_SIZES = config(
+    'REGION_PACK_THUMBNAIL_SIZES',
+    default='128,512',
+    cast=lambda v: [int(s) for s in v.split(",") if s.strip()]
+)
+REGION_PACK_THUMBNAIL_QUALITY = config('REGION_PACK_THUMBNAIL_QUALITY', default=70, cast=int)
+
+#------------------------------ CORREDOR DE RUTAS -----------------------------------------------
+# Ancho del corredor (metros a cada lado de Route.path) para spots y fotos a lo largo de la ruta
+ROUTE_CORRIDOR_DEFAULT_METERS = config('ROUTE_CORRIDOR_DEFAULT_METERS', default=200, cast=int)
+ROUTE_CORRIDOR_MAX_METERS = config('ROUTE_CORRIDOR_MAX_METERS', default=2000, cast=int)
+ROUTE_CORRIDOR_MAX_RESULTS = config('ROUTE_CORRIDOR_MAX_RESULTS', default=200, cast=int)
+# El cache va por versión de la ruta (updated_at); el TTL acota qué tan viejos quedan los spots nuevos
+ROUTE_CORRIDOR_CACHE_TTL = config('ROUTE_CORRIDOR_CACHE_TTL', default=3600, cast=int)
+
+#------------------------------ FILTRO POR ÁREA (within) ----------------------------------------
+# Polígonos dibujados por el usuario: se rechazan los más grandes y se simplifican hasta el tope
+AREA_FILTER_MAX_INPUT_VERTICES = config('AREA_FILTER_MAX_INPUT_VERTICES', default=5000, cast=int)
+AREA_FILTER_MAX_VERTICES = config('AREA_FILTER_MAX_VERTICES', default=200, cast=int)
+# Tolerancia inicial de simplificación en grados (~10 m)
+AREA_FILTER_SIMPLIFY_TOLERANCE = config('AREA_FILTER_SIMPLIFY_TOLERANCE', default=0.0001, cast=float)
+
 db_config = DATABASES['default']
 SCHEDULER_CONFIG = {
     'apscheduler.jobstores.default': {
@@ -535,6 +702,7 @@ ALLOWED_HOSTS = config(
 
 ROOT_URLCONF = 'manza_spots.urls'
 WSGI_APPLICATION = 'manza_spots.wsgi.application'
+ASGI_APPLICATION = 'manza_spots.asgi.application'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SITE_ID = 1
 
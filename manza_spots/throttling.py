@@ -1,4 +1,147 @@
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+import logging
+import math
+
+from redis.exceptions import RedisError
+from rest_framework import throttling
+
+from core.metrics import THROTTLE_REJECTIONS
+from core.utils.redis import get_redis_client, make_key
+
+logger = logging.getLogger(__name__)
+
+#==================================== GCRA EN REDIS ========================================
+# Generic Cell Rate Algorithm: por clave solo se guarda el "theoretical arrival time" (TAT)
+# en milisegundos, memoria O(1) sin importar la tasa. Un solo EVALSHA revisa todos los scopes
+# del request; si alguno rechaza no se consume cupo en ninguno (todo o nada).
+#
+# KEYS: claves de throttle
+# ARGV: por cada clave [intervalo_ms, periodo_ms]  (intervalo = periodo / num_requests)
+# Regresa: por cada clave los ms a esperar (0 = permitido)
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local waits = {}
+local new_tats = {}
+local allowed = true
+
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval
+    local allow_at = new_tat - period
+    if allow_at > now then
+        waits[i] = allow_at - now
+        allowed = false
+    else
+        waits[i] = 0
+        new_tats[i] = new_tat
+    end
+end
+
+if allowed then
+    for i = 1, #KEYS do
+        redis.call('SET', KEYS[i], new_tats[i], 'PX', new_tats[i] - now)
+    end
+end
+
+return waits
+"""
+
+_gcra_script = None
+
+
+def _get_gcra_script(client):
+    global _gcra_script
+    if _gcra_script is None:
+        _gcra_script = client.register_script(GCRA_SCRIPT)
+    return _gcra_script
+
+
+class RedisRateThrottleMixin:
+    """
+    Reemplaza la lista de timestamps de SimpleRateThrottle por GCRA atómico en Redis.
+
+    El primer throttle que se evalúa en el request resuelve de una vez todos los throttles
+    de la vista que usan este mixin (un solo round trip) y deja los resultados en el request;
+    los demás solo leen su resultado. Si el cache no es Redis se usa el algoritmo original de DRF.
+    """
+    _request_results_attr = '_redis_throttle_results'
+
+    def get_gcra_params(self):
+        """(intervalo_ms, periodo_ms) equivalentes a num_requests/duration"""
+        period = self.duration * 1000
+        interval = max(1, period // self.num_requests)
+        return interval, interval * self.num_requests
+
+    def allow_request(self, request, view):
+        allowed = self._allow_request(request, view)
+        if not allowed:
+            THROTTLE_REJECTIONS.labels(self.scope).inc()
+        return allowed
+
+    def _allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        client = get_redis_client()
+        if client is None:
+            return super().allow_request(request, view)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        results = getattr(request, self._request_results_attr, None)
+        if results is None or self.key not in results:
+            try:
+                results = self._evaluate_view_throttles(client, request, view)
+            except RedisError as e:
+                # Si Redis no responde se deja pasar el request (fail open)
+                logger.warning(f"Throttle en Redis no disponible: {e}")
+                return True
+            setattr(request, self._request_results_attr, results)
+
+        self.wait_ms = results.get(self.key, 0)
+        return self.wait_ms == 0
+
+    def _evaluate_view_throttles(self, client, request, view):
+        """Un solo EVALSHA para este throttle y los demás throttles Redis de la vista"""
+        params = {self.key: self.get_gcra_params()}
+
+        for throttle in view.get_throttles():
+            if not isinstance(throttle, RedisRateThrottleMixin) or throttle.rate is None:
+                continue
+            key = throttle.get_cache_key(request, view)
+            if key is not None and key not in params:
+                params[key] = throttle.get_gcra_params()
+
+        keys = list(params)
+        args = []
+        for key in keys:
+            args.extend(params[key])
+
+        waits = _get_gcra_script(client)(
+            keys=[make_key(key) for key in keys],
+            args=args,
+            client=client,
+        )
+        return dict(zip(keys, (int(wait) for wait in waits)))
+
+    def wait(self):
+        if get_redis_client() is None:
+            return super().wait()
+        return math.ceil(getattr(self, 'wait_ms', 0) / 1000)
+
+
+class AnonRateThrottle(RedisRateThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+class UserRateThrottle(RedisRateThrottleMixin, throttling.UserRateThrottle):
+    pass
 
 class LoginThrottle(AnonRateThrottle):
     scope = 'login'
@@ -21,4 +164,4 @@ class BurstRateThrottle(UserRateThrottle):
         """
         Se aplica tanto a usuarios autenticados como anónimos
         """
-        return super().allow_request(request, view)
\ No newline at end of file
+        return super().allow_request(request, view)
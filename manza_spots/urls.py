@@ -22,12 +22,15 @@ from django.urls import include, path
 from authentication.urls import authentications_patterns
 from users.urls import user_patterns
 from spots_routes.urls import spots_routes_patterns
+from core.urls import core_patterns
 from django.conf.urls.static import static
+from core.views import metrics_view
 from drf_spectacular.views import ( SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView)
 
 api_v1_patterns = [
     path('auth/', include(authentications_patterns)),
     path('users/', include(user_patterns)), 
+    path('', include(core_patterns)),
     path('', include(spots_routes_patterns))
 ]
 
@@ -38,6 +41,7 @@ urlpatterns = [
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -1,12 +1,16 @@
 from django.contrib import admin
 from django.contrib.gis import admin as gis_admin
+from django.utils import timezone
 from django.utils.html import format_html
 from django.contrib.admin import DateFieldListFilter
+from django.contrib.gis.db.models import PointField
+from django.db.models import Func
 
-from core.mixins import SoftDeleteAdminMixin
+from core.mixins import LargeTableAdminMixin, SoftDeleteAdminMixin
+from core.utils.background import run_in_background
 from .models import (
     SpotStatusReview, Spot, SpotCaption, UserFavoriteSpot,
-    Difficulty, TravelMode, Route, RoutePhoto, UserFavoriteRoute
+    Difficulty, TravelMode, Route, RoutePhoto, UserFavoriteRoute, RegionPack
 )
 
 # -------------------- SPOTS -----------------------------
@@ -26,16 +30,16 @@ class SpotCaptionInline(admin.TabularInline):
 
 @admin.action(description="Marcar Spots como activos")
 def activar_spots(modeladmin, request, queryset):
-    queryset.update(is_active=True)
+    queryset.update(is_active=True, updated_at=timezone.now())
 
 
 @admin.action(description="Marcar Spots como inactivos")
 def desactivar_spots(modeladmin, request, queryset):
-    queryset.update(is_active=False)
+    queryset.update(is_active=False, updated_at=timezone.now())
 
 
 @admin.register(Spot)
-class SpotAdmin(SoftDeleteAdminMixin, gis_admin.GISModelAdmin):
+class SpotAdmin(LargeTableAdminMixin, SoftDeleteAdminMixin, gis_admin.GISModelAdmin):
     # UBICACION DE MANZA
     gis_widget_kwargs = {
         'attrs': {
@@ -57,8 +61,10 @@ class SpotAdmin(SoftDeleteAdminMixin, gis_admin.GISModelAdmin):
         "created_at",
         "location_display",
     )
+    # icontains sobre name/description/username usa los índices trigram (spot_name_trgm_idx, ...)
     search_fields = ("name", "description", "user__username")
     list_filter = ("status", "is_active", "created_at")
+    list_select_related = ("user", "status")
     readonly_fields = ("created_at", "reviewed_at", "thumbnail_preview")
     inlines = [SpotCaptionInline]
     actions = [activar_spots, desactivar_spots]
@@ -99,26 +105,30 @@ class SpotAdmin(SoftDeleteAdminMixin, gis_admin.GISModelAdmin):
     status_badge.short_description = "Estado"
     
     def routes_count(self, obj):
-        count = obj.routes.filter(is_active=True).count()
+        count = obj.routes_count
         return format_html('🛤️ {}', count) if count > 0 else '-'
     routes_count.short_description = "Rutas"
+    routes_count.admin_order_field = "routes_count"
     
     def favorites_count(self, obj):
-        count = obj.favorited_by.filter(is_active=True).count()
+        count = obj.favorites_count
         return format_html('⭐ {}', count) if count > 0 else '-'
     favorites_count.short_description = "Favoritos"
+    favorites_count.admin_order_field = "favorites_count"
 
 
 @admin.register(SpotCaption)
-class SpotCaptionAdmin(admin.ModelAdmin):
+class SpotCaptionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "spot", "user", "img_path", "is_active", "created_at")
+    list_select_related = ("spot", "user")
     search_fields = ("img_path", "spot__name", "user__username")
     list_filter = ("is_active", "created_at")
 
 
 @admin.register(UserFavoriteSpot)
-class UserFavoriteSpotAdmin(admin.ModelAdmin):
+class UserFavoriteSpotAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "spot", "is_active", "created_at")
+    list_select_related = ("user", "spot")
     search_fields = ("user__username", "spot__name")
     list_filter = ("is_active",)
 
@@ -193,16 +203,22 @@ class RoutePhotoInline(admin.TabularInline):
 
 @admin.action(description="✅ Activar rutas seleccionadas")
 def activar_routes(modeladmin, request, queryset):
-    queryset.update(is_active=True)
+    queryset.update(is_active=True, updated_at=timezone.now())
 
 
 @admin.action(description="❌ Desactivar rutas seleccionadas")
 def desactivar_routes(modeladmin, request, queryset):
-    queryset.update(is_active=False)
+    queryset.update(is_active=False, updated_at=timezone.now())
+
+
+class PathEndpoint(Func):
+    """ST_StartPoint / ST_EndPoint del path (geography) calculado en la BD"""
+    template = '%(function)s(%(expressions)s::geometry)'
+    output_field = PointField(srid=4326)
 
 
 @admin.register(Route)
-class RouteAdmin(gis_admin.GISModelAdmin):
+class RouteAdmin(LargeTableAdminMixin, gis_admin.GISModelAdmin):
     """Admin para Routes con visualización del PATH geográfico"""
     
     # Configuración del mapa GIS para el path
@@ -251,15 +267,34 @@ class RouteAdmin(gis_admin.GISModelAdmin):
     
     inlines = [RoutePhotoInline]
     actions = [activar_routes, desactivar_routes]
-    date_hierarchy = "created_at"
-    ordering = ("-created_at",)
+    # -id en vez de -created_at: mismo orden (ids secuenciales) y lo resuelve la PK
+    ordering = ("-id",)
 
     def get_queryset(self, request):
-        """Optimización de queries"""
-        return (
+        """
+        En el listado no se carga el path completo (puede tener miles de puntos):
+        inicio y fin vienen calculados desde la BD.
+        """
+        queryset = (
             super().get_queryset(request)
             .select_related("user", "spot", "difficulty", "travel_mode")
-            .prefetch_related("photo")
+        )
+        match = getattr(request, "resolver_match", None)
+        if match is not None and match.url_name == "spots_routes_route_changelist":
+            queryset = queryset.defer("path").annotate(
+                path_start=PathEndpoint("path", function="ST_StartPoint"),
+                path_end=PathEndpoint("path", function="ST_EndPoint"),
+            )
+        return queryset
+
+    @staticmethod
+    def _format_coords(coords):
+        if coords is None:
+            return "-"
+        lon, lat = coords
+        return format_html(
+            '<span style="font-family: monospace; font-size: 11px;">{}, {}</span>',
+            f"{lat:.5f}", f"{lon:.5f}"
         )
 
     def difficulty_colored(self, obj):
@@ -275,37 +310,30 @@ class RouteAdmin(gis_admin.GISModelAdmin):
     
     def start_point(self, obj):
         """Punto inicial de la ruta"""
+        if hasattr(obj, "path_start"):
+            return self._format_coords(obj.path_start and obj.path_start.coords)
         if obj.path and len(obj.path.coords) > 0:
-            lon, lat = obj.path.coords[0]
-            lat_str = f"{lat:.5f}"
-            lon_str = f"{lon:.5f}"
-            return format_html(
-                '<span style="font-family: monospace; font-size: 11px;">{}, {}</span>',
-                lat_str, lon_str
-            )
+            return self._format_coords(obj.path.coords[0])
         return "-"
     start_point.short_description = "🟢 Inicio"
     
     def end_point(self, obj):
         """Punto final de la ruta"""
+        if hasattr(obj, "path_end"):
+            return self._format_coords(obj.path_end and obj.path_end.coords)
         if obj.path and len(obj.path.coords) > 0:
-            lon, lat = obj.path.coords[-1]
-            lat_str = f"{lat:.5f}"
-            lon_str = f"{lon:.5f}"
-            return format_html(
-                '<span style="font-family: monospace; font-size: 11px;">{}, {}</span>',
-                lat_str, lon_str
-            )
+            return self._format_coords(obj.path.coords[-1])
         return "-"
     end_point.short_description = "🔴 Fin"
     
     def photos_count(self, obj):
         """Contador de fotos"""
-        count = obj.photo.filter(is_active=True).count()
+        count = obj.photos_count
         if count > 0:
             return format_html('<span style="color: green;">📷 {}</span>', count)
         return format_html('<span style="color: gray;">-</span>')
     photos_count.short_description = "Fotos"
+    photos_count.admin_order_field = "photos_count"
     
     def path_info(self, obj):
         """Información detallada del path para la página de detalle"""
@@ -360,8 +388,22 @@ class RouteAdmin(gis_admin.GISModelAdmin):
     path_info.short_description = "📍 Detalles del Path"
 
 
+class RouteIdSearchMixin:
+    """
+    Búsqueda por id de ruta exacta cuando el término es numérico; "route__id" en
+    search_fields haría UPPER(route_id::text) LIKE '%...%' sin poder usar índices.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit() and len(term) <= 18:
+            results |= queryset.filter(route_id=int(term))
+        return results, may_have_duplicates
+
+
 @admin.register(RoutePhoto)
-class RoutePhotoAdmin(gis_admin.GISModelAdmin):
+class RoutePhotoAdmin(RouteIdSearchMixin, LargeTableAdminMixin, gis_admin.GISModelAdmin):
     gis_widget_kwargs = {
         'attrs': {
             'default_zoom': 15,
@@ -379,8 +421,9 @@ class RoutePhotoAdmin(gis_admin.GISModelAdmin):
         "created_at"
     )
     
-    search_fields = ("route__id", "user__username")
+    search_fields = ("user__username",)
     list_filter = ("is_active", "created_at")
+    list_select_related = ("route__spot", "user")
     readonly_fields = ("image_preview_large", "location_display", "created_at", "updated_at")
     
     def image_preview(self, obj):
@@ -437,7 +480,45 @@ class RoutePhotoAdmin(gis_admin.GISModelAdmin):
 
 
 @admin.register(UserFavoriteRoute)
-class UserFavoriteRouteAdmin(admin.ModelAdmin):
+class UserFavoriteRouteAdmin(RouteIdSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "route", "is_active", "created_at")
-    search_fields = ("user__username", "route__id", "route__spot__name")
-    list_filter = ("is_active",)
\ No newline at end of file
+    search_fields = ("user__username", "route__spot__name")
+    list_select_related = ("user", "route__spot")
+    list_filter = ("is_active",)
+
+
+# -------------------- PAQUETES OFFLINE -----------------------------
+
+@admin.action(description="🔄 Reconstruir paquetes seleccionados")
+def reconstruir_region_packs(modeladmin, request, queryset):
+    from spots_routes.region_packs import RegionPackBuilder
+
+    slugs = list(queryset.values_list("slug", flat=True))
+    run_in_background(RegionPackBuilder.rebuild_stale, slugs, force=True)
+    modeladmin.message_user(request, f"Reconstrucción en segundo plano de {len(slugs)} paquete(s).")
+
+
+@admin.register(RegionPack)
+class RegionPackAdmin(gis_admin.GISModelAdmin):
+    gis_widget_kwargs = {
+        'attrs': {
+            'default_zoom': 10,
+            'default_lat': 19.0519,
+            'default_lon': -104.3186,
+        },
+    }
+    list_display = ("slug", "name", "version", "spots_count", "routes_count", "size_display", "built_at", "is_active")
+    search_fields = ("slug", "name")
+    list_filter = ("is_active",)
+    readonly_fields = (
+        "version", "file", "size_bytes", "sha256", "content_fingerprint",
+        "spots_count", "routes_count", "built_at", "created_at", "updated_at",
+    )
+    actions = [reconstruir_region_packs]
+
+    def size_display(self, obj):
+        if not obj.size_bytes:
+            return "-"
+        return f"{obj.size_bytes / (1024 * 1024):.1f} MB"
+    size_display.short_description = "Tamaño"
+    size_display.admin_order_field = "size_bytes"
@@ -47,7 +47,25 @@ ROUTE_FILTER_PARAMS = [
         location=OpenApiParameter.QUERY,
         description='Expandir relaciones del modelo (ej: "photos" para incluir fotos)',
         required=False
-    )
+    ),
+    OpenApiParameter(
+        name="within",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Solo rutas que pasan por el área: GeoJSON (Polygon/MultiPolygon) o encoded polyline del contorno"
+    ),
+    OpenApiParameter(
+        name="min_favorites",
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        description="Solo rutas con al menos este número de favoritos"
+    ),
+    OpenApiParameter(
+        name="ordering",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description="Orden: favorites, photos, created_at (prefijo - para descendente, ej: -favorites)"
+    ),
 ]
 
 ROUTE_PHOTO_FILTER_PARAMS = [
@@ -65,3 +83,10 @@ ROUTE_PHOTO_FILTER_PARAMS = [
     ),
 ]
 
+
+CORRIDOR_DISTANCE_PARAM = OpenApiParameter(
+    name="distance",
+    type=OpenApiTypes.INT,
+    location=OpenApiParameter.QUERY,
+    description="Metros a cada lado de la ruta (default ROUTE_CORRIDOR_DEFAULT_METERS, tope ROUTE_CORRIDOR_MAX_METERS)"
+)
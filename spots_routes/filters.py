@@ -1,10 +1,35 @@
 import django_filters
+from django import forms
+from .geo import parse_area, within_area, within_radius
 from .models import Route, RoutePhoto, Spot
 from django.contrib.gis.geos import Point
-from django.contrib.gis.measure import D
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Polygon
 
+
+class AreaField(forms.CharField):
+    """GeoJSON o encoded polyline a polígono validado y simplificado (ver geo.parse_area)"""
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return None
+        try:
+            return parse_area(value)
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+
+
+class AreaFilter(django_filters.Filter):
+    """Registros cuya geometría toca el área (prefiltro && + ST_Intersects)"""
+    field_class = AreaField
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        return within_area(qs, self.field_name, value)
+
+
 class RouteFilter(django_filters.FilterSet):    
     user = django_filters.NumberFilter(field_name='user_id')
     difficulty = django_filters.CharFilter(
@@ -17,6 +42,17 @@ class RouteFilter(django_filters.FilterSet):
         lookup_expr='iexact'
     )
 
+    # Contadores desnormalizados: filtro y orden por popularidad con índice
+    min_favorites = django_filters.NumberFilter(field_name='favorites_count', lookup_expr='gte')
+    ordering = django_filters.OrderingFilter(fields=(
+        ('favorites_count', 'favorites'),
+        ('photos_count', 'photos'),
+        ('created_at', 'created_at'),
+    ))
+
+    # Rutas que pasan por el área dibujada (GeoJSON o encoded polyline)
+    within = AreaFilter(field_name='path')
+
     class Meta:
         model = Route
         fields = ['user', 'difficulty', 'travel_mode']
@@ -41,6 +77,16 @@ class SpotFilter(django_filters.FilterSet):
     sw_lng = django_filters.NumberFilter(method="filter_bounding_box")
     ne_lat = django_filters.NumberFilter(method="filter_bounding_box")
     ne_lng = django_filters.NumberFilter(method="filter_bounding_box")
+
+    within = AreaFilter(field_name="location")
+
+    min_favorites = django_filters.NumberFilter(field_name='favorites_count', lookup_expr='gte')
+    ordering = django_filters.OrderingFilter(fields=(
+        ('favorites_count', 'favorites'),
+        ('routes_count', 'routes'),
+        ('captions_count', 'captions'),
+        ('created_at', 'created_at'),
+    ))
     class Meta:
         model = Spot
         fields = ["name", "status"]
@@ -52,37 +98,31 @@ class SpotFilter(django_filters.FilterSet):
         return queryset  
 
     def filter_by_radius(self, queryset, name, value):
-        data = self.data
-        if not all(k in data for k in ("lat", "lng")):
+        # lat, lng y radius llaman a este método; el filtro se aplica una sola vez
+        data = self.form.cleaned_data
+        if name != "lat" or data.get("lat") is None or data.get("lng") is None:
             return queryset
 
         point = Point(float(data["lng"]), float(data["lat"]), srid=4326)
-        radius = float(data.get("radius", 5))
-        
+        radius = float(data["radius"]) if data.get("radius") is not None else 5
+
+        # Prefiltro && sobre el índice GiST + ST_DWithin exacto en geography (ver spots_routes.geo)
         return (
-                    queryset
-                    .filter(location__distance_lte=(point, D(km=radius)))
-                    .annotate(distance=Distance("location", point))
-                    .order_by("distance")
-                )
+            within_radius(queryset, "location", point, radius * 1000)
+            .annotate(distance=Distance("location", point))
+            .order_by("distance")
+        )
 
     def filter_bounding_box(self, queryset, name, value):
-            data = self.data
-            try:
-                sw_lat = float(data["sw_lat"])
-                sw_lng = float(data["sw_lng"])
-                ne_lat = float(data["ne_lat"])
-                ne_lng = float(data["ne_lng"])
-            except (KeyError, ValueError):
-                return queryset  
-
-            bbox = Polygon((
-                (sw_lng, sw_lat),  
-                (sw_lng, ne_lat),  
-                (ne_lng, ne_lat),  
-                (ne_lng, sw_lat),  
-                (sw_lng, sw_lat),  
-            ), srid=4326)
-
-            return queryset.filter(location__within=bbox)
-        
\ No newline at end of file
+        # Los cuatro parámetros llaman a este método; el filtro se aplica una sola vez
+        data = self.form.cleaned_data
+        coords = [data.get(key) for key in ("sw_lng", "sw_lat", "ne_lng", "ne_lat")]
+        if name != "sw_lat" or any(coord is None for coord in coords):
+            return queryset
+
+        bbox = Polygon.from_bbox(tuple(float(coord) for coord in coords))
+        bbox.srid = 4326
+
+        # Para puntos, && con el rectángulo equivale a estar dentro (bordes incluidos)
+        # y se resuelve solo con el índice GiST, sin ST_Within por fila
+        return queryset.filter(location__bboverlaps=bbox)
@@ -0,0 +1,221 @@
+"""
+Predicados geográficos que aprovechan los índices GiST de las columnas geometry (SRID 4326).
+
+location__distance_lte sobre geometry en grados se compila a ST_DistanceSphere(...) <= r, que
+no usa índices: evalúa la función en cada fila. Aquí la búsqueda por radio es en dos pasos:
+1. bbox del círculo con && (bboverlaps): rango sobre el índice GiST
+2. ST_DWithin sobre geography (metros, exacto) solo para los candidatos del paso 1
+
+Lo mismo sirve para cualquier geometría (p. ej. el corredor alrededor de Route.path): el
+bbox es el de la geometría ampliado `meters` por cada lado.
+
+Las áreas dibujadas por el usuario (parse_area) siguen el mismo patrón: && contra el bbox
+del polígono y ST_Intersects exacto solo para esos candidatos.
+"""
+import json
+import math
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSException, MultiPolygon, Polygon
+from django.db.models import BooleanField, Expression, F, FloatField
+
+# Metros por grado en el esferoide WGS84, a la baja para que el bbox nunca quede corto:
+# el grado de latitud va de 110574 m (ecuador) a 111694 m (polos) y el de longitud es
+# π·a·cos(lat) / (180·√(1 − e²·sin²(lat))) con a = 6378137, siempre mayor que con este valor
+METERS_PER_DEGREE_MIN = 110574
+# Intentos de simplificación (la tolerancia se duplica en cada uno)
+AREA_SIMPLIFY_STEPS = 16
+
+
+def expanded_bbox(geometry, meters):
+    """
+    Polígono que contiene todo lo que está a `meters` o menos de `geometry` (lon/lat).
+    None si cruza el antimeridiano o un polo (ahí no sirve un rectángulo simple).
+    """
+    xmin, ymin, xmax, ymax = geometry.extent
+    lat_delta = meters / METERS_PER_DEGREE_MIN
+    south, north = ymin - lat_delta, ymax + lat_delta
+    if south <= -90 or north >= 90:
+        return None
+
+    # El grado de longitud es más corto en la latitud más alejada del ecuador
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    lon_delta = meters / (METERS_PER_DEGREE_MIN * cos_lat)
+    west, east = xmin - lon_delta, xmax + lon_delta
+    if west <= -180 or east >= 180:
+        return None
+
+    bbox = Polygon.from_bbox((west, south, east, north))
+    bbox.srid = 4326
+    return bbox
+
+
+class _GeometryParamExpression(Expression):
+    """Expresión sobre una columna y una geometría fija que viaja como parámetro EWKT"""
+    template = None
+
+    def __init__(self, expression, geometry, *extra):
+        super().__init__()
+        self.expression = expression
+        self.geometry = geometry
+        self.extra = list(extra)
+
+    def get_source_expressions(self):
+        return [self.expression]
+
+    def set_source_expressions(self, exprs):
+        (self.expression,) = exprs
+
+    def as_sql(self, compiler, connection):
+        column_sql, params = compiler.compile(self.expression)
+        return self.template % {'column': column_sql}, [*params, self.geometry.ewkt, *self.extra]
+
+
+class GeographyDWithin(_GeometryParamExpression):
+    """ST_DWithin(col::geography, geometría::geography, metros): distancia exacta sobre el esferoide"""
+    template = 'ST_DWithin((%(column)s)::geography, ST_GeogFromText(%%s), %%s)'
+    output_field = BooleanField()
+    conditional = True
+
+    def __init__(self, expression, geometry, meters):
+        super().__init__(expression, geometry, float(meters))
+
+
+class GeographyDistance(_GeometryParamExpression):
+    """ST_Distance(col::geography, geometría::geography) en metros"""
+    template = 'ST_Distance((%(column)s)::geography, ST_GeogFromText(%%s))'
+    output_field = FloatField()
+
+
+class LineLocatePoint(_GeometryParamExpression):
+    """
+    ST_LineLocatePoint(línea, col): fracción (0 a 1) de la línea en el punto más cercano a col.
+    Sirve para ordenar lo que queda a lo largo de una ruta.
+    """
+    template = 'ST_LineLocatePoint(ST_GeomFromEWKT(%%s), %(column)s)'
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection):
+        # La línea va antes que la columna en la llamada
+        column_sql, params = compiler.compile(self.expression)
+        return self.template % {'column': column_sql}, [self.geometry.ewkt, *params]
+
+
+def within_distance(queryset, field_name, geometry, meters):
+    """Filtra `queryset` a los registros a `meters` o menos de `geometry` (prefiltro && + ST_DWithin)"""
+    bbox = expanded_bbox(geometry, meters)
+    if bbox is not None:
+        queryset = queryset.filter(**{f'{field_name}__bboverlaps': bbox})
+    return queryset.filter(GeographyDWithin(F(field_name), geometry, meters))
+
+
+def within_radius(queryset, field_name, point, meters):
+    """Filtra `queryset` a los registros a `meters` o menos de `point`"""
+    return within_distance(queryset, field_name, point, meters)
+
+
+#------------------------------------- áreas ---------------------------------------------
+
+def decode_polyline(encoded, precision=5):
+    """Encoded polyline (formato de Google) a [(lon, lat), ...]"""
+    coords = []
+    index = lat = lng = 0
+    factor = 10 ** precision
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= len(encoded):
+                    raise ValueError('Encoded polyline incompleto')
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if not 0 <= byte < 64:
+                    raise ValueError('Carácter inválido en el encoded polyline')
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append((lng / factor, lat / factor))
+    return coords
+
+
+def _area_from_geojson(text):
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError('GeoJSON inválido')
+    if data.get('type') == 'Feature':
+        data = data.get('geometry') or {}
+    if data.get('type') == 'Polygon':
+        return Polygon(*data['coordinates'])
+    if data.get('type') == 'MultiPolygon':
+        return MultiPolygon(*[Polygon(*rings) for rings in data['coordinates']])
+    raise ValueError('El GeoJSON debe ser un Polygon o MultiPolygon')
+
+
+def _area_from_polyline(text):
+    ring = decode_polyline(text)
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    if len(ring) < 4:
+        raise ValueError('El contorno necesita al menos 3 puntos')
+    return Polygon(ring)
+
+
+def parse_area(value):
+    """
+    Polígono (SRID 4326) a partir de GeoJSON (Polygon, MultiPolygon o Feature) o de un
+    encoded polyline con el contorno (se cierra solo). Se valida y se simplifica hasta
+    AREA_FILTER_MAX_VERTICES vértices. ValueError con el motivo si no sirve.
+    """
+    value = value.strip()
+    try:
+        if value.startswith('{'):
+            area = _area_from_geojson(value)
+        else:
+            area = _area_from_polyline(value)
+    except (GEOSException, TypeError, KeyError, AttributeError, IndexError) as exc:
+        raise ValueError('El área no es un polígono válido') from exc
+
+    # Un Polygon/MultiPolygon sin coordenadas es válido para GEOS pero no tiene extent
+    if area.empty:
+        raise ValueError('El área está vacía')
+    if area.num_coords > settings.AREA_FILTER_MAX_INPUT_VERTICES:
+        raise ValueError(f'El área tiene más de {settings.AREA_FILTER_MAX_INPUT_VERTICES} vértices')
+    try:
+        xmin, ymin, xmax, ymax = area.extent
+        valid = area.valid
+    except (GEOSException, IndexError) as exc:
+        raise ValueError('El área no es un polígono válido') from exc
+    if xmin < -180 or xmax > 180 or ymin < -90 or ymax > 90:
+        raise ValueError('Coordenadas fuera de rango (lon -180..180, lat -90..90)')
+    if not valid:
+        raise ValueError(f'El área no es un polígono válido: {area.valid_reason}')
+
+    # Simplificación con tolerancia creciente hasta quedar dentro del tope de vértices.
+    # preserve_topology deja al menos 4 vértices por anillo: con muchos anillos no alcanza
+    tolerance = settings.AREA_FILTER_SIMPLIFY_TOLERANCE
+    for _ in range(AREA_SIMPLIFY_STEPS):
+        simplified = area.simplify(tolerance, preserve_topology=True)
+        if simplified.num_coords <= settings.AREA_FILTER_MAX_VERTICES:
+            break
+        tolerance *= 2
+    else:
+        raise ValueError(f'El área no se puede reducir a {settings.AREA_FILTER_MAX_VERTICES} vértices')
+    if simplified.empty:
+        raise ValueError('El área es demasiado pequeña')
+
+    simplified.srid = 4326
+    return simplified
+
+
+def within_area(queryset, field_name, area):
+    """Filtra `queryset` a los registros que tocan `area` (prefiltro && + ST_Intersects)"""
+    return queryset.filter(**{
+        f'{field_name}__bboverlaps': area,
+        f'{field_name}__intersects': area,
+    })
@@ -0,0 +1,36 @@
+import logging
+
+from core.metrics import track_job
+
+logger = logging.getLogger(__name__)
+
+@track_job
+def reconcile_popularity_counters():
+    """Corrige los contadores desnormalizados de spots y rutas que se hayan desfasado"""
+    from spots_routes.services import PopularityCounterService
+
+    try:
+        fixed = PopularityCounterService.reconcile()
+        drifted = {counter: rows for counter, rows in fixed.items() if rows}
+        if drifted:
+            logger.warning(f'Contadores de popularidad corregidos: {drifted}')
+        return fixed
+    except Exception as e:
+        logger.error(f'Error en reconcile_popularity_counters: {str(e)}')
+        raise
+
+
+@track_job
+def rebuild_region_packs():
+    """Reconstruye los paquetes offline cuyas regiones tuvieron cambios"""
+    from spots_routes.region_packs import RegionPackBuilder
+
+    try:
+        results = RegionPackBuilder.rebuild_stale()
+        built = [slug for slug, result in results.items() if result == RegionPackBuilder.BUILT]
+        if built:
+            logger.info(f'Paquetes offline reconstruidos: {built}')
+        return results
+    except Exception as e:
+        logger.error(f'Error en rebuild_region_packs: {str(e)}')
+        raise
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from spots_routes.region_packs import RegionPackBuilder
+
+
+class Command(BaseCommand):
+    help = 'Construye los paquetes offline por región cuyo contenido cambió'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='Solo estos paquetes (por slug); sin argumentos, todos los activos'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reconstruye aunque la huella de contenido no haya cambiado'
+        )
+
+    def handle(self, *args, **options):
+        results = RegionPackBuilder.rebuild_stale(options['slugs'] or None, force=options['force'])
+
+        for slug, result in results.items():
+            self.stdout.write(f'{slug:<30} {result}')
+        self.stdout.write(self.style.SUCCESS(f'Paquetes revisados: {len(results)}'))
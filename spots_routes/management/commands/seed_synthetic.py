@@ -0,0 +1,562 @@
+import io
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from spots_routes.models import (
+    Difficulty,
+    Route,
+    RoutePhoto,
+    Spot,
+    SpotCaption,
+    SpotStatusReview,
+    TravelMode,
+    UserFavoriteRoute,
+    UserFavoriteSpot,
+)
+from spots_routes.services import PopularityCounterService
+from users.models import UserProfile
+
+User = get_user_model()
+
+#======================================== DATOS BASE ========================================
+# (nombre, lat, lon, peso, dispersión en km): los spots se concentran alrededor de ciudades
+# y zonas turísticas; el resto cae disperso dentro del territorio.
+CLUSTERS = [
+    ('CDMX', 19.4326, -99.1332, 20, 25),
+    ('Guadalajara', 20.6597, -103.3496, 9, 20),
+    ('Monterrey', 25.6866, -100.3161, 8, 20),
+    ('Puebla', 19.0414, -98.2063, 5, 15),
+    ('Querétaro', 20.5888, -100.3899, 4, 12),
+    ('Oaxaca', 17.0732, -96.7266, 5, 30),
+    ('San Cristóbal', 16.7370, -92.6376, 3, 25),
+    ('Cancún', 21.1619, -86.8515, 5, 40),
+    ('Mérida', 20.9674, -89.5926, 4, 30),
+    ('Tijuana', 32.5149, -117.0382, 4, 15),
+    ('La Paz', 24.1426, -110.3128, 3, 35),
+    ('Chihuahua', 28.6320, -106.0691, 3, 40),
+    ('Guanajuato', 21.0190, -101.2574, 3, 15),
+    ('Veracruz', 19.1738, -96.1342, 3, 20),
+    ('Morelia', 19.7060, -101.1950, 3, 15),
+    ('Puerto Vallarta', 20.6534, -105.2253, 3, 25),
+    ('Huasteca Potosina', 21.9833, -99.0167, 2, 35),
+]
+RURAL_FRACTION = 0.08
+MEXICO_BBOX = (-117.1, 14.6, -86.7, 32.7)  # (lon_min, lat_min, lon_max, lat_max)
+
+ADJECTIVES = ['Mirador', 'Cascada', 'Cerro', 'Playa', 'Barranca', 'Laguna', 'Cañón', 'Bosque', 'Grutas', 'Pueblo']
+NOUNS = ['del Águila', 'Escondido', 'de los Venados', 'Azul', 'del Sol', 'de Piedra', 'Encantado', 'Viejo', 'de la Luna', 'Verde']
+PHRASES = [
+    'Vista increíble al atardecer.',
+    'Acceso por terracería, llevar agua.',
+    'Ideal para ir en familia.',
+    'Se llena los fines de semana.',
+    'Hay que pagar cuota de entrada.',
+    'Buen lugar para acampar.',
+]
+
+DIFFICULTIES = [('EASY', 'Fácil', '#2E7D32'), ('MEDIUM', 'Intermedio', '#F9A825'), ('HARD', 'Difícil', '#C62828')]
+# (key, nombre, paso GPS en metros, mediana de la ruta en km)
+TRAVEL_MODES = [('WALK', 'Caminando', 15, 3), ('BIKE', 'Bicicleta', 40, 12), ('CAR', 'Automóvil', 120, 35)]
+
+STATUS_WEIGHTS = [('APPROVED', 85), ('PENDING', 10), ('REJECTED', 5)]
+
+# Fechas relativas a un ancla fija para que la misma semilla genere los mismos datos
+ANCHOR = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY_DAYS = 3 * 365
+
+PLACEHOLDER_COUNT = 8
+PLACEHOLDER_DIR = 'Synthetic'
+
+EARTH_RADIUS_M = 6378137.0
+METERS_PER_DEGREE = 111320.0
+
+
+#======================================== COPY ========================================
+
+def _encode(value):
+    """Valor en formato texto de COPY"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(value)
+
+
+def _iter_chunks(rows, chunk_rows):
+    lines = []
+    for row in rows:
+        lines.append('\t'.join(map(_encode, row)))
+        if len(lines) >= chunk_rows:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class _ChunkReader(io.RawIOBase):
+    """Adaptador archivo -> generador para copy_expert de psycopg2"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk.encode()
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_rows(model, fields, rows, chunk_rows=20000):
+    """
+    Carga las filas con COPY ... FROM STDIN (psycopg 3 o psycopg2).
+
+    Args:
+        fields: nombres de campos del modelo, en el orden de cada fila
+
+    Returns:
+        int: filas cargadas
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN'
+
+    counter = {'rows': 0}
+
+    def counted(rows):
+        for row in rows:
+            counter['rows'] += 1
+            yield row
+
+    chunks = _iter_chunks(counted(rows), chunk_rows)
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy'):
+            with raw_cursor.copy(sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+        else:
+            raw_cursor.copy_expert(sql, _ChunkReader(chunks), size=1 << 20)
+
+    return counter['rows']
+
+
+def reserve_ids(model, count):
+    """Aparta un bloque de ids consecutivos de la secuencia de la tabla; regresa el primero"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [model._meta.db_table, model._meta.pk.column])
+        sequence = cursor.fetchone()[0]
+        cursor.execute('SELECT setval(%s, nextval(%s) + %s - 1)', [sequence, sequence, count])
+        last_id = cursor.fetchone()[0]
+    return last_id - count + 1
+
+
+#======================================== GEOMETRÍA ========================================
+
+def _mercator(lon, lat):
+    """Coordenadas EPSG:3857 (las que usa Route.save para calcular distance)"""
+    x = EARTH_RADIUS_M * math.radians(lon)
+    y = EARTH_RADIUS_M * math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    return x, y
+
+
+def mercator_length_km(points):
+    length = 0.0
+    previous = _mercator(*points[0])
+    for point in points[1:]:
+        current = _mercator(*point)
+        length += math.hypot(current[0] - previous[0], current[1] - previous[1])
+        previous = current
+    return round(length / 1000, 2)
+
+
+def generate_route_path(rng, end_lon, end_lat, length_m, step_m, max_points):
+    """
+    Polilínea tipo GPS que termina en el spot: caminata con rumbo persistente (curvas suaves),
+    paso variable y un punto cada step_m metros en promedio.
+    """
+    count = max(2, min(max_points, int(length_m / step_m) + 1))
+    step = length_m / (count - 1)
+    heading = rng.uniform(0, 2 * math.pi)
+    cos_lat = math.cos(math.radians(end_lat))
+
+    points = [(0.0, 0.0)]
+    lon = lat = 0.0
+    for _ in range(count - 1):
+        heading += rng.gauss(0, 0.35)
+        distance = step * rng.uniform(0.6, 1.4)
+        lat += distance * math.cos(heading) / METERS_PER_DEGREE
+        lon += distance * math.sin(heading) / (METERS_PER_DEGREE * cos_lat)
+        points.append((lon, lat))
+
+    # Se traslada para que el último punto quede en el spot
+    return [(end_lon + x - lon, end_lat + y - lat) for x, y in points]
+
+
+def _point_ewkt(lon, lat):
+    return f'SRID=4326;POINT({lon:.6f} {lat:.6f})'
+
+
+def _linestring_ewkt(points):
+    return 'SRID=4326;LINESTRING(' + ','.join(f'{lon:.6f} {lat:.6f}' for lon, lat in points) + ')'
+
+
+#======================================== COMANDO ========================================
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos a escala de producción (usuarios, spots, rutas GPS, fotos y favoritos) '
+        'con COPY. Determinista por --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--spots', type=int, default=10000)
+        parser.add_argument('--routes-per-spot', type=float, default=0.3, help='Rutas promedio por spot')
+        parser.add_argument('--max-route-points', type=int, default=2000)
+        parser.add_argument('--captions-per-spot', type=float, default=1.0, help='Fotos promedio por spot')
+        parser.add_argument('--photos-per-route', type=float, default=1.0, help='Fotos promedio por ruta')
+        parser.add_argument('--favorites-per-user', type=float, default=10.0, help='Spots favoritos promedio por usuario')
+        parser.add_argument('--route-favorites-per-user', type=float, default=3.0)
+        parser.add_argument('--popularity-exponent', type=float, default=1.1, help='Exponente de la ley de potencia de popularidad')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='synth', help='Prefijo de los usernames sintéticos')
+        parser.add_argument('--clear', action='store_true', help='Borra antes los datos sintéticos con el mismo prefijo')
+        parser.add_argument('--no-files', action='store_true', help='No escribe los archivos placeholder en el storage')
+
+    #---------------------------------------- utilidades ----------------------------------------
+
+    def _rng(self, name):
+        # Un generador por entidad: cambiar un conteo no altera los datos de las demás
+        return random.Random(f"{self.seed}:{name}")
+
+    def _timestamp(self, rng, after=None):
+        start = after or (ANCHOR - timedelta(days=HISTORY_DAYS))
+        span = (ANCHOR - start).total_seconds()
+        return start + timedelta(seconds=rng.random() * span)
+
+    def _popularity(self, count):
+        """Pesos acumulados con ley de potencia sobre un orden aleatorio de los ids"""
+        rng = self._rng(f'popularity:{count}')
+        order = list(range(count))
+        rng.shuffle(order)
+        exponent = self.options['popularity_exponent']
+        cum_weights = list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+        return order, cum_weights
+
+    def _stage(self, label, func):
+        start = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(f'{label:<22} {count:>10,} filas  {elapsed:7.1f} s  ({rate:,.0f} filas/s)')
+        return count
+
+    def _placeholders(self):
+        """Pocas imágenes pequeñas compartidas por todas las filas (no una por registro)"""
+        paths = [f'{PLACEHOLDER_DIR}/placeholder_{i}.jpg' for i in range(PLACEHOLDER_COUNT)]
+        if self.options['no_files']:
+            return paths
+
+        from PIL import Image
+
+        rng = self._rng('placeholders')
+        for path in paths:
+            if default_storage.exists(path):
+                continue
+            buffer = io.BytesIO()
+            color = tuple(rng.randrange(256) for _ in range(3))
+            Image.new('RGB', (64, 64), color).save(buffer, format='JPEG', quality=60)
+            default_storage.save(path, ContentFile(buffer.getvalue()))
+        return paths
+
+    def _catalogs(self):
+        statuses = {status.key: status.id for status in SpotStatusReview.objects.all()}
+        missing = {key for key, _ in STATUS_WEIGHTS} - set(statuses)
+        if missing:
+            raise CommandError(f'Faltan estados de revisión: {", ".join(sorted(missing))}. Corre las migraciones.')
+
+        difficulties = [
+            Difficulty.objects.get_or_create(key=key, defaults={'name': name, 'hex_color': color})[0].id
+            for key, name, color in DIFFICULTIES
+        ]
+        travel_modes = [
+            (TravelMode.objects.get_or_create(key=key, defaults={'name': name})[0].id, step, median_km)
+            for key, name, step, median_km in TRAVEL_MODES
+        ]
+        return statuses, difficulties, travel_modes
+
+    #---------------------------------------- limpieza ----------------------------------------
+
+    def _clear(self):
+        """Borra con SQL directo (sin colectar en Python) en orden de dependencias"""
+        table = lambda model: connection.ops.quote_name(model._meta.db_table)
+        users = f"SELECT id FROM {table(User)} WHERE username LIKE %s"
+        spots = f"SELECT id FROM {table(Spot)} WHERE user_id IN ({users})"
+        routes = f"SELECT id FROM {table(Route)} WHERE user_id IN ({users}) OR spot_id IN ({spots})"
+
+        statements = [
+            (UserFavoriteRoute, f"user_id IN ({users}) OR route_id IN ({routes})", 3),
+            (RoutePhoto, f"user_id IN ({users}) OR route_id IN ({routes})", 3),
+            (UserFavoriteSpot, f"user_id IN ({users}) OR spot_id IN ({spots})", 2),
+            (SpotCaption, f"user_id IN ({users}) OR spot_id IN ({spots})", 2),
+            (Route, f"user_id IN ({users}) OR spot_id IN ({spots})", 2),
+            (Spot, f"user_id IN ({users})", 1),
+            (UserProfile, f"user_id IN ({users})", 1),
+            (User, f"id IN ({users})", 1),
+        ]
+
+        pattern = self.prefix.replace('_', '\\_') + '\\_%'
+        total = 0
+        with connection.cursor() as cursor:
+            for model, where, params in statements:
+                cursor.execute(f"DELETE FROM {table(model)} WHERE {where}", [pattern] * params)
+                total += cursor.rowcount
+        return total
+
+    #---------------------------------------- generadores ----------------------------------------
+
+    def _users(self, first_id, count):
+        rng = self._rng('users')
+        password = make_password(f'{self.prefix}-password')
+        for i in range(count):
+            joined = self._timestamp(rng)
+            username = f'{self.prefix}_{i}'
+            self.user_joined.append(joined)
+            yield (
+                first_id + i, password, None, False, username, '', '',
+                f'{username}@example.invalid', False, True, joined, 0,
+            )
+
+    def _profiles(self, first_user_id):
+        for i, joined in enumerate(self.user_joined):
+            yield (first_user_id + i, None, joined, joined)
+
+    def _spot_location(self, rng, cum_cluster_weights):
+        if rng.random() < RURAL_FRACTION:
+            lon_min, lat_min, lon_max, lat_max = MEXICO_BBOX
+            return rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)
+
+        _, lat, lon, _, spread_km = rng.choices(CLUSTERS, cum_weights=cum_cluster_weights)[0]
+        # Dispersión log-normal: la mayoría cerca del centro, algunos en las afueras
+        distance_m = rng.lognormvariate(math.log(spread_km * 1000 / 3), 0.8)
+        angle = rng.uniform(0, 2 * math.pi)
+        lat += distance_m * math.cos(angle) / METERS_PER_DEGREE
+        lon += distance_m * math.sin(angle) / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+        return lon, lat
+
+    def _spots(self, first_id, count, first_user_id, statuses, placeholders):
+        rng = self._rng('spots')
+        cum_cluster_weights = list(accumulate(cluster[3] for cluster in CLUSTERS))
+        creators, creator_weights = self._popularity(len(self.user_joined))
+        status_keys = [key for key, _ in STATUS_WEIGHTS]
+        status_weights = list(accumulate(weight for _, weight in STATUS_WEIGHTS))
+
+        for i in range(count):
+            user_index = creators[rng.choices(range(len(creators)), cum_weights=creator_weights)[0]]
+            created = self._timestamp(rng, after=self.user_joined[user_index])
+            lon, lat = self._spot_location(rng, cum_cluster_weights)
+            status = rng.choices(status_keys, cum_weights=status_weights)[0]
+            reviewed = status != 'PENDING'
+
+            self.spot_points.append((lon, lat))
+            self.spot_created.append(created)
+
+            yield (
+                first_id + i,
+                uuid.UUID(int=rng.getrandbits(128), version=4),
+                first_user_id + user_index,
+                f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}'[:50],
+                ' '.join(rng.sample(PHRASES, 2)),
+                rng.choice(placeholders),
+                _point_ewkt(lon, lat),
+                statuses[status],
+                'Información incompleta' if status == 'REJECTED' else None,
+                first_user_id + rng.randrange(len(self.user_joined)) if reviewed else None,
+                created + timedelta(hours=rng.uniform(1, 72)) if reviewed else None,
+                status == 'APPROVED',
+                created,
+                created,
+                None,
+            )
+
+    def _captions(self, count, first_spot_id, first_user_id, placeholders):
+        rng = self._rng('captions')
+        spots, spot_weights = self._popularity(len(self.spot_points))
+        users = len(self.user_joined)
+
+        for _ in range(count):
+            spot_index = spots[rng.choices(range(len(spots)), cum_weights=spot_weights)[0]]
+            created = self._timestamp(rng, after=self.spot_created[spot_index])
+            yield (
+                first_spot_id + spot_index,
+                first_user_id + rng.randrange(users),
+                rng.choice(PHRASES),
+                rng.choice(placeholders),
+                created, created, None, True,
+            )
+
+    def _routes(self, first_id, count, first_spot_id, first_user_id, difficulties, travel_modes, placeholders):
+        rng = self._rng('routes')
+        max_points = self.options['max_route_points']
+        photos_per_route = self.options['photos_per_route']
+        users = len(self.user_joined)
+
+        for i in range(count):
+            spot_index = rng.randrange(len(self.spot_points))
+            end_lon, end_lat = self.spot_points[spot_index]
+            mode_id, step_m, median_km = rng.choice(travel_modes)
+            length_m = rng.lognormvariate(math.log(median_km * 1000), 0.7)
+            points = generate_route_path(rng, end_lon, end_lat, length_m, step_m, max_points)
+            created = self._timestamp(rng, after=self.spot_created[spot_index])
+            user_id = first_user_id + rng.randrange(users)
+            route_id = first_id + i
+
+            # Fotos sobre vértices de la ruta; se cargan después de las rutas
+            for _ in range(int(rng.expovariate(1 / photos_per_route)) if photos_per_route else 0):
+                lon, lat = rng.choice(points)
+                self.route_photos.append((
+                    route_id, user_id, rng.choice(placeholders), _point_ewkt(lon, lat),
+                    created, created, None, True,
+                ))
+
+            yield (
+                route_id,
+                user_id,
+                first_spot_id + spot_index,
+                rng.choice(difficulties),
+                mode_id,
+                rng.choice(PHRASES),
+                mercator_length_km(points),
+                _linestring_ewkt(points),
+                created, created, None, True,
+            )
+
+    def _favorites(self, name, count, first_target_id, targets, first_user_id):
+        """Pares (usuario, objeto) únicos; la popularidad de los objetos sigue una ley de potencia"""
+        rng = self._rng(name)
+        order, cum_weights = self._popularity(targets)
+        users = len(self.user_joined)
+        seen = set()
+        attempts = 0
+
+        while len(seen) < count and attempts < count * 3:
+            attempts += 1
+            pair = (rng.randrange(users), order[rng.choices(range(targets), cum_weights=cum_weights)[0]])
+            if pair in seen:
+                continue
+            seen.add(pair)
+            created = self._timestamp(rng, after=self.user_joined[pair[0]])
+            yield (first_user_id + pair[0], first_target_id + pair[1], created, created, created, None, True)
+
+    #---------------------------------------- handle ----------------------------------------
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('seed_synthetic usa COPY y solo funciona con PostgreSQL/PostGIS')
+
+        self.options = options
+        self.seed = options['seed']
+        self.prefix = options['prefix']
+        self.user_joined = []
+        self.spot_points = []
+        self.spot_created = []
+        self.route_photos = []
+
+        n_users = options['users']
+        n_spots = options['spots']
+        n_routes = int(n_spots * options['routes_per_spot'])
+        n_captions = int(n_spots * options['captions_per_spot'])
+        if n_users < 1:
+            raise CommandError('--users debe ser al menos 1')
+
+        started = time.perf_counter()
+        placeholders = self._placeholders()
+
+        with transaction.atomic():
+            if options['clear']:
+                self._stage('borrado previo', self._clear)
+            elif User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+                raise CommandError(f'Ya existen usuarios "{self.prefix}_*". Usa --clear o --prefix.')
+
+            statuses, difficulties, travel_modes = self._catalogs()
+
+            first_user = reserve_ids(User, n_users)
+            self._stage('usuarios', lambda: copy_rows(User, [
+                'id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+                'email', 'is_staff', 'is_active', 'date_joined', 'auth_version',
+            ], self._users(first_user, n_users)))
+            self._stage('perfiles', lambda: copy_rows(UserProfile, [
+                'user', 'profile_thum_path', 'created_at', 'updated_at',
+            ], self._profiles(first_user)))
+
+            if n_spots:
+                first_spot = reserve_ids(Spot, n_spots)
+                self._stage('spots', lambda: copy_rows(Spot, [
+                    'id', 'storage_id', 'user', 'name', 'description', 'spot_thumbnail_path', 'location',
+                    'status', 'reject_reason', 'reviewed_user', 'reviewed_at', 'is_active',
+                    'created_at', 'updated_at', 'deleted_at',
+                ], self._spots(first_spot, n_spots, first_user, statuses, placeholders)))
+
+                self._stage('fotos de spots', lambda: copy_rows(SpotCaption, [
+                    'spot', 'user', 'description', 'img_path', 'created_at', 'updated_at', 'deleted_at', 'is_active',
+                ], self._captions(n_captions, first_spot, first_user, placeholders)))
+
+                self._stage('spots favoritos', lambda: copy_rows(UserFavoriteSpot, [
+                    'user', 'spot', 'created_at', 'updated_at', 'client_ts', 'deleted_at', 'is_active',
+                ], self._favorites('favorite_spots', int(n_users * options['favorites_per_user']),
+                                   first_spot, n_spots, first_user)))
+
+            if n_routes:
+                first_route = reserve_ids(Route, n_routes)
+                self._stage('rutas', lambda: copy_rows(Route, [
+                    'id', 'user', 'spot', 'difficulty', 'travel_mode', 'description', 'distance', 'path',
+                    'created_at', 'updated_at', 'deleted_at', 'is_active',
+                ], self._routes(first_route, n_routes, first_spot, first_user, difficulties, travel_modes, placeholders)))
+
+                self._stage('fotos de rutas', lambda: copy_rows(RoutePhoto, [
+                    'route', 'user', 'img_path', 'location', 'created_at', 'updated_at', 'deleted_at', 'is_active',
+                ], iter(self.route_photos)))
+
+                self._stage('rutas favoritas', lambda: copy_rows(UserFavoriteRoute, [
+                    'user', 'route', 'created_at', 'updated_at', 'client_ts', 'deleted_at', 'is_active',
+                ], self._favorites('favorite_routes', int(n_users * options['route_favorites_per_user']),
+                                   first_route, n_routes, first_user)))
+
+            # COPY no pasa por los modelos: los contadores de popularidad se calculan al final
+            self._stage('contadores', lambda: sum(PopularityCounterService.reconcile().values()))
+
+        # Estadísticas frescas para que el planner no trabaje con tablas "vacías"
+        with connection.cursor() as cursor:
+            for model in (User, UserProfile, Spot, SpotCaption, UserFavoriteSpot, Route, RoutePhoto, UserFavoriteRoute):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos sintéticos cargados en {time.perf_counter() - started:.1f} s (seed={self.seed}, prefijo={self.prefix})'
+        ))
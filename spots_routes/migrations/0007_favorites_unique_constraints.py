@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_favorite_spots(apps, schema_editor):
+    """
+    Antes no había restricción única en (user, spot) y los dobles taps dejaron duplicados.
+    Se conserva un registro por par: el activo más reciente (o el más reciente si ninguno lo está).
+    """
+    UserFavoriteSpot = apps.get_model('spots_routes', 'UserFavoriteSpot')
+    duplicates = (
+        UserFavoriteSpot.objects.values('user_id', 'spot_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for pair in duplicates.iterator():
+        ids = list(
+            UserFavoriteSpot.objects
+            .filter(user_id=pair['user_id'], spot_id=pair['spot_id'])
+            .order_by('-is_active', 'deleted_at', '-updated_at', '-id')
+            .values_list('id', flat=True)
+        )
+        UserFavoriteSpot.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0006_spot_storage_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_favorite_spots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userfavoritespot',
+            constraint=models.UniqueConstraint(fields=('user', 'spot'), name='unique_user_favorite_spot'),
+        ),
+        migrations.AddIndex(
+            model_name='userfavoritespot',
+            index=models.Index(fields=['user', 'is_active', '-created_at'], name='fav_spot_user_active_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='userfavoriteroute',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='userfavoriteroute',
+            constraint=models.UniqueConstraint(fields=('user', 'route'), name='unique_user_favorite_route'),
+        ),
+        migrations.RemoveIndex(
+            model_name='userfavoriteroute',
+            name='spots_route_user_id_60853a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='userfavoriteroute',
+            index=models.Index(fields=['user', 'is_active', '-created_at'], name='fav_route_user_active_idx'),
+        ),
+    ]
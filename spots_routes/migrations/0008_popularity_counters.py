@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+
+def counter_sql(parent, counter, child, fk):
+    """Llena el contador desde la tabla hija (solo registros activos y no eliminados)"""
+    return (
+        f"WITH real AS ("
+        f"SELECT p.id, count(c.id) AS n FROM spots_routes_{parent} p "
+        f"LEFT JOIN spots_routes_{child} c ON c.{fk}_id = p.id AND c.is_active AND c.deleted_at IS NULL "
+        f"GROUP BY p.id"
+        f") UPDATE spots_routes_{parent} p SET {counter} = real.n "
+        f"FROM real WHERE p.id = real.id AND p.{counter} <> real.n"
+    )
+
+
+def counter_field():
+    return models.PositiveIntegerField(db_default=0, default=0, editable=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0007_favorites_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(model_name='spot', name='favorites_count', field=counter_field()),
+        migrations.AddField(model_name='spot', name='routes_count', field=counter_field()),
+        migrations.AddField(model_name='spot', name='captions_count', field=counter_field()),
+        migrations.AddField(model_name='route', name='favorites_count', field=counter_field()),
+        migrations.AddField(model_name='route', name='photos_count', field=counter_field()),
+        migrations.RunSQL(
+            [
+                counter_sql('spot', 'favorites_count', 'userfavoritespot', 'spot'),
+                counter_sql('spot', 'routes_count', 'route', 'spot'),
+                counter_sql('spot', 'captions_count', 'spotcaption', 'spot'),
+                counter_sql('route', 'favorites_count', 'userfavoriteroute', 'route'),
+                counter_sql('route', 'photos_count', 'routephoto', 'route'),
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='spot',
+            index=models.Index(fields=['is_active', 'status', '-favorites_count'], name='spot_active_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['spot', '-favorites_count'], name='route_spot_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['is_active', '-favorites_count'], name='route_active_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models.functions import Cast, Upper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0008_popularity_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='spot',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(Upper(Cast('name', models.TextField())), name='gin_trgm_ops'),
+                name='spot_name_trgm_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='spot',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(Upper('description'), name='gin_trgm_ops'),
+                name='spot_description_trgm_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0009_spot_search_trgm_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spot',
+            name='review_claimed_by',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='spots_claimed', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='spot',
+            name='review_claimed_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0010_spot_review_claim'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='spot',
+            index=models.Index(fields=['updated_at', 'id'], name='spot_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spotcaption',
+            index=models.Index(fields=['updated_at', 'id'], name='spotcaption_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfavoritespot',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='fav_spot_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['updated_at', 'id'], name='route_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='routephoto',
+            index=models.Index(fields=['updated_at', 'id'], name='routephoto_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfavoriteroute',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='fav_route_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import core.utils.upload_image
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0011_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionPack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('slug', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('bbox', django.contrib.gis.db.models.fields.PolygonField(srid=4326)),
+                ('version', models.PositiveIntegerField(default=0, editable=False)),
+                ('file', models.FileField(blank=True, editable=False, upload_to=core.utils.upload_image.upload_region_pack)),
+                ('previous_file', models.FileField(blank=True, editable=False, upload_to=core.utils.upload_image.upload_region_pack)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('sha256', models.CharField(blank=True, editable=False, max_length=64)),
+                ('content_fingerprint', models.CharField(blank=True, editable=False, max_length=64)),
+                ('spots_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('routes_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('built_at', models.DateTimeField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots_routes', '0012_regionpack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userfavoritespot',
+            name='client_ts',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AddField(
+            model_name='userfavoriteroute',
+            name='client_ts',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        # Hasta ahora el last-write-wins comparaba updated_at: ese es el client_ts de lo existente
+        migrations.RunSQL(
+            'UPDATE "spots_routes_userfavoritespot" SET "client_ts" = "updated_at"',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'UPDATE "spots_routes_userfavoriteroute" SET "client_ts" = "updated_at"',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -2,19 +2,107 @@ import os
 import uuid
 from django.conf import settings
 from django.contrib.gis.db import models
-from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
 from django.core.validators import FileExtensionValidator
+from django.db import transaction
+from django.db.models import F, TextField
+from django.db.models.functions import Cast, Greatest, Now, Upper
 
 from core.models import BaseModel
 from core.utils.upload_image import (
     upload_route_photo,
     upload_spot_photo,
+    upload_region_pack,
     upload_spot_thumbnail,
 )
 
 # from django.contrib.auth import get_user_model
 # User = get_user_model()
 User = settings.AUTH_USER_MODEL
+
+
+def counter_field():
+    """Contador desnormalizado; db_default para que las cargas por COPY no lo tengan que enviar"""
+    return models.PositiveIntegerField(default=0, db_default=0, editable=False)
+
+
+class CounterFieldsMixin:
+    """
+    Un save() completo de una instancia ya cargada no reescribe sus contadores (counter_fields):
+    solo los cambian los UPDATE con F() y la reconciliación, así no se pierden incrementos
+    hechos mientras la instancia estaba en memoria.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class PopularityCounterMixin:
+    """
+    Mantiene el contador del padre (counter_parent = (campo FK, campo contador)) con F() en la
+    misma transacción que el save/delete del hijo. Cuenta los registros activos y no eliminados;
+    lo que se escriba con queryset.update() lo corrige el job de reconciliación.
+    """
+    counter_parent = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'is_active' in field_names and 'deleted_at' in field_names:
+            instance._counted = instance._is_counted()
+        return instance
+
+    def _is_counted(self):
+        return self.is_active and self.deleted_at is None
+
+    def _was_counted(self):
+        if self._state.adding:
+            return False
+        if not hasattr(self, '_counted'):
+            # Cargado con only()/defer(): se consulta el estado guardado
+            self._counted = type(self).all_objects.filter(
+                pk=self.pk, is_active=True, deleted_at__isnull=True
+            ).exists()
+        return self._counted
+
+    def _bump_parent(self, delta, using=None):
+        fk, counter = self.counter_parent
+        parent_model = self._meta.get_field(fk).related_model
+        # Greatest: si el contador ya venía desfasado no se viola el CHECK >= 0
+        parent_model.all_objects.using(using).filter(pk=getattr(self, f'{fk}_id')).update(
+            **{counter: Greatest(F(counter) + delta, 0)}
+        )
+
+    def save(self, *args, **kwargs):
+        was_counted = self._was_counted()
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            delta = int(self._is_counted()) - int(was_counted)
+            if delta:
+                self._bump_parent(delta, kwargs.get('using'))
+        self._counted = self._is_counted()
+
+    def hard_delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            if self._was_counted():
+                self._bump_parent(-1, using)
+            return super().hard_delete(using=using, keep_parents=keep_parents)
+
+    def delete(self, using=None, keep_parents=False, hard=False):
+        if hard:
+            return self.hard_delete(using=using, keep_parents=keep_parents)
+        return super().delete(using=using, keep_parents=keep_parents)
+
+
 #----------------------------------- SPOTS --------------------------------------------
 
 class SpotStatusReview(models.Model):
@@ -25,19 +113,28 @@ class SpotStatusReview(models.Model):
     def __str__(self):
         return f"{self.key} - {self.name}"
 
+_status_ids = {}
+
+def get_status_id(key):
+    """Id del estado por key. Los estados son fijos (migración 0003): se cachean por proceso"""
+    if key not in _status_ids:
+        _status_ids[key] = SpotStatusReview.objects.values_list('id', flat=True).get(key=key)
+    return _status_ids[key]
+
 def get_default_pending():
     """Obtener estado pendiente para utuilizarlo como default en el modelo de spot"""
-    return SpotStatusReview.objects.get(key='PENDING').id
+    return get_status_id('PENDING')
 
 def get_approved():
     """Obtener estado aprovado"""
-    return SpotStatusReview.objects.get(key='APPROVED').id
+    return get_status_id('APPROVED')
 
 def get_rejected():
     """Obtener estado rechazado"""
-    return SpotStatusReview.objects.get(key='REJECTED').id
+    return get_status_id('REJECTED')
 
-class Spot(BaseModel):
+class Spot(CounterFieldsMixin, BaseModel):
+    counter_fields = ('favorites_count', 'routes_count', 'captions_count')
     storage_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='spots_created')
     name = models.CharField(max_length=50)
@@ -57,7 +154,14 @@ class Spot(BaseModel):
     reject_reason = models.TextField(null=True, blank=True)
     reviewed_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='spots_reviewed', blank=True, null=True)
     reviewed_at = models.DateTimeField(null=True, blank=True)
+    # Reserva de la cola de moderación (ver SpotModerationService)
+    review_claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='spots_claimed', blank=True, null=True, editable=False)
+    review_claimed_until = models.DateTimeField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=False)
+    # Contadores desnormalizados (ver PopularityCounterMixin y FavoritesService)
+    favorites_count = counter_field()
+    routes_count = counter_field()
+    captions_count = counter_field()
     
     class Meta:
         indexes = [
@@ -65,12 +169,20 @@ class Spot(BaseModel):
             models.Index(fields=['user', '-created_at']),    
             models.Index(fields=['is_active', 'status']),    
             GistIndex(fields=["location"]),
+            # Listado público ordenado por popularidad
+            models.Index(fields=['is_active', 'status', '-favorites_count'], name='spot_active_popular_idx'),
+            # Búsqueda del admin (icontains = UPPER(col::text) LIKE UPPER('%...%'))
+            GinIndex(OpClass(Upper(Cast('name', TextField())), name='gin_trgm_ops'), name='spot_name_trgm_idx'),
+            GinIndex(OpClass(Upper('description'), name='gin_trgm_ops'), name='spot_description_trgm_idx'),
+            # Cursor (updated_at, id) de la sincronización incremental (DeltaSyncService)
+            models.Index(fields=['updated_at', 'id'], name='spot_sync_idx'),
     ]
     
     def __str__(self):
         return f"{self.name}"
     
-class SpotCaption(BaseModel):
+class SpotCaption(PopularityCounterMixin, BaseModel):
+    counter_parent = ('spot', 'captions_count')
     spot = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='captions')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='captions_made')
     description = models.TextField(blank=True, null=True)
@@ -87,6 +199,7 @@ class SpotCaption(BaseModel):
         indexes = [
             models.Index(fields=['spot', '-created_at']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['updated_at', 'id'], name='spotcaption_sync_idx'),
         ]
     
     def __str__(self):
@@ -105,7 +218,21 @@ class SpotCaption(BaseModel):
 class UserFavoriteSpot(BaseModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorite_spots')
     spot = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='favorited_by')
+    # Momento de la operación en el dispositivo: last-write-wins de FavoritesService.sync.
+    # updated_at siempre es hora del servidor (cursor de DeltaSyncService)
+    client_ts = models.DateTimeField(db_default=Now(), editable=False)
 
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Destino del INSERT ... ON CONFLICT de FavoritesService
+            models.UniqueConstraint(fields=['user', 'spot'], name='unique_user_favorite_spot'),
+        ]
+        indexes = [
+            # Listado de favoritos del usuario (activos, más recientes primero)
+            models.Index(fields=['user', 'is_active', '-created_at'], name='fav_spot_user_active_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='fav_spot_sync_idx'),
+        ]
     
     def __str__(self):
         return f"favorite spot:{self.spot} user: {self.user}"
@@ -130,7 +257,9 @@ class TravelMode(models.Model):
     def __str__(self):
         return f"{self.name}"
     
-class Route(BaseModel):
+class Route(PopularityCounterMixin, CounterFieldsMixin, BaseModel):
+    counter_parent = ('spot', 'routes_count')
+    counter_fields = ('favorites_count', 'photos_count')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='routes_created')
     spot = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='routes')
     difficulty = models.ForeignKey(Difficulty, on_delete=models.CASCADE, related_name='routes_with_dificulty')
@@ -138,12 +267,17 @@ class Route(BaseModel):
     description = models.TextField(blank=True, null=True)
     distance = models.DecimalField(max_digits=10, decimal_places=2, editable=False) 
     path = models.LineStringField(geography=True)
+    favorites_count = counter_field()
+    photos_count = counter_field()
     class Meta:
         indexes = [
             models.Index(fields=['spot', '-created_at']),     
             models.Index(fields=['user', '-created_at']),     
             models.Index(fields=['difficulty']),              
             models.Index(fields=['travel_mode']),             
+            models.Index(fields=['spot', '-favorites_count'], name='route_spot_popular_idx'),
+            models.Index(fields=['is_active', '-favorites_count'], name='route_active_popular_idx'),
+            models.Index(fields=['updated_at', 'id'], name='route_sync_idx'),
         ]
     
     def __str__(self):
@@ -163,7 +297,8 @@ class Route(BaseModel):
 
         super().save(*args, **kwargs)
  
-class RoutePhoto(BaseModel):
+class RoutePhoto(PopularityCounterMixin, BaseModel):
+    counter_parent = ('route', 'photos_count')
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name='photo')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='photo_by')
     img_path = models.ImageField(
@@ -180,6 +315,7 @@ class RoutePhoto(BaseModel):
         indexes = [
             models.Index(fields=['route', '-created_at']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['updated_at', 'id'], name='routephoto_sync_idx'),
         ]
     def __str__(self):
         return f"photo id: {self.pk} - ruta: {self.route}"
@@ -197,13 +333,48 @@ class RoutePhoto(BaseModel):
 class UserFavoriteRoute(BaseModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorite_routes')
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name='favorites')
+    # Ver UserFavoriteSpot.client_ts
+    client_ts = models.DateTimeField(db_default=Now(), editable=False)
 
     
     class Meta:
-        unique_together = ('user', 'route')  
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'route'], name='unique_user_favorite_route'),
+        ]
         indexes = [
-            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'is_active', '-created_at'], name='fav_route_user_active_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='fav_route_sync_idx'),
         ]
         
     def __str__(self):
-        return f"favorite route: {self.pk} - route: {self.route}"
\ No newline at end of file
+        return f"favorite route: {self.pk} - route: {self.route}"
+
+
+#----------------------- PAQUETES OFFLINE POR REGIÓN -------------------------------------
+
+class RegionPack(BaseModel):
+    """
+    Paquete descargable (SQLite comprimido) con los spots y rutas de una región para usar la
+    app sin señal. Lo construye RegionPackBuilder en segundo plano y se sirve como archivo
+    estático desde el storage (CDN, con soporte de Range para descargas reanudables).
+    """
+    slug = models.SlugField(max_length=50, unique=True)
+    name = models.CharField(max_length=100)
+    bbox = models.PolygonField(srid=4326)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    file = models.FileField(upload_to=upload_region_pack, blank=True, editable=False)
+    # Versión anterior: se conserva un ciclo para no cortar descargas en curso
+    previous_file = models.FileField(upload_to=upload_region_pack, blank=True, editable=False)
+    size_bytes = models.PositiveBigIntegerField(default=0, editable=False)
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Huella del contenido de la región con la que se construyó (ver RegionPackBuilder.fingerprint)
+    content_fingerprint = models.CharField(max_length=64, blank=True, editable=False)
+    spots_count = models.PositiveIntegerField(default=0, editable=False)
+    routes_count = models.PositiveIntegerField(default=0, editable=False)
+    built_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} (v{self.version})"
@@ -0,0 +1,336 @@
+"""
+Paquetes offline por región (RegionPack).
+
+Cada paquete es una base SQLite comprimida con gzip (RegionPacks/{slug}/v{versión}-{sha}.sqlite.gz)
+que la app descarga completa desde el storage (CDN, reanudable con Range) y consulta localmente:
+
+- manifest(key, value): esquema, región, versión, bbox y fecha de construcción
+- spots(id, name, description, lon, lat, thumbnail, favorites_count, routes_count, updated_at)
+- routes(id, spot_id, user_id, difficulty_id, travel_mode_id, description, distance_km, path, updated_at)
+  path es JSON [[lon, lat], ...] simplificado en la BD (ST_SimplifyPreserveTopology)
+- thumbnails(spot_id, size, source, mime, width, height, data): variantes WEBP de la miniatura
+
+Reconstrucción incremental: rebuild_stale() solo reconstruye los paquetes cuya huella de
+contenido cambió, y las miniaturas cuyo archivo original no cambió se copian del paquete
+anterior (ATTACH) en lugar de volver a descargarlas y redimensionarlas.
+"""
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.contrib.gis.db.models import LineStringField
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Count, Func, Max, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from spots_routes.models import RegionPack, Route, Spot, get_approved
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+# Espacio de nombres de pg_try_advisory_lock(namespace, pack_id)
+LOCK_NAMESPACE = 4701
+
+SCHEMA = """
+CREATE TABLE manifest (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE spots (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT, lon REAL NOT NULL, lat REAL NOT NULL,
+    thumbnail TEXT, favorites_count INTEGER NOT NULL, routes_count INTEGER NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE routes (
+    id INTEGER PRIMARY KEY, spot_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+    difficulty_id INTEGER, travel_mode_id INTEGER, description TEXT, distance_km REAL NOT NULL,
+    path TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE INDEX routes_spot_idx ON routes (spot_id);
+CREATE TABLE thumbnails (
+    spot_id INTEGER NOT NULL, size INTEGER NOT NULL, source TEXT NOT NULL, mime TEXT NOT NULL,
+    width INTEGER NOT NULL, height INTEGER NOT NULL, data BLOB NOT NULL,
+    PRIMARY KEY (spot_id, size)
+);
+"""
+
+
+class SimplifiedPath(Func):
+    """ST_SimplifyPreserveTopology del path (geography) con tolerancia en grados"""
+    function = 'ST_SimplifyPreserveTopology'
+    template = '%(function)s(%(expressions)s::geometry, %(tolerance)s)'
+    output_field = LineStringField(srid=4326)
+
+    def __init__(self, expression, tolerance, **extra):
+        super().__init__(expression, tolerance=float(tolerance), **extra)
+
+
+@contextlib.contextmanager
+def pack_lock(pack):
+    """
+    Candado de sesión por paquete (sin transacción abierta mientras se construye, para no
+    frenar la marca segura de DeltaSyncService). Regresa False si otro proceso lo tiene.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [LOCK_NAMESPACE, pack.pk])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [LOCK_NAMESPACE, pack.pk])
+
+
+class RegionPackBuilder:
+    BUILT = 'built'
+    UNCHANGED = 'unchanged'
+    LOCKED = 'locked'
+
+    def __init__(self, pack):
+        self.pack = pack
+        self.approved_id = get_approved()
+
+    #------------------------------------ contenido -----------------------------------------
+
+    def _visible_spot_q(self, prefix=''):
+        return Q(**{
+            f'{prefix}is_active': True,
+            f'{prefix}deleted_at__isnull': True,
+            f'{prefix}status_id': self.approved_id,
+        })
+
+    def spots(self):
+        return Spot.objects.filter(
+            self._visible_spot_q(), location__intersects=self.pack.bbox,
+        ).order_by('id')
+
+    def routes(self):
+        return (
+            Route.objects.filter(
+                self._visible_spot_q('spot__'), spot__location__intersects=self.pack.bbox,
+            )
+            .defer('path')
+            .annotate(simple_path=SimplifiedPath('path', settings.REGION_PACK_SIMPLIFY_TOLERANCE))
+            .order_by('id')
+        )
+
+    def fingerprint(self):
+        """
+        Huella barata del contenido: último updated_at y visibles de spots y rutas de la región
+        (las bajas también cuentan: cambian updated_at de la fila). Incluye los parámetros de
+        construcción para que cambiarlos fuerce la reconstrucción.
+        """
+        spots = Spot.all_objects.filter(location__intersects=self.pack.bbox).aggregate(
+            last=Max('updated_at'), visible=Count('id', filter=self._visible_spot_q()),
+        )
+        routes = Route.all_objects.filter(spot__location__intersects=self.pack.bbox).aggregate(
+            last=Max('updated_at'),
+            visible=Count('id', filter=Q(is_active=True, deleted_at__isnull=True) & self._visible_spot_q('spot__')),
+        )
+        raw = json.dumps([
+            SCHEMA_VERSION, self.pack.bbox.wkt,
+            settings.REGION_PACK_SIMPLIFY_TOLERANCE, settings.REGION_PACK_THUMBNAIL_SIZES,
+            spots['last'] and spots['last'].isoformat(), spots['visible'],
+            routes['last'] and routes['last'].isoformat(), routes['visible'],
+        ])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    #------------------------------------- SQLite -------------------------------------------
+
+    def _write_content(self, db):
+        spots = [
+            (
+                spot.id, spot.name, spot.description, round(spot.location.x, 6), round(spot.location.y, 6),
+                spot.spot_thumbnail_path.name or None, spot.favorites_count, spot.routes_count,
+                spot.updated_at.isoformat(),
+            )
+            for spot in self.spots().iterator(chunk_size=2000)
+        ]
+        db.executemany('INSERT INTO spots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', spots)
+
+        routes = 0
+        for route in self.routes().iterator(chunk_size=2000):
+            path = [[round(lon, 6), round(lat, 6)] for lon, lat in route.simple_path.coords]
+            db.execute('INSERT INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                route.id, route.spot_id, route.user_id, route.difficulty_id, route.travel_mode_id,
+                route.description, float(route.distance), json.dumps(path, separators=(',', ':')),
+                route.updated_at.isoformat(),
+            ))
+            routes += 1
+
+        return len(spots), routes
+
+    def _reuse_thumbnails(self, db, workdir):
+        """Copia del paquete anterior las variantes cuyo archivo original no cambió"""
+        if not self.pack.file:
+            return 0
+
+        previous_path = os.path.join(workdir, 'previous.sqlite')
+        try:
+            with self.pack.file.open('rb') as packed, gzip.GzipFile(fileobj=packed) as source, \
+                    open(previous_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+        except (OSError, EOFError):
+            logger.warning(f'No se pudo leer el paquete anterior de {self.pack.slug}; se regeneran las miniaturas')
+            return 0
+
+        db.execute('ATTACH DATABASE ? AS prev', (previous_path,))
+        try:
+            schema = db.execute("SELECT value FROM prev.manifest WHERE key = 'schema_version'").fetchone()
+            if schema is None or int(schema[0]) != SCHEMA_VERSION:
+                return 0
+            sizes = settings.REGION_PACK_THUMBNAIL_SIZES
+            cursor = db.execute(
+                'INSERT INTO thumbnails SELECT t.* FROM prev.thumbnails t '
+                'JOIN spots s ON s.id = t.spot_id AND s.thumbnail = t.source '
+                f'WHERE t.size IN ({", ".join("?" * len(sizes))})',
+                sizes,
+            )
+            return cursor.rowcount
+        except sqlite3.DatabaseError:
+            return 0
+        finally:
+            db.commit()
+            db.execute('DETACH DATABASE prev')
+
+    @staticmethod
+    def _variants(storage, name, sizes):
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            image.load()
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for size in sizes:
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            output = io.BytesIO()
+            variant.save(output, 'WEBP', quality=settings.REGION_PACK_THUMBNAIL_QUALITY)
+            yield size, variant.width, variant.height, output.getvalue()
+
+    def _write_thumbnails(self, db):
+        """Genera las variantes de los spots que no se pudieron reutilizar"""
+        missing = db.execute(
+            'SELECT s.id, s.thumbnail FROM spots s WHERE s.thumbnail IS NOT NULL '
+            'AND NOT EXISTS (SELECT 1 FROM thumbnails t WHERE t.spot_id = s.id)'
+        ).fetchall()
+        if not missing:
+            return 0
+
+        storage = Spot._meta.get_field('spot_thumbnail_path').storage
+        generated = 0
+        for spot_id, name in missing:
+            try:
+                for size, width, height, data in self._variants(storage, name, settings.REGION_PACK_THUMBNAIL_SIZES):
+                    db.execute(
+                        'INSERT INTO thumbnails VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (spot_id, size, name, 'image/webp', width, height, data),
+                    )
+                generated += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f'Miniatura omitida en {self.pack.slug} (spot {spot_id}): {e}')
+        return generated
+
+    def _write_manifest(self, db, version, built_at, spots, routes):
+        xmin, ymin, xmax, ymax = self.pack.bbox.extent
+        db.executemany('INSERT INTO manifest VALUES (?, ?)', [
+            ('schema_version', str(SCHEMA_VERSION)),
+            ('slug', self.pack.slug),
+            ('name', self.pack.name),
+            ('version', str(version)),
+            ('bbox', json.dumps([xmin, ymin, xmax, ymax])),
+            ('built_at', built_at.isoformat()),
+            ('spots', str(spots)),
+            ('routes', str(routes)),
+            ('thumbnail_sizes', json.dumps(settings.REGION_PACK_THUMBNAIL_SIZES)),
+        ])
+
+    #------------------------------------ construcción --------------------------------------
+
+    def build(self, force=False):
+        """Construye y publica una versión nueva si el contenido cambió (o con force)"""
+        with pack_lock(self.pack) as acquired:
+            if not acquired:
+                return self.LOCKED
+
+            self.pack.refresh_from_db()
+            fingerprint = self.fingerprint()
+            if not force and self.pack.file and self.pack.content_fingerprint == fingerprint:
+                return self.UNCHANGED
+
+            with tempfile.TemporaryDirectory(prefix='region-pack-') as workdir:
+                db_path = os.path.join(workdir, 'pack.sqlite')
+                version = self.pack.version + 1
+                built_at = timezone.now()
+
+                db = sqlite3.connect(db_path)
+                try:
+                    db.executescript(SCHEMA)
+                    spots, routes = self._write_content(db)
+                    db.commit()
+                    reused = self._reuse_thumbnails(db, workdir)
+                    generated = self._write_thumbnails(db)
+                    self._write_manifest(db, version, built_at, spots, routes)
+                    db.commit()
+                    db.execute('VACUUM')
+                finally:
+                    db.close()
+
+                packed_path = f'{db_path}.gz'
+                with open(db_path, 'rb') as source, gzip.open(packed_path, 'wb', compresslevel=9) as target:
+                    shutil.copyfileobj(source, target)
+                sha256 = self._sha256(packed_path)
+
+                stale = self.pack.previous_file.name
+                self.pack.previous_file.name = self.pack.file.name
+                with open(packed_path, 'rb') as packed:
+                    self.pack.file.save(f'v{version}-{sha256[:12]}.sqlite.gz', File(packed), save=False)
+
+            self.pack.version = version
+            self.pack.size_bytes = self.pack.file.size
+            self.pack.sha256 = sha256
+            self.pack.content_fingerprint = fingerprint
+            self.pack.spots_count = spots
+            self.pack.routes_count = routes
+            self.pack.built_at = built_at
+            with transaction.atomic():
+                self.pack.save()
+                if stale:
+                    storage = self.pack.file.storage
+                    transaction.on_commit(lambda: storage.delete(stale))
+
+        logger.info(
+            f'Paquete {self.pack.slug} v{version}: {spots} spots, {routes} rutas, '
+            f'{reused} miniaturas reutilizadas, {generated} generadas, {self.pack.size_bytes} bytes'
+        )
+        return self.BUILT
+
+    @staticmethod
+    def _sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as packed:
+            for chunk in iter(lambda: packed.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def rebuild_stale(cls, slugs=None, force=False):
+        """Reconstruye los paquetes activos desactualizados; regresa {slug: resultado}"""
+        packs = RegionPack.objects.all()
+        if slugs:
+            packs = packs.filter(slug__in=slugs)
+
+        results = {}
+        for pack in packs:
+            try:
+                results[pack.slug] = cls(pack).build(force=force)
+            except Exception:
+                logger.exception(f'Error construyendo el paquete {pack.slug}')
+                results[pack.slug] = 'error'
+        return results
@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch
 from rest_framework import serializers
-from spots_routes.models import Difficulty, Route, RoutePhoto, Spot, SpotCaption, TravelMode, UserFavoriteRoute, UserFavoriteSpot
+from spots_routes.models import Difficulty, RegionPack, Route, RoutePhoto, Spot, SpotCaption, TravelMode, UserFavoriteRoute, UserFavoriteSpot
 from rest_framework_gis.fields import GeometryField
+from spots_routes.region_packs import SCHEMA_VERSION
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
@@ -49,6 +52,9 @@ class SpotSerializer(serializers.ModelSerializer):
             'location',
             'user_name',
             'created_at',
+            'favorites_count',
+            'routes_count',
+            'captions_count',
             
             # Campos de estado (solo para admins)
             'status_name', 
@@ -65,7 +71,21 @@ class SpotSerializer(serializers.ModelSerializer):
         
         read_only_fields = ['user', 'created_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset, user=None):
+        """Carga en bloque todo lo que lee el serializer (autor, estado, captions y favorito)"""
+        queryset = queryset.select_related('user', 'status').prefetch_related(
+            Prefetch('captions', queryset=SpotCaption.objects.select_related('user'))
+        )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(is_favorite_for_user=Exists(
+                UserFavoriteSpot.objects.filter(user=user, spot=OuterRef('pk'), is_active=True)
+            ))
+        return queryset
+
     def get_is_favorite(self, obj) -> bool:
+        if hasattr(obj, 'is_favorite_for_user'):
+            return obj.is_favorite_for_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return UserFavoriteSpot.objects.filter(
@@ -101,6 +121,35 @@ class SpotUpdateSerializer(serializers.ModelSerializer):
         model = Spot
         fields = [ 'name', 'description', 'spot_thumbnail_path', 'location',]
         
+class SpotModerationClaimSerializer(serializers.Serializer):
+    lease_expires_at = serializers.DateTimeField(help_text="Los spots vuelven a la cola después de esta fecha")
+    results = SpotSerializer(many=True)
+
+
+class SpotModerationDecisionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.MODERATION_DECISION_MAX,
+    )
+    reason = serializers.CharField(required=False, allow_blank=False, help_text="Obligatoria al rechazar")
+
+    def validate(self, attrs):
+        if attrs['action'] == 'reject' and not attrs.get('reason'):
+            raise serializers.ValidationError({'reason': 'Se requiere una razón para rechazar'})
+        return attrs
+
+
+class SpotModerationResultSerializer(serializers.Serializer):
+    action = serializers.CharField()
+    updated = serializers.ListField(child=serializers.IntegerField())
+    skipped = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Eliminados, inexistentes o reservados por otro revisor",
+    )
+
+
 class UserFavoriteSpotSerializer(serializers.ModelSerializer):
     spot = SpotSerializer(read_only=True)
     
@@ -150,11 +199,28 @@ class RouteSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'user_name', 'difficulty', 'difficulty_name',
             'travel_mode', 'travel_mode_name', 'description', 
-            'path', 'route_photos', 'is_favorite', 'created_at'
+            'path', 'route_photos', 'is_favorite', 'created_at',
+            'favorites_count', 'photos_count',
         ]
         read_only_fields = ['id', 'user', 'created_at', 'distance','spot', 'is_active']
     
+    @staticmethod
+    def setup_eager_loading(queryset, user=None, photos=True):
+        """Carga en bloque autor, catálogos, fotos (opcional) y favorito del usuario"""
+        queryset = queryset.select_related('user', 'difficulty', 'travel_mode', 'spot')
+        if photos:
+            queryset = queryset.prefetch_related(
+                Prefetch('photo', queryset=RoutePhoto.objects.select_related('user'))
+            )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(is_favorite_for_user=Exists(
+                UserFavoriteRoute.objects.filter(user=user, route=OuterRef('pk'), is_active=True)
+            ))
+        return queryset
+
     def get_is_favorite(self, obj) -> bool:
+        if hasattr(obj, 'is_favorite_for_user'):
+            return obj.is_favorite_for_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return UserFavoriteRoute.objects.filter(
@@ -170,3 +236,95 @@ class UserFavoriteRouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserFavoriteRoute
         fields = ['id', 'route', 'created_at', 'is_active']
+
+
+#=================================== FAVORITOS (SYNC) ===============================================
+
+class FavoriteOperationSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['spot', 'route'])
+    id = serializers.IntegerField(min_value=1)
+    state = serializers.BooleanField(help_text="true = en favoritos, false = quitado")
+    client_ts = serializers.DateTimeField(help_text="Momento del tap en el dispositivo")
+
+
+class FavoritesSyncSerializer(serializers.Serializer):
+    operations = FavoriteOperationSerializer(
+        many=True,
+        max_length=settings.FAVORITES_SYNC_MAX_OPERATIONS,
+    )
+
+
+class FavoritesSyncResultSerializer(serializers.Serializer):
+    spots = serializers.ListField(child=serializers.IntegerField())
+    routes = serializers.ListField(child=serializers.IntegerField())
+    synced_at = serializers.DateTimeField()
+
+
+#=================================== SINCRONIZACIÓN ================================================
+
+class SyncCollectionSerializer(serializers.Serializer):
+    upserted = serializers.ListField(child=serializers.JSONField(), help_text="Filas nuevas o modificadas")
+    deleted = serializers.ListField(child=serializers.IntegerField(), help_text="Lápidas: ids que ya no son visibles")
+
+
+class DeltaSyncSerializer(serializers.Serializer):
+    sync_token = serializers.CharField(help_text="Se manda en el siguiente sync")
+    has_more = serializers.BooleanField(help_text="Repetir de inmediato con el token nuevo")
+    spots = SyncCollectionSerializer()
+    routes = SyncCollectionSerializer()
+    captions = SyncCollectionSerializer()
+    photos = SyncCollectionSerializer()
+    favorite_spots = SyncCollectionSerializer()
+    favorite_routes = SyncCollectionSerializer()
+
+
+#=================================== PAQUETES OFFLINE ==============================================
+
+class RegionPackSerializer(serializers.ModelSerializer):
+    """Manifiesto del paquete: la app compara version/sha256 y descarga `url` si cambió"""
+    bbox = GeometryField()
+    url = serializers.SerializerMethodField()
+    format = serializers.SerializerMethodField()
+    schema_version = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RegionPack
+        fields = [
+            'slug', 'name', 'bbox', 'version', 'url', 'format', 'schema_version',
+            'size_bytes', 'sha256', 'spots_count', 'routes_count', 'built_at',
+        ]
+
+    def get_url(self, obj):
+        request = self.context.get('request')
+        url = obj.file.url
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_format(self, obj):
+        return 'sqlite+gzip'
+
+    def get_schema_version(self, obj):
+        return SCHEMA_VERSION
+
+
+#=================================== CORREDOR DE RUTAS =============================================
+
+class AlongRouteMixin(serializers.Serializer):
+    position = serializers.FloatField(read_only=True, help_text="Fracción de la ruta (0 = inicio, 1 = fin)")
+    distance_along_km = serializers.FloatField(read_only=True, help_text="Kilómetros desde el inicio de la ruta")
+    offset_m = serializers.FloatField(read_only=True, help_text="Metros entre el punto y la ruta")
+
+
+class SpotAlongRouteSerializer(AlongRouteMixin, serializers.ModelSerializer):
+    location = GeometryField()
+
+    class Meta:
+        model = Spot
+        fields = [
+            'id', 'name', 'spot_thumbnail_path', 'location', 'favorites_count',
+            'position', 'distance_along_km', 'offset_m',
+        ]
+
+
+class RoutePhotoAlongRouteSerializer(AlongRouteMixin, RoutePhotoSerializer):
+    class Meta(RoutePhotoSerializer.Meta):
+        fields = RoutePhotoSerializer.Meta.fields + ['position', 'distance_along_km', 'offset_m']
@@ -0,0 +1,599 @@
+"""
+Servicios de lógica de negocio para spots y rutas.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BooleanField, F, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from spots_routes.geo import GeographyDistance, LineLocatePoint, within_distance
+from spots_routes.models import (
+    Route, RoutePhoto, Spot, SpotCaption, UserFavoriteRoute, UserFavoriteSpot,
+    get_approved, get_default_pending, get_rejected,
+)
+
+
+class FavoritesService:
+    """
+    Favoritos de spots y rutas con una sola sentencia por operación.
+
+    Agregar es un INSERT ... ON CONFLICT DO UPDATE sobre la restricción única (user, objeto):
+    crea el favorito, reactiva uno dado de baja o no hace nada si ya estaba activo, sin
+    duplicados aunque lleguen dos taps a la vez. Quitar es un UPDATE condicionado.
+    En la misma sentencia (CTE) se ajusta favorites_count del spot o la ruta.
+    """
+    ADDED = 'added'
+    REACTIVATED = 'reactivated'
+    ALREADY_ACTIVE = 'already_active'
+
+    _TARGET_FIELDS = {
+        UserFavoriteSpot: 'spot',
+        UserFavoriteRoute: 'route',
+    }
+
+    @classmethod
+    def _names(cls, model):
+        """Tabla, columnas user/objeto y tabla del objeto, ya entrecomilladas"""
+        quote = connection.ops.quote_name
+        target_field = model._meta.get_field(cls._TARGET_FIELDS[model])
+        return (
+            quote(model._meta.db_table),
+            quote(model._meta.get_field('user').column),
+            quote(target_field.column),
+            quote(target_field.related_model._meta.db_table),
+        )
+
+    @classmethod
+    def _upsert_sql(cls, model):
+        table, user, target, target_table = cls._names(model)
+
+        # El WHERE del DO UPDATE deja fuera a los que ya están activos: sin fila en RETURNING
+        # y sin incremento. xmax = 0 solo en filas recién insertadas.
+        return (
+            f"WITH fav AS ("
+            f"INSERT INTO {table} ({user}, {target}, is_active, deleted_at, created_at, updated_at, client_ts) "
+            f"VALUES (%s, %s, TRUE, NULL, %s, %s, %s) "
+            f"ON CONFLICT ({user}, {target}) DO UPDATE "
+            f"SET is_active = TRUE, deleted_at = NULL, updated_at = EXCLUDED.updated_at, client_ts = EXCLUDED.client_ts "
+            f"WHERE {table}.is_active = FALSE OR {table}.deleted_at IS NOT NULL "
+            f"RETURNING (xmax = 0) AS created"
+            f"), bump AS ("
+            f"UPDATE {target_table} SET favorites_count = favorites_count + 1 "
+            f"WHERE id = %s AND EXISTS (SELECT 1 FROM fav)"
+            f") SELECT created FROM fav"
+        )
+
+    @classmethod
+    def _remove_sql(cls, model):
+        table, user, target, target_table = cls._names(model)
+        return (
+            f"WITH fav AS ("
+            f"UPDATE {table} SET is_active = FALSE, updated_at = %s, client_ts = %s "
+            f"WHERE {user} = %s AND {target} = %s AND is_active AND deleted_at IS NULL "
+            f"RETURNING 1"
+            f"), bump AS ("
+            f"UPDATE {target_table} SET favorites_count = GREATEST(favorites_count - 1, 0) "
+            f"WHERE id = %s AND EXISTS (SELECT 1 FROM fav)"
+            f") SELECT count(*) FROM fav"
+        )
+
+    @classmethod
+    def add(cls, model, user, target):
+        """Marca `target` como favorito; regresa ADDED, REACTIVATED o ALREADY_ACTIVE"""
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(cls._upsert_sql(model), [user.pk, target.pk, now, now, now, target.pk])
+            row = cursor.fetchone()
+
+        if row is None:
+            return cls.ALREADY_ACTIVE
+        return cls.ADDED if row[0] else cls.REACTIVATED
+
+    @classmethod
+    def remove(cls, model, user, target):
+        """Da de baja el favorito activo; regresa False si no lo era"""
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(cls._remove_sql(model), [now, now, user.pk, target.pk, target.pk])
+            return bool(cursor.fetchone()[0])
+
+    @classmethod
+    def add_spot(cls, user, spot):
+        return cls.add(UserFavoriteSpot, user, spot)
+
+    @classmethod
+    def remove_spot(cls, user, spot):
+        return cls.remove(UserFavoriteSpot, user, spot)
+
+    @classmethod
+    def add_route(cls, user, route):
+        return cls.add(UserFavoriteRoute, user, route)
+
+    @classmethod
+    def remove_route(cls, user, route):
+        return cls.remove(UserFavoriteRoute, user, route)
+
+    #------------------------------- sincronización por lotes -------------------------------
+
+    @classmethod
+    def _sync_sql(cls, model):
+        table, user, target, target_table = cls._names(model)
+
+        # ops: solo se pueden agregar objetos activos; las bajas se guardan aunque el objeto ya
+        # no lo esté (sirven de lápida para que un alta más vieja de otro dispositivo no gane).
+        # up: last-write-wins por client_ts, el DO UPDATE solo aplica si la operación es más nueva
+        # que el registro. updated_at es hora del servidor (clock_timestamp): una operación que
+        # llega tarde de la cola offline queda después del cursor de DeltaSyncService.
+        # old/delta: todos los CTE ven el estado previo a la sentencia, de ahí sale el ajuste
+        # de favorites_count de cada objeto.
+        return (
+            f"WITH ops AS ("
+            f"SELECT ops.id, ops.state, ops.ts "
+            f"FROM unnest(%s::bigint[], %s::boolean[], %s::timestamptz[]) AS ops(id, state, ts) "
+            f"JOIN {target_table} t ON t.id = ops.id "
+            f"AND (NOT ops.state OR (t.is_active AND t.deleted_at IS NULL))"
+            f"), old AS ("
+            f"SELECT {target} AS id, (is_active AND deleted_at IS NULL) AS counted FROM {table} "
+            f"WHERE {user} = %s AND {target} IN (SELECT id FROM ops)"
+            f"), up AS ("
+            f"INSERT INTO {table} ({user}, {target}, is_active, deleted_at, created_at, updated_at, client_ts) "
+            f"SELECT %s, id, state, NULL, ts, clock_timestamp(), ts FROM ops "
+            f"ON CONFLICT ({user}, {target}) DO UPDATE "
+            f"SET is_active = EXCLUDED.is_active, deleted_at = NULL, "
+            f"updated_at = EXCLUDED.updated_at, client_ts = EXCLUDED.client_ts "
+            f"WHERE {table}.client_ts < EXCLUDED.client_ts "
+            f"RETURNING {target} AS id, is_active"
+            f"), delta AS ("
+            f"SELECT up.id, up.is_active::int - COALESCE(old.counted, FALSE)::int AS d "
+            f"FROM up LEFT JOIN old ON old.id = up.id"
+            f") UPDATE {target_table} t SET favorites_count = GREATEST(t.favorites_count + delta.d, 0) "
+            f"FROM delta WHERE t.id = delta.id AND delta.d <> 0"
+        )
+
+    @staticmethod
+    def _latest_by_id(operations, now):
+        """Última operación por objeto dentro del lote; relojes adelantados se recortan a `now`"""
+        latest = {}
+        for op in operations:
+            ts = min(op['client_ts'], now)
+            current = latest.get(op['id'])
+            if current is None or ts >= current[1]:
+                latest[op['id']] = (op['state'], ts)
+        return latest
+
+    @classmethod
+    def sync(cls, user, operations):
+        """
+        Aplica un lote de operaciones {type, id, state, client_ts} (cola offline de la app)
+        con una sentencia por tipo, en una transacción, y regresa los favoritos resultantes.
+        """
+        now = timezone.now()
+        models_by_type = {'spot': UserFavoriteSpot, 'route': UserFavoriteRoute}
+
+        with transaction.atomic():
+            for type_, model in models_by_type.items():
+                latest = cls._latest_by_id([op for op in operations if op['type'] == type_], now)
+                if not latest:
+                    continue
+
+                ids = list(latest)
+                with connection.cursor() as cursor:
+                    cursor.execute(cls._sync_sql(model), [
+                        ids,
+                        [latest[pk][0] for pk in ids],
+                        [latest[pk][1] for pk in ids],
+                        user.pk,
+                        user.pk,
+                    ])
+
+            return {
+                'spots': cls.active_ids(UserFavoriteSpot, user),
+                'routes': cls.active_ids(UserFavoriteRoute, user),
+                'synced_at': now,
+            }
+
+    @classmethod
+    def active_ids(cls, model, user):
+        """Ids de los objetos (activos) que el usuario tiene en favoritos"""
+        target = cls._TARGET_FIELDS[model]
+        return list(
+            model.objects.filter(user=user, **{f'{target}__is_active': True, f'{target}__deleted_at__isnull': True})
+            .order_by(target)
+            .values_list(target, flat=True)
+        )
+
+
+class PopularityCounterService:
+    """
+    Reconciliación de los contadores desnormalizados de Spot y Route contra las tablas hijas.
+    En operación normal los mantienen PopularityCounterMixin y FavoritesService; esto corrige
+    lo escrito por otras vías (queryset.update, acciones del admin, COPY de seed_synthetic).
+    """
+    # (modelo con el contador, campo contador, modelo hijo, FK del hijo)
+    COUNTERS = [
+        (Spot, 'favorites_count', UserFavoriteSpot, 'spot'),
+        (Spot, 'routes_count', Route, 'spot'),
+        (Spot, 'captions_count', SpotCaption, 'spot'),
+        (Route, 'favorites_count', UserFavoriteRoute, 'route'),
+        (Route, 'photos_count', RoutePhoto, 'route'),
+    ]
+
+    @staticmethod
+    def _reconcile_sql(parent, counter, child, fk):
+        quote = connection.ops.quote_name
+        parent_table = quote(parent._meta.db_table)
+        child_table = quote(child._meta.db_table)
+        fk_column = quote(child._meta.get_field(fk).column)
+        counter = quote(counter)
+
+        # Solo se escriben las filas desfasadas
+        return (
+            f"WITH real AS ("
+            f"SELECT p.id, count(c.id) AS n FROM {parent_table} p "
+            f"LEFT JOIN {child_table} c ON c.{fk_column} = p.id AND c.is_active AND c.deleted_at IS NULL "
+            f"GROUP BY p.id"
+            f") UPDATE {parent_table} p SET {counter} = real.n "
+            f"FROM real WHERE p.id = real.id AND p.{counter} <> real.n"
+        )
+
+    @classmethod
+    def reconcile(cls):
+        """Regresa {'spot.favorites_count': filas corregidas, ...}"""
+        fixed = {}
+        for parent, counter, child, fk in cls.COUNTERS:
+            with connection.cursor() as cursor:
+                cursor.execute(cls._reconcile_sql(parent, counter, child, fk))
+                fixed[f'{parent._meta.model_name}.{counter}'] = cursor.rowcount
+        return fixed
+
+
+class SpotModerationService:
+    """
+    Cola de moderación de spots para varios revisores a la vez.
+
+    claim() reserva un lote de spots pendientes para el revisor (review_claimed_by/_until)
+    con SELECT ... FOR UPDATE SKIP LOCKED: dos revisores que piden lote al mismo tiempo
+    reciben spots distintos sin esperarse. La reserva vence a los MODERATION_LEASE_SECONDS
+    y el spot vuelve a la cola. decide() aprueba o rechaza muchos spots con un solo UPDATE,
+    saltándose los reservados por otro revisor.
+    """
+    APPROVE = 'approve'
+    REJECT = 'reject'
+
+    @staticmethod
+    def _claim_sql():
+        table = connection.ops.quote_name(Spot._meta.db_table)
+        return (
+            f"WITH picked AS ("
+            f"SELECT id FROM {table} "
+            f"WHERE status_id = %s AND deleted_at IS NULL "
+            f"AND (review_claimed_until IS NULL OR review_claimed_until < %s OR review_claimed_by_id = %s) "
+            f"ORDER BY created_at LIMIT %s "
+            f"FOR UPDATE SKIP LOCKED"
+            f") UPDATE {table} s SET review_claimed_by_id = %s, review_claimed_until = %s "
+            f"FROM picked WHERE s.id = picked.id "
+            f"RETURNING s.id"
+        )
+
+    @staticmethod
+    def _decide_sql():
+        table = connection.ops.quote_name(Spot._meta.db_table)
+        return (
+            f"UPDATE {table} SET status_id = %s, is_active = %s, "
+            f"reject_reason = COALESCE(%s, reject_reason), "
+            f"reviewed_user_id = %s, reviewed_at = %s, updated_at = %s, "
+            f"review_claimed_by_id = NULL, review_claimed_until = NULL "
+            f"WHERE id = ANY(%s::bigint[]) AND deleted_at IS NULL "
+            f"AND (review_claimed_until IS NULL OR review_claimed_until < %s OR review_claimed_by_id = %s) "
+            f"RETURNING id"
+        )
+
+    @classmethod
+    def claim(cls, reviewer, limit):
+        """
+        Reserva hasta `limit` spots pendientes (los más viejos primero) para `reviewer`.
+        Incluye los que ya tenía reservados. Regresa (ids, vencimiento de la reserva).
+        """
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=settings.MODERATION_LEASE_SECONDS)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(cls._claim_sql(), [
+                get_default_pending(), now, reviewer.pk, limit, reviewer.pk, lease_until,
+            ])
+            ids = [row[0] for row in cursor.fetchall()]
+
+        return ids, lease_until
+
+    @classmethod
+    def decide(cls, reviewer, ids, decision, reason=None):
+        """
+        Aprueba (y activa) o rechaza (y desactiva) los spots `ids`.
+        Regresa (actualizados, omitidos); se omiten los eliminados, inexistentes
+        o reservados por otro revisor.
+        """
+        approve = decision == cls.APPROVE
+        now = timezone.now()
+        ids = sorted(set(ids))
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls._decide_sql(), [
+                get_approved() if approve else get_rejected(),
+                approve,
+                None if approve else reason,
+                reviewer.pk, now, now,
+                ids,
+                now, reviewer.pk,
+            ])
+            updated = sorted(row[0] for row in cursor.fetchall())
+
+        done = set(updated)
+        return updated, [pk for pk in ids if pk not in done]
+
+
+class SyncTokenError(Exception):
+    """Token de sincronización inválido o vencido: el cliente debe sincronizar desde cero"""
+
+
+class DeltaSyncService:
+    """
+    Sincronización incremental para la app (GET /api/v1/sync/).
+
+    Cada colección se recorre por (updated_at, id) con un cursor que viaja firmado en el
+    token. Un cambio sin confirmar tiene updated_at >= inicio de su transacción, así que la
+    ventana de cada sync termina en la marca segura: el inicio de la transacción abierta más
+    vieja de la BD (menos SYNC_CLOCK_SKEW_SECONDS por diferencias de reloj). Lo que se escriba
+    después entra en la siguiente ventana; nada se pierde aunque haya escrituras concurrentes.
+
+    Las filas que dejaron de ser visibles (soft delete, desactivadas, spots no aprobados) se
+    mandan como lápidas: solo el id. Sin token se manda la foto completa: la primera página
+    sin lápidas y las siguientes con ellas, para que una fila ya enviada que se borre antes de
+    terminar la descarga no se quede en el cliente.
+    Los contadores (favorites_count, ...) se actualizan sin tocar updated_at: viajan con el
+    siguiente cambio de la fila.
+    """
+    salt = 'spots_routes.sync'
+
+    # colección: (modelo, campo de usuario para filtrar por dueño, campo que viaja en favoritos)
+    COLLECTIONS = {
+        'spots': (Spot, None, None),
+        'routes': (Route, None, None),
+        'captions': (SpotCaption, None, None),
+        'photos': (RoutePhoto, None, None),
+        'favorite_spots': (UserFavoriteSpot, 'user', 'spot_id'),
+        'favorite_routes': (UserFavoriteRoute, 'user', 'route_id'),
+    }
+
+    #---------------------------------------- token -----------------------------------------
+
+    @classmethod
+    def make_token(cls, cursors):
+        return signing.dumps(cursors, salt=cls.salt, compress=True)
+
+    @classmethod
+    def read_token(cls, token):
+        """
+        {colección: (updated_at, id, full)}. `full` marca una colección que sigue en su
+        primera descarga (la primera página va sin lápidas). Sin token: todas completas
+        desde el principio.
+        """
+        if not token:
+            return {name: (None, 0, True) for name in cls.COLLECTIONS}
+        try:
+            data = signing.loads(token, salt=cls.salt, max_age=settings.SYNC_TOKEN_MAX_AGE)
+            cursors = {
+                name: (parse_datetime(ts) if ts else None, int(pk), bool(full))
+                for name, (ts, pk, full) in data.items()
+            }
+        except (signing.BadSignature, AttributeError, TypeError, ValueError):
+            raise SyncTokenError()
+        if set(cursors) != set(cls.COLLECTIONS):
+            raise SyncTokenError()
+        return cursors
+
+    #------------------------------------ marca segura --------------------------------------
+
+    @staticmethod
+    def safe_watermark():
+        """Inicio de la transacción abierta más vieja (de otros backends), acotado a now()"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT LEAST(clock_timestamp(), COALESCE(min(xact_start), clock_timestamp())) "
+                "FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL"
+            )
+            watermark = cursor.fetchone()[0]
+        return watermark - timedelta(seconds=settings.SYNC_CLOCK_SKEW_SECONDS)
+
+    #-------------------------------------- filas -------------------------------------------
+
+    @staticmethod
+    def _live_q(model):
+        live = Q(is_active=True, deleted_at__isnull=True)
+        if model is Spot:
+            live &= Q(status_id=get_approved())
+        return live
+
+    @staticmethod
+    def _is_live(model, row):
+        if not row.is_active or row.deleted_at is not None:
+            return False
+        return model is not Spot or row.status_id == get_approved()
+
+    @staticmethod
+    def _media_url(model, field_name, name, request):
+        if not name:
+            return None
+        url = model._meta.get_field(field_name).storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    @staticmethod
+    def _coords(geometry):
+        return list(geometry.coords) if geometry is not None else None
+
+    @classmethod
+    def _compact(cls, model, row, request):
+        """Fila compacta (solo lo que la app guarda localmente)"""
+        if model is Spot:
+            return {
+                'id': row.id, 'user': row.user_id, 'name': row.name, 'description': row.description,
+                'location': cls._coords(row.location),
+                'thumbnail': cls._media_url(Spot, 'spot_thumbnail_path', row.spot_thumbnail_path.name, request),
+                'favorites_count': row.favorites_count, 'routes_count': row.routes_count,
+                'updated_at': row.updated_at,
+            }
+        if model is Route:
+            return {
+                'id': row.id, 'spot': row.spot_id, 'user': row.user_id,
+                'difficulty': row.difficulty_id, 'travel_mode': row.travel_mode_id,
+                'description': row.description, 'distance': float(row.distance),
+                'path': cls._coords(row.path),
+                'favorites_count': row.favorites_count, 'photos_count': row.photos_count,
+                'updated_at': row.updated_at,
+            }
+        if model is SpotCaption:
+            return {
+                'id': row.id, 'spot': row.spot_id, 'user': row.user_id, 'description': row.description,
+                'img': cls._media_url(SpotCaption, 'img_path', row.img_path.name, request),
+                'updated_at': row.updated_at,
+            }
+        return {
+            'id': row.id, 'route': row.route_id, 'user': row.user_id,
+            'img': cls._media_url(RoutePhoto, 'img_path', row.img_path.name, request),
+            'location': cls._coords(row.location),
+            'updated_at': row.updated_at,
+        }
+
+    @classmethod
+    def _page(cls, model, cursor, watermark, user_field, user):
+        """Filas de la ventana (cursor, watermark) en orden (updated_at, id), una de más"""
+        since, last_id, full = cursor
+        queryset = model.all_objects.filter(updated_at__lt=watermark)
+        if user_field:
+            queryset = queryset.filter(**{user_field: user})
+        if full and since is None:
+            # Solo la primera página: después una fila ya enviada puede haber dejado de ser visible
+            queryset = queryset.filter(cls._live_q(model))
+        if since is not None:
+            # Comparación de filas: un solo rango sobre el índice (updated_at, id)
+            queryset = queryset.filter(RawSQL(
+                '("updated_at", "id") > (%s, %s)', (since, last_id), output_field=BooleanField(),
+            ))
+        return list(queryset.order_by('updated_at', 'id')[:settings.SYNC_PAGE_SIZE + 1])
+
+    @classmethod
+    def changes(cls, user, token=None, request=None):
+        """
+        Cambios desde `token`: {'sync_token', 'has_more', <colección>: {'upserted', 'deleted'}}.
+        Con has_more el cliente repite de inmediato con el token nuevo.
+        Los favoritos viajan como ids del spot o la ruta.
+        """
+        cursors = cls.read_token(token)
+        watermark = cls.safe_watermark()
+        result = {}
+        next_cursors = {}
+        has_more = False
+
+        for name, (model, user_field, target) in cls.COLLECTIONS.items():
+            since, last_id, full = cursors[name]
+            upserted, deleted = [], []
+            result[name] = {'upserted': upserted, 'deleted': deleted}
+
+            # El cursor nunca retrocede aunque la marca segura baje (transacción larga nueva)
+            if since is not None and since >= watermark:
+                next_cursors[name] = [since.isoformat(), last_id, full]
+                continue
+
+            rows = cls._page(model, cursors[name], watermark, user_field, user)
+            if len(rows) > settings.SYNC_PAGE_SIZE:
+                rows = rows[:settings.SYNC_PAGE_SIZE]
+                has_more = True
+                next_cursors[name] = [rows[-1].updated_at.isoformat(), rows[-1].id, full]
+            else:
+                next_cursors[name] = [watermark.isoformat(), 0, False]
+
+            for row in rows:
+                if cls._is_live(model, row):
+                    upserted.append(getattr(row, target) if target else cls._compact(model, row, request))
+                else:
+                    deleted.append(getattr(row, target) if target else row.pk)
+
+        result['sync_token'] = cls.make_token(next_cursors)
+        result['has_more'] = has_more
+        return result
+
+
+class CorridorService:
+    """
+    Spots y fotos a lo largo de una ruta: lo que queda a `meters` o menos de Route.path,
+    ordenado por la posición sobre la línea (ST_LineLocatePoint).
+
+    El filtro es && contra el bbox del path ampliado (índice GiST de location) + ST_DWithin
+    sobre geography. Los paths casi no cambian: el resultado (ids, posición y distancia al
+    path) se guarda en cache con la versión de la ruta (updated_at) en la llave, así que
+    editar la ruta lo invalida. Las filas se leen frescas en cada request por id.
+    """
+    SPOTS = 'spots'
+    PHOTOS = 'photos'
+
+    @staticmethod
+    def clamp_meters(meters):
+        """Ancho pedido (query param) acotado a [1, ROUTE_CORRIDOR_MAX_METERS]; ValueError si no es entero"""
+        if meters in (None, ''):
+            return settings.ROUTE_CORRIDOR_DEFAULT_METERS
+        return max(1, min(int(meters), settings.ROUTE_CORRIDOR_MAX_METERS))
+
+    @staticmethod
+    def _cache_key(kind, route, meters):
+        return f'corridor:{kind}:{route.pk}:{route.updated_at.timestamp()}:{meters}'
+
+    @classmethod
+    def _candidates(cls, kind):
+        if kind == cls.SPOTS:
+            return Spot.objects.filter(status_id=get_approved())
+        return RoutePhoto.objects.filter(route__is_active=True, route__deleted_at__isnull=True)
+
+    @classmethod
+    def _locate(cls, kind, route, meters):
+        """[(id, posición 0-1, metros al path)] en orden de la ruta"""
+        queryset = within_distance(cls._candidates(kind), 'location', route.path, meters)
+        queryset = queryset.annotate(
+            position=LineLocatePoint(F('location'), route.path),
+            offset=GeographyDistance(F('location'), route.path),
+        ).order_by('position', 'id')
+        return list(queryset.values_list('id', 'position', 'offset')[:settings.ROUTE_CORRIDOR_MAX_RESULTS])
+
+    @classmethod
+    def along(cls, kind, route, meters):
+        """
+        Spots (aprobados) o fotos a lo largo de `route`, cada uno con `position` (0-1),
+        `distance_along_km` y `offset_m` (distancia al path).
+        """
+        key = cls._cache_key(kind, route, meters)
+        located = cache.get(key)
+        if located is None:
+            located = cls._locate(kind, route, meters)
+            cache.set(key, located, settings.ROUTE_CORRIDOR_CACHE_TTL)
+
+        queryset = cls._candidates(kind)
+        if kind == cls.PHOTOS:
+            queryset = queryset.select_related('user')
+        rows = queryset.in_bulk([pk for pk, _, _ in located])
+
+        # Lo que se borró o dejó de ser visible desde que se llenó el cache no se regresa
+        result = []
+        for pk, position, offset in located:
+            row = rows.get(pk)
+            if row is None:
+                continue
+            row.position = round(position, 6)
+            row.distance_along_km = round(position * float(route.distance), 3)
+            row.offset_m = round(offset, 1)
+            result.append(row)
+        return result
@@ -3,6 +3,7 @@ from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from core.utils.background import run_in_background_on_commit
 from core.utils.storages import delete_file_fields, delete_if_changed
 from .models import RoutePhoto, Spot, SpotCaption
 import os
@@ -21,18 +22,22 @@ def spot_pre_save(sender, instance, **kwargs):
     if not instance.pk:
         return  # Es un nuevo spot, no hay thumbnail anterior que borrar
     
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(CAMPOS_SPOT) & set(update_fields):
+        return  # El save no toca el thumbnail (p. ej. authorize/deny)
+
     try:
         anterior = Spot.objects.get(pk=instance.pk)
     except Spot.DoesNotExist:
         return
     
     # Borra el thumbnail anterior si cambió
-    delete_if_changed(anterior, instance, CAMPOS_SPOT)
+    run_in_background_on_commit(delete_if_changed, anterior, instance, CAMPOS_SPOT)
 
 @receiver(post_delete, sender=Spot)
 def spot_post_delete(sender, instance, **kwargs):
     """Borra thumbnail cuando se elimina un Spot"""
-    delete_file_fields(instance, CAMPOS_SPOT)
+    run_in_background_on_commit(delete_file_fields, instance, CAMPOS_SPOT)
 
 
  
@@ -51,12 +56,12 @@ def spotcaption_pre_save(sender, instance, **kwargs):
     except SpotCaption.DoesNotExist:
         return
     
-    delete_if_changed(anterior, instance, CAMPOS_SPOTCAPTION)
+    run_in_background_on_commit(delete_if_changed, anterior, instance, CAMPOS_SPOTCAPTION)
 
 @receiver(post_delete, sender=SpotCaption)
 def spotcaption_post_delete(sender, instance, **kwargs):
     """Borra imagen cuando se elimina un SpotCaption"""
-    delete_file_fields(instance, CAMPOS_SPOTCAPTION)
+    run_in_background_on_commit(delete_file_fields, instance, CAMPOS_SPOTCAPTION)
 
 
 #=============================== SIGNALS PARA ROUTEPHOTO =======================================
@@ -74,9 +79,9 @@ def routephoto_pre_save(sender, instance, **kwargs):
     except RoutePhoto.DoesNotExist:
         return
     
-    delete_if_changed(anterior, instance, CAMPOS_ROUTEPHOTO)
+    run_in_background_on_commit(delete_if_changed, anterior, instance, CAMPOS_ROUTEPHOTO)
 
 @receiver(post_delete, sender=RoutePhoto)
 def routephoto_post_delete(sender, instance, **kwargs):
     """Borra imagen cuando se elimina un RoutePhoto"""
-    delete_file_fields(instance, CAMPOS_ROUTEPHOTO)
\ No newline at end of file
+    run_in_background_on_commit(delete_file_fields, instance, CAMPOS_ROUTEPHOTO)
\ No newline at end of file
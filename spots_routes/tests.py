@@ -1,3 +1,1122 @@
-from django.test import TestCase
+import gzip
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import uuid
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.geos import Point, Polygon
+from django.contrib.postgres.indexes import GistIndex
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authentication.services import UsersRegisterService
+from authentication.urls import authentications_patterns
+from core.query_budget import get_view_class
+from spots_routes.management.commands.seed_synthetic import generate_route_path
+from spots_routes.models import (
+    RegionPack, Route, RoutePhoto, Spot, SpotCaption, UserFavoriteRoute, UserFavoriteSpot,
+    get_approved, get_default_pending, get_rejected,
+)
+from spots_routes.filters import RouteFilter, SpotFilter
+from spots_routes.geo import GeographyDistance, parse_area, within_area, within_distance, within_radius
+from spots_routes.region_packs import RegionPackBuilder
+from spots_routes.services import FavoritesService, PopularityCounterService
+from spots_routes.urls import spots_routes_patterns
+from spots_routes.views import RouteViewSet, SpotViewSet, UserFavoriteSpotsView
+from users.urls import user_patterns
+from users.views import UserViewSet
+
+User = get_user_model()
+
+# QueryBudgetMiddleware solo se agrega a MIDDLEWARE al cargar settings (QUERY_BUDGET_MODE != 'off')
+# y lee el modo en __init__: los tests de la API lo activan en modo 'raise' para que un N+1 falle
+BUDGET_MIDDLEWARE = [name for name in settings.MIDDLEWARE if name != 'core.middleware.QueryBudgetMiddleware']
+BUDGET_MIDDLEWARE.insert(
+    BUDGET_MIDDLEWARE.index('core.middleware.MetricsMiddleware') + 1, 'core.middleware.QueryBudgetMiddleware'
+)
+raise_on_query_budget = override_settings(QUERY_BUDGET_MODE='raise', MIDDLEWARE=BUDGET_MIDDLEWARE)
+
+
+def _north_of(point, meters):
+    """Punto a `meters` al norte (negativo: al sur) sobre el meridiano del esferoide WGS84"""
+    a, e2 = 6378137.0, 0.00669437999014
+    lat = math.radians(point.y)
+    meridian_radius = a * (1 - e2) / (1 - e2 * math.sin(lat) ** 2) ** 1.5
+    return Point(point.x, point.y + math.degrees(meters / meridian_radius), srid=4326)
+
+
+def _image(name='foto.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class SeedSyntheticCommandTests(TestCase):
+    """Tests para el generador de datos sintéticos"""
+
+    def _seed(self, **options):
+        defaults = {'users': 20, 'spots': 50, 'seed': 7, 'no_files': True, 'stdout': StringIO()}
+        call_command('seed_synthetic', **{**defaults, **options})
+
+    def _snapshot(self):
+        return list(
+            Spot.all_objects.order_by('id').values_list('name', 'location', 'user__username', 'created_at')
+        )
+
+    def test_carga_todas_las_entidades(self):
+        """Se crean spots, rutas, fotos y favoritos con sus relaciones"""
+        self._seed(routes_per_spot=0.5)
+
+        self.assertEqual(Spot.all_objects.count(), 50)
+        self.assertEqual(Route.all_objects.count(), 25)
+        self.assertEqual(SpotCaption.all_objects.count(), 50)
+        self.assertTrue(UserFavoriteSpot.all_objects.exists())
+        self.assertTrue(UserFavoriteRoute.all_objects.exists())
+        self.assertTrue(RoutePhoto.all_objects.exists())
+
+        route = Route.all_objects.select_related('spot').first()
+        self.assertAlmostEqual(route.path[-1][0], route.spot.location.x, places=5)
+        self.assertAlmostEqual(route.path[-1][1], route.spot.location.y, places=5)
+
+    def test_misma_semilla_mismos_datos(self):
+        """Con la misma semilla (y --clear) se generan exactamente los mismos datos"""
+        self._seed()
+        first = self._snapshot()
+
+        self._seed(clear=True)
+
+        self.assertEqual(self._snapshot(), first)
+
+    def test_ruta_termina_en_el_spot(self):
+        """La polilínea respeta el número máximo de puntos y termina en el spot"""
+        points = generate_route_path(random.Random(1), -99.13, 19.43, 50000, 15, 300)
+
+        self.assertEqual(len(points), 300)
+        self.assertAlmostEqual(points[-1][0], -99.13, places=9)
+        self.assertAlmostEqual(points[-1][1], 19.43, places=9)
+
+
+
+@raise_on_query_budget
+class FavoritesServiceTests(TestCase):
+    """Tests para los favoritos con upsert (una sentencia por operación)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=2, spots=5, routes_per_spot=1, seed=5,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.user = User.objects.create_user(username='fav', email='fav@example.com', password='x')
+        cls.spot = Spot.objects.first()
+        cls.route = Route.objects.first()
+
+    def test_ciclo_completo_con_una_sentencia(self):
+        """Agregar, repetir, quitar y reactivar deja un solo registro"""
+        steps = [
+            (FavoritesService.add_spot, FavoritesService.ADDED),
+            (FavoritesService.add_spot, FavoritesService.ALREADY_ACTIVE),
+            (FavoritesService.remove_spot, True),
+            (FavoritesService.remove_spot, False),
+            (FavoritesService.add_spot, FavoritesService.REACTIVATED),
+        ]
+        for operation, expected in steps:
+            with self.assertNumQueries(1):
+                self.assertEqual(operation(self.user, self.spot), expected)
+
+        favorites = UserFavoriteSpot.all_objects.filter(user=self.user, spot=self.spot)
+        self.assertEqual(favorites.count(), 1)
+        self.assertTrue(favorites.get().is_active)
+
+    def test_endpoints_conservan_sus_respuestas(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        spot_url = f'/api/v1/spots/{self.spot.pk}/favorites/'
+        route_url = f'/api/v1/spots/{self.route.spot_id}/routes/{self.route.pk}/'
+
+        self.assertEqual(client.post(spot_url).status_code, 201)
+        self.assertEqual(client.post(spot_url).status_code, 400)
+        self.assertEqual(client.delete(spot_url).status_code, 204)
+        self.assertEqual(client.delete(spot_url).status_code, 404)
+        self.assertEqual(client.post(spot_url).status_code, 200)
+
+        self.assertEqual(client.post(f'{route_url}add_favorite/').status_code, 201)
+        self.assertEqual(client.post(f'{route_url}add_favorite/').status_code, 400)
+        self.assertEqual(client.post(f'{route_url}remove_favorite/').status_code, 200)
+        self.assertEqual(UserFavoriteRoute.all_objects.filter(user=self.user).count(), 1)
+
+
+@raise_on_query_budget
+class FavoritesSyncTests(TestCase):
+    """Tests para POST /api/v1/favorites/sync/ (lote offline con last-write-wins)"""
+    URL = '/api/v1/favorites/sync/'
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=2, spots=5, routes_per_spot=1, seed=9,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.user = User.objects.create_user(username='sync', email='sync@example.com', password='x')
+        cls.spots = list(Spot.objects.order_by('id')[:3])
+        cls.route = Route.objects.first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _op(self, target, state, minutes_ago, type_='spot'):
+        ts = timezone.now() - timedelta(minutes=minutes_ago)
+        return {'type': type_, 'id': target.pk, 'state': state, 'client_ts': ts.isoformat()}
+
+    def test_aplica_el_lote_y_regresa_los_favoritos(self):
+        """Dentro del lote gana la operación más reciente de cada objeto"""
+        operations = [
+            self._op(self.spots[0], True, 10),
+            self._op(self.spots[0], False, 5),
+            self._op(self.spots[1], True, 5),
+            self._op(self.route, True, 5, type_='route'),
+        ]
+
+        response = self.client.post(self.URL, {'operations': operations}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['spots'], [self.spots[1].pk])
+        self.assertEqual(response.data['routes'], [self.route.pk])
+        self.assertEqual(UserFavoriteSpot.all_objects.filter(user=self.user).count(), 2)
+
+    def test_operacion_vieja_no_pisa_una_mas_nueva(self):
+        """Un tap offline anterior al último cambio guardado se ignora"""
+        FavoritesService.add_spot(self.user, self.spots[2])
+
+        self.client.post(self.URL, {'operations': [self._op(self.spots[2], False, 60)]}, format='json')
+        self.assertTrue(UserFavoriteSpot.objects.filter(user=self.user, spot=self.spots[2]).exists())
+
+        self.client.post(self.URL, {'operations': [self._op(self.spots[2], False, -1)]}, format='json')
+        self.assertFalse(UserFavoriteSpot.objects.filter(user=self.user, spot=self.spots[2]).exists())
+
+    def test_rechaza_lotes_invalidos(self):
+        response = self.client.post(self.URL, {'operations': [{'type': 'user', 'id': 1}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SYNC_CLOCK_SKEW_SECONDS=0)
+@raise_on_query_budget
+class DeltaSyncTests(TestCase):
+    """Tests para GET /api/v1/sync/ (cambios incrementales con lápidas)"""
+    URL = '/api/v1/sync/'
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=3, spots=8, routes_per_spot=1, seed=17,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.user = User.objects.create_user(username='delta', email='delta@example.com', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _sync(self, token=None):
+        response = self.client.get(self.URL, {'token': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def _visible_spots(self):
+        return set(Spot.objects.filter(status_id=get_approved()).values_list('pk', flat=True))
+
+    def test_descarga_completa_y_luego_solo_cambios(self):
+        first = self._sync()
+        self.assertEqual({spot['id'] for spot in first['spots']['upserted']}, self._visible_spots())
+        self.assertEqual(first['spots']['deleted'], [])
+
+        spot = Spot.objects.filter(status_id=get_approved()).first()
+        other = Spot.objects.filter(status_id=get_approved()).exclude(pk=spot.pk).first()
+        spot.delete()
+        FavoritesService.add_spot(self.user, other)
+
+        second = self._sync(first['sync_token'])
+        self.assertEqual(second['spots']['deleted'], [spot.pk])
+        self.assertEqual(second['favorite_spots']['upserted'], [other.pk])
+        self.assertEqual(second['routes']['upserted'], [])
+
+        self.assertEqual(self._sync(second['sync_token'])['spots'], {'upserted': [], 'deleted': []})
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_pagina_hasta_terminar(self):
+        token, seen, pages = None, set(), 0
+        while True:
+            data = self._sync(token)
+            seen |= {spot['id'] for spot in data['spots']['upserted']}
+            token, pages = data['sync_token'], pages + 1
+            if not data['has_more']:
+                break
+
+        self.assertGreater(pages, 1)
+        self.assertEqual(seen, self._visible_spots())
+
+    def test_favorito_offline_viejo_llega_en_el_siguiente_sync(self):
+        """Una operación de la cola offline con client_ts de hace horas no queda antes del cursor"""
+        first = self._sync()
+        spot = Spot.objects.filter(status_id=get_approved()).first()
+
+        FavoritesService.sync(self.user, [{
+            'type': 'spot', 'id': spot.pk, 'state': True,
+            'client_ts': timezone.now() - timedelta(hours=6),
+        }])
+
+        second = self._sync(first['sync_token'])
+        self.assertEqual(second['favorite_spots']['upserted'], [spot.pk])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_borrado_entre_paginas_llega_como_lapida(self):
+        """Un spot enviado en la primera página y borrado antes de la última se manda en deleted"""
+        first = self._sync()
+        self.assertTrue(first['has_more'])
+        sent = first['spots']['upserted'][0]['id']
+        Spot.objects.get(pk=sent).delete()
+
+        token, deleted, upserted = first['sync_token'], set(), set()
+        while True:
+            data = self._sync(token)
+            deleted |= set(data['spots']['deleted'])
+            upserted |= {spot['id'] for spot in data['spots']['upserted']}
+            token = data['sync_token']
+            if not data['has_more']:
+                break
+
+        self.assertIn(sent, deleted)
+        self.assertNotIn(sent, upserted)
+
+    def test_token_invalido(self):
+        self.assertEqual(self.client.get(self.URL, {'token': 'x'}).status_code, 410)
+
+
+class GeoFilterTests(TestCase):
+    """Tests para los filtros geográficos de spots (radio y bbox sobre el índice GiST)"""
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=3, spots=60, routes_per_spot=0.2, seed=23,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.center_spot = Spot.objects.order_by('id').first()
+        cls.center = cls.center_spot.location
+        # GeoDjango crea su propio índice espacial (spatial_index=True) además del GistIndex del Meta
+        cls.gist_indexes = {index.name for index in Spot._meta.indexes if isinstance(index, GistIndex)}
+        cls.gist_indexes.add(f'{Spot._meta.db_table}_location_id')
+
+    def _ids(self, params):
+        filterset = SpotFilter({key: str(value) for key, value in params.items()}, queryset=Spot.objects.all())
+        self.assertTrue(filterset.is_valid())
+        return set(filterset.qs.values_list('pk', flat=True))
+
+    def assertUsesGistIndex(self, plan):
+        self.assertTrue(any(name in plan for name in self.gist_indexes), plan)
+
+    def _plan(self, queryset):
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Con pocas filas el planner prefiere seq scan; se fuerza para ver si el índice aplica
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def _spot_at(self, location):
+        spot = Spot.objects.get(pk=self.center_spot.pk)
+        spot.pk, spot.storage_id, spot.location = None, uuid.uuid4(), location
+        spot._state.adding = True
+        spot.save()
+        return spot.pk
+
+    def test_radio_coincide_con_la_distancia_real(self):
+        """Coincide con ST_Distance sobre geography (esferoide), también justo dentro del borde"""
+        radius_km = 3
+        radius_m = radius_km * 1000
+        # Al norte y al sur es donde un grado "medio" de latitud dejaba el bbox corto
+        edge = {self._spot_at(_north_of(self.center, meters)) for meters in (radius_m * 0.998, -radius_m * 0.998)}
+
+        ids = self._ids({'lat': self.center.y, 'lng': self.center.x, 'radius': radius_km})
+
+        distances = dict(
+            Spot.objects.annotate(distance=GeographyDistance(F('location'), self.center))
+            .values_list('pk', 'distance')
+        )
+        self.assertTrue(all(radius_m * 0.99 < distances[pk] <= radius_m for pk in edge))
+        self.assertTrue(edge <= ids)
+        self.assertEqual(ids, {pk for pk, meters in distances.items() if meters <= radius_m})
+
+    def test_radio_usa_el_indice_gist(self):
+        queryset = within_radius(Spot.all_objects.all(), 'location', self.center, 3000)
+        plan = self._plan(queryset)
+        self.assertUsesGistIndex(plan)
+        self.assertIn('ST_DWithin', plan)
+
+    def test_bbox_usa_el_indice_gist(self):
+        params = {
+            'sw_lat': self.center.y - 0.05, 'sw_lng': self.center.x - 0.05,
+            'ne_lat': self.center.y + 0.05, 'ne_lng': self.center.x + 0.05,
+        }
+        ids = self._ids(params)
+        self.assertIn(self.center_spot.pk, ids)
+
+        bbox = Polygon.from_bbox((params['sw_lng'], params['sw_lat'], params['ne_lng'], params['ne_lat']))
+        bbox.srid = 4326
+        plan = self._plan(Spot.all_objects.filter(location__bboverlaps=bbox))
+        self.assertUsesGistIndex(plan)
+        self.assertNotIn('st_within', plan.lower())
+
+    def _triangle(self):
+        # Mitad inferior izquierda del rectángulo que ocupan los spots
+        xmin, ymin, xmax, ymax = Spot.objects.aggregate(extent=Extent('location'))['extent']
+        return [(xmin, ymin), (xmax, ymin), (xmin, ymax), (xmin, ymin)]
+
+    @staticmethod
+    def _encode_polyline(coords):
+        encoded, previous = [], (0, 0)
+        for lon, lat in coords:
+            current = (round(lat * 1e5), round(lon * 1e5))
+            for value in (current[0] - previous[0], current[1] - previous[1]):
+                value = ~(value << 1) if value < 0 else value << 1
+                while value >= 0x20:
+                    encoded.append(chr((0x20 | (value & 0x1f)) + 63))
+                    value >>= 5
+                encoded.append(chr(value + 63))
+            previous = current
+        return ''.join(encoded)
+
+    def test_within_es_el_poligono_y_no_su_rectangulo(self):
+        triangle = self._triangle()
+        area = Polygon(triangle, srid=4326)
+        expected = set(Spot.objects.filter(location__intersects=area).values_list('pk', flat=True))
+        in_bbox = set(Spot.objects.filter(location__bboverlaps=area).values_list('pk', flat=True))
+
+        geojson = json.dumps({'type': 'Polygon', 'coordinates': [triangle]})
+        self.assertEqual(self._ids({'within': geojson}), expected)
+        self.assertLess(expected, in_bbox)
+
+        # El encoded polyline no necesita cerrar el contorno
+        polyline = self._encode_polyline(triangle[:-1])
+        self.assertEqual(self._ids({'within': polyline}), expected)
+
+    def test_within_en_rutas(self):
+        area = Polygon(self._triangle(), srid=4326)
+        filterset = RouteFilter(
+            {'within': json.dumps({'type': 'Feature', 'geometry': json.loads(area.json)})},
+            queryset=Route.objects.all(),
+        )
+        self.assertTrue(filterset.is_valid())
+        self.assertEqual(
+            set(filterset.qs.values_list('pk', flat=True)),
+            set(Route.objects.filter(path__intersects=area).values_list('pk', flat=True)),
+        )
+
+    def test_within_valida_y_simplifica(self):
+        # Moño: el contorno se cruza a sí mismo
+        bowtie = json.dumps({'type': 'Polygon', 'coordinates': [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]})
+        invalid = (
+            bowtie, '{"type": "Point", "coordinates": [0, 0]}', '{"type":"Polygon","coordinates":[]}',
+            '{"type": "MultiPolygon", "coordinates": []}', '{no es json', '_p~iF',
+        )
+        for value in invalid:
+            filterset = SpotFilter({'within': value}, queryset=Spot.objects.all())
+            self.assertFalse(filterset.is_valid(), value)
+            self.assertIn('within', filterset.errors)
+
+        circle = Point(self.center.x, self.center.y, srid=4326).buffer(0.05, quadsegs=500)
+        self.assertGreater(circle.num_coords, settings.AREA_FILTER_MAX_VERTICES)
+        area = parse_area(circle.json)
+        self.assertLessEqual(area.num_coords, settings.AREA_FILTER_MAX_VERTICES)
+        self.assertTrue(area.valid)
+
+    def test_within_usa_el_indice_gist(self):
+        area = Polygon(self._triangle(), srid=4326)
+        plan = self._plan(within_area(Spot.all_objects.all(), 'location', area))
+        self.assertUsesGistIndex(plan)
+        self.assertIn('st_intersects', plan.lower())
+
+
+@raise_on_query_budget
+class CorridorTests(TestCase):
+    """Tests para los spots y fotos a lo largo de una ruta (corredor alrededor de Route.path)"""
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=3, spots=30, routes_per_spot=0.5, seed=29,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.route = next(route for route in Route.objects.order_by('id') if len(route.path.coords) >= 5)
+        cls.url = f'/api/v1/spots/{cls.route.spot_id}/routes/{cls.route.pk}/along/spots/'
+
+        # Tres spots sobre vértices de la ruta, guardados en desorden
+        coords = cls.route.path.coords
+        cls.placed = list(Spot.objects.filter(status_id=get_approved()).order_by('id')[:3])
+        for spot, index in zip(cls.placed, (len(coords) - 2, 1, len(coords) // 2)):
+            Spot.all_objects.filter(pk=spot.pk).update(location=Point(*coords[index], srid=4326))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _results(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_spots_en_el_orden_de_la_ruta(self):
+        results = self._results()
+        ids = [spot['id'] for spot in results]
+        placed = [self.placed[1].pk, self.placed[2].pk, self.placed[0].pk]
+        self.assertEqual([pk for pk in ids if pk in placed], placed)
+
+        positions = [spot['position'] for spot in results]
+        self.assertEqual(positions, sorted(positions))
+        for spot in results:
+            self.assertLessEqual(spot['offset_m'], 200 * 1.01)
+            if spot['id'] in placed:
+                self.assertLess(spot['offset_m'], 1)
+
+    def _spatial_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._results()
+        return [query for query in queries.captured_queries if 'ST_DWithin' in query['sql']]
+
+    def test_cache_por_version_de_la_ruta(self):
+        self.assertEqual(len(self._spatial_queries()), 1)
+        # Con cache solo se leen las filas por id
+        self.assertEqual(self._spatial_queries(), [])
+
+        # Guardar la ruta cambia su versión (updated_at)
+        Route.objects.get(pk=self.route.pk).save()
+        self.assertEqual(len(self._spatial_queries()), 1)
+
+    def test_distance_se_acota_y_se_valida(self):
+        response = self.client.get(self.url, {'distance': 10 ** 9})
+        self.assertEqual(response.data['corridor_meters'], settings.ROUTE_CORRIDOR_MAX_METERS)
+
+        response = self.client.get(self.url, {'distance': 'lejos'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_spot_justo_dentro_de_la_distancia(self):
+        """Un spot a 99.8% de `distance` al norte del vértice más al norte entra en el corredor"""
+        meters = 500
+        north = max(self.route.path.coords, key=lambda coord: coord[1])
+        edge = Spot.objects.exclude(pk__in=[spot.pk for spot in self.placed]).order_by('id').first()
+        Spot.all_objects.filter(pk=edge.pk).update(
+            location=_north_of(Point(*north, srid=4326), meters * 0.998)
+        )
+
+        results = {spot['id']: spot for spot in self._results({'distance': meters})}
+
+        self.assertIn(edge.pk, results)
+        self.assertTrue(meters * 0.99 < results[edge.pk]['offset_m'] <= meters)
+
+    def test_fotos_a_lo_largo_de_la_ruta(self):
+        url = f'/api/v1/spots/{self.route.spot_id}/routes/{self.route.pk}/along/photos/'
+        response = self.client.get(url, {'distance': 50})
+        self.assertEqual(response.status_code, 200)
+
+        # Las fotos de la propia ruta están sobre sus vértices
+        own = set(RoutePhoto.objects.filter(route=self.route).values_list('pk', flat=True))
+        self.assertTrue(own <= {photo['id'] for photo in response.data['results']})
+
+    def test_corredor_usa_el_indice_gist(self):
+        gist_indexes = {index.name for index in Spot._meta.indexes if isinstance(index, GistIndex)}
+        gist_indexes.add(f'{Spot._meta.db_table}_location_id')
+        queryset = within_distance(Spot.all_objects.all(), 'location', self.route.path, 200)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in gist_indexes), plan)
+        self.assertIn('ST_DWithin', plan)
+
+
+@raise_on_query_budget
+class RegionPackTests(TestCase):
+    """Tests para los paquetes offline por región"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=3, spots=8, routes_per_spot=1, seed=19,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.pack = RegionPack.objects.create(
+            slug='manzanillo', name='Manzanillo', bbox=Polygon.from_bbox((-180, -90, 180, 90)),
+        )
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=self.media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def _read_pack(self, pack):
+        path = os.path.join(self.media.name, 'pack.sqlite')
+        with pack.file.open('rb') as packed, gzip.GzipFile(fileobj=packed) as source, open(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        db = sqlite3.connect(path)
+        self.addCleanup(db.close)
+        return db
+
+    def test_construye_y_solo_reconstruye_si_cambia_la_region(self):
+        self.assertEqual(RegionPackBuilder(self.pack).build(), RegionPackBuilder.BUILT)
+        self.pack.refresh_from_db()
+
+        db = self._read_pack(self.pack)
+        spot_ids = {row[0] for row in db.execute('SELECT id FROM spots')}
+        self.assertEqual(spot_ids, set(Spot.objects.filter(status_id=get_approved()).values_list('pk', flat=True)))
+        self.assertEqual(self.pack.spots_count, len(spot_ids))
+        self.assertEqual(dict(db.execute('SELECT key, value FROM manifest'))['version'], '1')
+
+        self.assertEqual(RegionPackBuilder(self.pack).build(), RegionPackBuilder.UNCHANGED)
+
+        Spot.objects.get(pk=min(spot_ids)).delete()
+        self.assertEqual(RegionPackBuilder(self.pack).build(), RegionPackBuilder.BUILT)
+        self.pack.refresh_from_db()
+        self.assertEqual(self.pack.version, 2)
+        self.assertEqual(self.pack.spots_count, len(spot_ids) - 1)
+        self.assertTrue(self.pack.previous_file.name)
+
+    def test_manifiesto_en_la_api(self):
+        self.assertEqual(APIClient().get('/api/v1/region-packs/').data, [])
+
+        RegionPackBuilder(self.pack).build()
+        response = APIClient().get('/api/v1/region-packs/manzanillo/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 1)
+        self.assertTrue(response.data['url'].endswith('.sqlite.gz'))
+
+
+@raise_on_query_budget
+class SpotModerationTests(TestCase):
+    """Tests para la cola de moderación (reservas por revisor y decisiones en lote)"""
+    CLAIM_URL = '/api/v1/spots/moderation/claim/'
+    DECISIONS_URL = '/api/v1/spots/moderation/decisions/'
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=2, spots=6, routes_per_spot=1, seed=13,
+            no_files=True, stdout=StringIO(),
+        )
+        Spot.all_objects.update(status_id=get_default_pending(), is_active=False)
+        cls.reviewer_a = User.objects.create_superuser(username='rev_a', email='a@example.com', password='x')
+        cls.reviewer_b = User.objects.create_superuser(username='rev_b', email='b@example.com', password='x')
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _claim(self, user, limit):
+        response = self._client(user).post(f'{self.CLAIM_URL}?limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        return [spot['id'] for spot in response.data['results']]
+
+    def test_revisores_reciben_lotes_distintos(self):
+        batch_a = self._claim(self.reviewer_a, 4)
+        batch_b = self._claim(self.reviewer_b, 4)
+
+        self.assertEqual(len(batch_a), 4)
+        self.assertEqual(len(batch_b), 2)
+        self.assertFalse(set(batch_a) & set(batch_b))
+        # Volver a pedir regresa lo que ya tenía reservado
+        self.assertEqual(sorted(self._claim(self.reviewer_a, 4)), sorted(batch_a))
+
+    def test_decision_en_lote_omite_reservas_ajenas(self):
+        batch_a = self._claim(self.reviewer_a, 3)
+        batch_b = self._claim(self.reviewer_b, 3)
+
+        response = self._client(self.reviewer_a).post(
+            self.DECISIONS_URL, {'action': 'approve', 'ids': batch_a + batch_b[:1]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], sorted(batch_a))
+        self.assertEqual(response.data['skipped'], batch_b[:1])
+        approved = Spot.objects.filter(pk__in=batch_a, status_id=get_approved())
+        self.assertEqual(approved.count(), 3)
+        self.assertFalse(approved.filter(review_claimed_by__isnull=False).exists())
+
+    def test_rechazo_requiere_razon(self):
+        ids = self._claim(self.reviewer_a, 2)
+        client = self._client(self.reviewer_a)
+
+        response = client.post(self.DECISIONS_URL, {'action': 'reject', 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(
+            self.DECISIONS_URL, {'action': 'reject', 'ids': ids, 'reason': 'Duplicado'}, format='json'
+        )
+        self.assertEqual(response.data['updated'], sorted(ids))
+        self.assertEqual(
+            Spot.all_objects.filter(pk__in=ids, status_id=get_rejected(), reject_reason='Duplicado').count(), 2
+        )
+
+    def test_solo_administradores(self):
+        user = User.objects.create_user(username='normal', email='normal@example.com', password='x')
+        self.assertEqual(self._client(user).post(self.CLAIM_URL).status_code, 403)
+
+
+class PopularityCounterTests(TestCase):
+    """Tests para los contadores desnormalizados de Spot y Route"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=5, spots=10, routes_per_spot=1, seed=11,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.user = User.objects.create_user(username='counter', email='counter@example.com', password='x')
+
+    def test_seed_deja_los_contadores_consistentes(self):
+        self.assertEqual(PopularityCounterService.reconcile(), {
+            'spot.favorites_count': 0, 'spot.routes_count': 0, 'spot.captions_count': 0,
+            'route.favorites_count': 0, 'route.photos_count': 0,
+        })
+
+    def test_favoritos_y_sync_ajustan_el_contador(self):
+        spot = Spot.objects.first()
+        initial = spot.favorites_count
+
+        FavoritesService.add_spot(self.user, spot)
+        FavoritesService.add_spot(self.user, spot)
+        spot.refresh_from_db()
+        self.assertEqual(spot.favorites_count, initial + 1)
+
+        FavoritesService.sync(self.user, [
+            {'type': 'spot', 'id': spot.pk, 'state': False, 'client_ts': timezone.now()},
+        ])
+        spot.refresh_from_db()
+        self.assertEqual(spot.favorites_count, initial)
+
+    def test_hijos_ajustan_el_contador_del_padre(self):
+        spot = Spot.objects.first()
+        initial = spot.captions_count
+
+        caption = SpotCaption.objects.create(spot=spot, user=self.user, img_path='captions/x.jpg')
+        spot.refresh_from_db()
+        self.assertEqual(spot.captions_count, initial + 1)
+
+        caption.deactivate()
+        spot.refresh_from_db()
+        self.assertEqual(spot.captions_count, initial)
+
+    def test_save_del_padre_no_pisa_los_contadores(self):
+        """Un spot cargado antes de un favorito no regresa el contador al guardarse"""
+        spot = Spot.objects.first()
+        FavoritesService.add_spot(self.user, spot)
+
+        spot.name = 'Renombrado'
+        spot.save()
+
+        spot.refresh_from_db()
+        self.assertEqual(
+            spot.favorites_count,
+            UserFavoriteSpot.objects.filter(spot=spot).count(),
+        )
+
+    def test_reconciliacion_corrige_desfases(self):
+        spot = Spot.objects.first()
+        Spot.all_objects.filter(pk=spot.pk).update(favorites_count=999)
+
+        fixed = PopularityCounterService.reconcile()
+
+        spot.refresh_from_db()
+        self.assertEqual(fixed['spot.favorites_count'], 1)
+        self.assertEqual(spot.favorites_count, UserFavoriteSpot.objects.filter(spot=spot).count())
+
+
+def _iter_callbacks(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+class AdminChangelistTests(TestCase):
+    """Tests para los changelists del admin sobre tablas grandes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=3, spots=6, routes_per_spot=2, photos_per_route=2, seed=5,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _changelist_queries(self, model_name):
+        url = reverse(f'admin:spots_routes_{model_name}_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        for model in (Spot, Route, RoutePhoto):
+            model_name = model._meta.model_name
+            with self.subTest(model=model_name):
+                before = self._changelist_queries(model_name)
+
+                for obj in model.all_objects.all()[:3]:
+                    obj.pk = None
+                    obj._state.adding = True
+                    if model is Spot:
+                        obj.storage_id = uuid.uuid4()
+                    obj.save()
+
+                self.assertEqual(self._changelist_queries(model_name), before)
+
+    def test_busqueda_por_id_de_ruta(self):
+        route = Route.objects.first()
+        url = reverse('admin:spots_routes_routephoto_changelist')
+        self.assertEqual(self.client.get(url, {'q': str(route.pk)}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'q': 'texto'}).status_code, 200)
+
+    def _changelist_count(self, model_name, params=None):
+        url = reverse(f'admin:spots_routes_{model_name}_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        counted = any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries)
+        return response.context['cl'], counted
+
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_conteo_estimado_solo_en_tablas_grandes(self):
+        """
+        Sin filtros del changelist se usa la estimación, también en los admins cuyo manager
+        filtra los registros borrados (Route) y no solo en los que usan all_objects (Spot)
+        """
+        username = Route.objects.select_related('user').first().user.username
+
+        for model in (Route, Spot):
+            model_name = model._meta.model_name
+            with self.subTest(model=model_name):
+                with mock.patch('core.utils.pagination.estimate_table_rows', return_value=10):
+                    cl, _ = self._changelist_count(model_name)
+                    self.assertEqual(cl.result_count, cl.queryset.count())
+
+                with mock.patch('core.utils.pagination.estimate_table_rows', return_value=50000):
+                    cl, counted = self._changelist_count(model_name)
+                    self.assertEqual(cl.result_count, 50000)
+                    self.assertFalse(counted)
+
+                    # Con búsqueda se cuenta exacto (con statement_timeout)
+                    cl, counted = self._changelist_count(model_name, {'q': username})
+                    self.assertTrue(counted)
+                    self.assertEqual(cl.result_count, cl.queryset.count())
+
+
+@raise_on_query_budget
+class QueryBudgetTests(TestCase):
+    """
+    Presupuesto de consultas por endpoint (core.query_budget): todas las vistas lo declaran, cada
+    ruta de la API lo respeta con datos sembrados y los listados hacen el mismo número de consultas
+    con 1 resultado que con una página completa
+    """
+    APPS = ('spots_routes', 'users', 'authentication')
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_synthetic', users=10, spots=40, routes_per_spot=1, seed=3,
+            no_files=True, stdout=StringIO(),
+        )
+        cls.user = User.objects.create_user(username='budget', email='budget@example.com', password='x')
+        cls.admin = User.objects.create_superuser(username='budget-admin', email='admin@example.com', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=self.media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.covered = set()
+
+    def _get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def _declared_actions(self, patterns):
+        """{'Vista.acción': presupuesto} de cada ruta de la API (None si no declara)"""
+        declared = {}
+        for callback in _iter_callbacks(patterns):
+            view_class = get_view_class(callback)
+            if view_class is None or view_class.__module__.split('.')[0] not in self.APPS:
+                continue
+
+            budgets = getattr(view_class, 'query_budgets', {})
+            if getattr(callback, 'actions', None):
+                actions = [
+                    action for method, action in callback.actions.items()
+                    if method in view_class.http_method_names
+                ]
+            else:
+                actions = [
+                    method for method in view_class.http_method_names
+                    if method not in ('head', 'options') and hasattr(view_class, method)
+                ]
+            declared.update({f'{view_class.__name__}.{action}': budgets.get(action) for action in actions})
+        return declared
+
+    def _call(self, method, url, data=None, user=True, **extra):
+        """
+        Hace el request como `user` (por defecto self.user, None = anónimo) y compara sus
+        consultas con el presupuesto de la acción resuelta
+        """
+        client = APIClient()
+        client.force_authenticate(self.user if user is True else user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data, **extra)
+
+        callback = response.resolver_match.func
+        view_class = get_view_class(callback)
+        action = (getattr(callback, 'actions', None) or {}).get(method, method)
+        name = f'{view_class.__name__}.{action}'
+
+        self.assertLess(response.status_code, 500, name)
+        self.assertLessEqual(len(queries), view_class.query_budgets[action], name)
+        self.covered.add(name)
+        return response
+
+    def test_todas_las_vistas_declaran_presupuesto(self):
+        """Cada acción de las vistas de la API tiene presupuesto de consultas"""
+        patterns = spots_routes_patterns[0] + user_patterns[0] + authentications_patterns[0]
+        missing = {name for name, budget in self._declared_actions(patterns).items() if budget is None}
+
+        self.assertEqual(missing, set())
+
+    def test_rutas_de_spots_respetan_su_presupuesto(self):
+        route = Route.objects.select_related('spot', 'difficulty', 'travel_mode').filter(
+            spot__in=Spot.objects.all()
+        ).first()
+        spot = route.spot
+        pending = list(Spot.all_objects.filter(status_id=get_default_pending()).order_by('pk')[:3])
+        # La cola de moderación solo ve spots pendientes activos
+        Spot.all_objects.filter(pk__in=[p.pk for p in pending]).update(is_active=True)
+        location = json.dumps({'type': 'Point', 'coordinates': [spot.location.x, spot.location.y]})
+        spots = '/api/v1/spots/'
+
+        self._call('get', spots)
+        self._call('get', f'{spots}{spot.pk}/')
+        self._call('get', f'{spots}my_spots/')
+        own_spot = self._call('post', spots, {
+            'name': 'Propio', 'description': 'Spot del presupuesto',
+            'location': location, 'spot_thumbnail_path': _image(),
+        }, format='multipart').data['id']
+        # Aprobado para que el dueño lo pueda editar
+        Spot.all_objects.filter(pk=own_spot).update(is_active=True, status_id=get_approved())
+        self._call('patch', f'{spots}{own_spot}/', {'name': 'Editado'})
+        self._call('put', f'{spots}{own_spot}/', {
+            'name': 'Reemplazado', 'description': 'Spot del presupuesto',
+            'location': location, 'spot_thumbnail_path': _image(),
+        }, format='multipart')
+
+        self._call('post', f'{spots}{spot.pk}/add_to_favorites/')
+        self._call('post', f'{spots}{spot.pk}/remove_from_favorites/')
+        self._call('post', f'{spots}{spot.pk}/favorites/')
+        self._call('delete', f'{spots}{spot.pk}/favorites/')
+        self._call('get', f'{spots}favorites/')
+
+        self._call('post', f'{spots}{pending[0].pk}/authorize/', user=self.admin)
+        self._call('post', f'{spots}{pending[1].pk}/deny/', {'reason': 'Duplicado'}, user=self.admin)
+        self._call('post', f'{spots}moderation/claim/?limit=5', user=self.admin)
+        self._call('post', f'{spots}moderation/decisions/', {
+            'action': 'approve', 'ids': [pending[2].pk],
+        }, user=self.admin, format='json')
+
+        captions = f'{spots}{spot.pk}/captions/'
+        self._call('get', captions)
+        self._call('post', captions, {'description': 'Vista', 'img_path': _image()}, format='multipart')
+        caption = SpotCaption.objects.get(user=self.user)
+        self._call('get', f'{captions}{caption.pk}/')
+        self._call('patch', f'{captions}{caption.pk}/', {'description': 'Otra vista'})
+        self._call('put', f'{captions}{caption.pk}/', {'description': 'Vista', 'img_path': _image()}, format='multipart')
+        self._call('delete', f'{captions}{caption.pk}/')
+
+        routes = f'{spots}{spot.pk}/routes/'
+        payload = {
+            'difficulty': route.difficulty.key, 'travel_mode': route.travel_mode.key,
+            'description': 'Ruta del presupuesto',
+            'path': {'type': 'LineString', 'coordinates': [list(coord) for coord in route.path.coords]},
+        }
+        self._call('get', routes)
+        self._call('get', f'{routes}{route.pk}/')
+        own_route = self._call('post', routes, payload, format='json').data['id']
+        self._call('patch', f'{routes}{own_route}/', {'description': 'Editada'}, format='json')
+        self._call('put', f'{routes}{own_route}/', payload, format='json')
+        self._call('post', f'{routes}{route.pk}/add_favorite/')
+        self._call('post', f'{routes}{route.pk}/remove_favorite/')
+        self._call('get', f'{routes}{route.pk}/along/spots/')
+        self._call('get', f'{routes}{route.pk}/along/photos/')
+
+        photos = f'{routes}{own_route}/photos/'
+        self._call('post', photos, {'img_path': _image(), 'location': location}, format='multipart')
+        photo = RoutePhoto.objects.get(user=self.user)
+        self._call('get', photos)
+        self._call('get', f'{photos}{photo.pk}/')
+        self._call('get', f'{photos}my_photos/')
+        self._call('patch', f'{photos}{photo.pk}/', {'location': location}, format='multipart')
+        self._call('put', f'{photos}{photo.pk}/', {'img_path': _image(), 'location': location}, format='multipart')
+        self._call('delete', f'{photos}{photo.pk}/')
+
+        self._call('delete', f'{routes}{own_route}/')
+        self._call('delete', f'{spots}{own_spot}/')
+
+        self._call('get', '/api/v1/routes/favorites/')
+        self._call('post', '/api/v1/favorites/sync/', {'operations': [
+            {'type': 'spot', 'id': spot.pk, 'state': True, 'client_ts': timezone.now().isoformat()},
+        ]}, format='json')
+        self._call('get', '/api/v1/sync/')
+
+        RegionPackBuilder(RegionPack.objects.create(
+            slug='manzanillo', name='Manzanillo', bbox=Polygon.from_bbox((-180, -90, 180, 90)),
+        )).build()
+        self._call('get', '/api/v1/region-packs/')
+        self._call('get', '/api/v1/region-packs/manzanillo/')
+
+        self.assertEqual(self.covered, set(self._declared_actions(spots_routes_patterns[0])))
+
+    def test_rutas_de_usuarios_respetan_su_presupuesto(self):
+        other = User.objects.exclude(pk__in=[self.user.pk, self.admin.pk]).first()
+        users = '/api/v1/users/'
+
+        self._call('get', users, user=None)
+        self._call('get', f'{users}{other.pk}/')
+        self._call('get', f'{users}me/')
+        self._call('get', f'{users}active/', user=self.admin)
+        self._call('get', f'{users}inactive/', user=self.admin)
+        self._call('patch', f'{users}{self.user.pk}/', {'first_name': 'Presupuesto'})
+        self._call('put', f'{users}{self.user.pk}/', {'username': 'budget', 'first_name': 'P', 'last_name': 'Q'})
+        self._call('delete', f'{users}{other.pk}/', user=self.admin)
+
+        self._call('put', f'{users}profile/thumb/', {'profile_thum_path': _image()}, format='multipart')
+        self._call('patch', f'{users}profile/thumb/', {'profile_thum_path': _image()}, format='multipart')
+        self._call('post', f'{users}me/email/request-change', {'email': 'nuevo@example.com', 'password': 'x'})
+
+        self.assertEqual(self.covered, set(self._declared_actions(user_patterns[0])))
+
+    @mock.patch('authentication.adapters.FacebookOAuth2Adapter.complete_login', autospec=True)
+    @mock.patch('authentication.adapters.GoogleIDTokenService.verify')
+    def test_rutas_de_autenticacion_respetan_su_presupuesto(self, google_verify, facebook_login):
+        google_verify.return_value = {
+            'sub': '1001', 'email': 'google@example.com', 'email_verified': True, 'name': 'Google',
+        }
+        facebook_login.side_effect = lambda adapter, request, app, token, **kwargs: (
+            adapter.get_provider().sociallogin_from_response(
+                request, {'id': '2002', 'email': 'facebook@example.com', 'name': 'Facebook'}
+            )
+        )
+        auth = '/api/v1/auth/'
+
+        tokens = self._call('post', f'{auth}login/', {'username': 'budget', 'password': 'x'}, user=None).data
+        self._call('post', f'{auth}token/verify/', {'token': tokens['access']}, user=None)
+        refresh = self._call('post', f'{auth}token/refresh/', {'refresh': tokens['refresh']}, user=None).data['refresh']
+        self._call('post', f'{auth}logout/', {'refresh': refresh}, user=None)
+
+        self._call('post', f'{auth}oauth/google/', {'id_token': 'google-id-token'}, user=None)
+        self._call('post', f'{auth}oauth/facebook/', {'access_token': 'facebook-token'}, user=None)
+
+        new_password = 'Presupuesto-2024!'
+        self._call('post', f'{auth}password/change/', {
+            'current_password': 'x', 'new_password': new_password, 'confirm_new_password': new_password,
+        })
+        self._call('post', f'{auth}password/reset/', {'email': self.user.email}, user=None)
+        user = User.objects.get(pk=self.user.pk)
+        self._call('post', f'{auth}password/reset/confirm/', {
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': PasswordResetTokenGenerator().make_token(user),
+            'new_password': new_password, 'confirm_new_password': new_password,
+        }, user=None)
+
+        self._call('post', f'{auth}register/', {
+            'username': 'nuevo', 'email': 'nuevo@example.com',
+            'password': new_password, 'confirm_password': new_password,
+        }, user=None)
+        self._call('post', f'{auth}resend-token/', {'email': 'nuevo@example.com'}, user=None)
+        token = UsersRegisterService.generate_email_token(User.objects.get(username='nuevo'))
+        self._call('get', f'{auth}email/verify/', {'token': token}, user=None)
+
+        self.assertEqual(self.covered, set(self._declared_actions(authentications_patterns[0])))
+
+    def test_listado_de_spots_no_depende_del_tamano_de_pagina(self):
+        """Sin N+1: captions, autor y favorito se cargan en bloque"""
+        spot = Spot.objects.filter(status__key='APPROVED').first()
+        UserFavoriteSpot.objects.create(user=self.user, spot=spot)
+
+        one = self._get('/api/v1/spots/', name=spot.name)
+        page = self._get('/api/v1/spots/')
+
+        self.assertEqual(one, page)
+        self.assertLessEqual(page, SpotViewSet.query_budgets['list'])
+
+    def test_listado_de_rutas_con_fotos_no_depende_del_tamano_de_pagina(self):
+        route = Route.objects.first()
+        url = f'/api/v1/spots/{route.spot_id}/routes/'
+
+        one = self._get(url, expand='photos', user=route.user_id, travel_mode=route.travel_mode.key)
+        page = self._get(url, expand='photos')
+
+        self.assertEqual(one, page)
+        self.assertLessEqual(page, RouteViewSet.query_budgets['list'])
+
+    def test_favoritos_no_dependen_de_la_cantidad(self):
+        spots = list(Spot.objects.filter(status__key='APPROVED')[:6])
+        UserFavoriteSpot.objects.create(user=self.user, spot=spots[0])
+        one = self._get('/api/v1/spots/favorites/')
+
+        UserFavoriteSpot.objects.bulk_create(UserFavoriteSpot(user=self.user, spot=spot) for spot in spots[1:])
+        many = self._get('/api/v1/spots/favorites/')
+
+        self.assertEqual(one, many)
+        self.assertLessEqual(many, UserFavoriteSpotsView.query_budgets['get'])
+
+    def test_listado_de_usuarios_con_estadisticas_anotadas(self):
+        """Las estadísticas del perfil salen de subconsultas y coinciden con las del modelo"""
+        Route.objects.filter(pk=Route.objects.first().pk).update(user=self.user)
+        self.client.force_authenticate(None)
+
+        self.assertLessEqual(self._get('/api/v1/users/'), UserViewSet.query_budgets['list'])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/users/me/')
+        profile = self.user.profile
+        self.assertEqual(response.data['profile']['routes_created'], profile.routes_created())
+        self.assertEqual(response.data['profile']['spots_created'], profile.spots_created())
+        self.assertEqual(
+            response.data['profile']['distance_traveled_km'], profile.distance_traveled_km()
+        )
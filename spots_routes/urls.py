@@ -1,10 +1,14 @@
 from django.urls import include, path
-from spots_routes.views import RoutePhotoViewSet, RouteViewSet, SpotCaptionViewSet, SpotViewSet, UserFavoriteRouteView, UserFavoriteSpotsView
+from spots_routes.views import (
+    DeltaSyncView, FavoritesSyncView, RegionPackViewSet, RoutePhotoViewSet, RouteViewSet,
+    SpotCaptionViewSet, SpotViewSet, UserFavoriteRouteView, UserFavoriteSpotsView,
+)
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedDefaultRouter
 
 router = DefaultRouter()
 router.register(r'spots', SpotViewSet, basename='spots')
+router.register(r'region-packs', RegionPackViewSet, basename='region-packs')
 
 # Recursos anidados bajo spots
 spots_router = NestedDefaultRouter(router, r'spots', lookup='spot')
@@ -18,6 +22,8 @@ routes_router.register(r'photos', RoutePhotoViewSet, basename='route-photos')
 spots_routes_patterns = ([
     path('spots/favorites/', UserFavoriteSpotsView.as_view(), name='user_favorite_spots'),
     path('routes/favorites/', UserFavoriteRouteView.as_view(), name='user_favorite_routes'),
+    path('favorites/sync/', FavoritesSyncView.as_view(), name='favorites_sync'),
+    path('sync/', DeltaSyncView.as_view(), name='delta_sync'),
     path('', include(router.urls)),
     path('', include(spots_router.urls)),
     path('', include(routes_router.urls)),
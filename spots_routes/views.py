@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from django.forms import ValidationError
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status, generics,permissions
@@ -18,7 +20,7 @@ User = get_user_model()
 from core.mixins import  ViewSetSentryMixin
 from core.permission import IsOwnerOrAdmin, IsOwnerOrReadOnly
 from spots_routes.filters import RouteFilter, RoutePhotoFilter, SpotFilter
-from spots_routes.models import Route, RoutePhoto, Spot, SpotCaption, SpotStatusReview, UserFavoriteRoute, UserFavoriteSpot
+from spots_routes.models import RegionPack, Route, RoutePhoto, Spot, SpotCaption, SpotStatusReview, UserFavoriteRoute, UserFavoriteSpot
 from spots_routes.serializer import (
     SpotCaptionCreateSerializer, 
     SpotCaptionSerializer, 
@@ -28,15 +30,32 @@ from spots_routes.serializer import (
     RouteSerializer, 
     RoutePhotoSerializer, 
     RoutePhotoCreateSerializer,
-    UserFavoriteRouteSerializer
+    UserFavoriteRouteSerializer,
+    FavoritesSyncSerializer,
+    FavoritesSyncResultSerializer,
+    SpotModerationClaimSerializer,
+    SpotModerationDecisionSerializer,
+    SpotModerationResultSerializer,
+    DeltaSyncSerializer,
+    RegionPackSerializer,
+    SpotAlongRouteSerializer,
+    RoutePhotoAlongRouteSerializer,
 )
 from drf_spectacular.types import OpenApiTypes
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from spots_routes import models
-from spots_routes.docs.params import ROUTE_FILTER_PARAMS, ROUTE_PHOTO_FILTER_PARAMS, NESTED_PATH_PARAMS
+from spots_routes.services import CorridorService, DeltaSyncService, FavoritesService, SpotModerationService, SyncTokenError
+from spots_routes.docs.params import ROUTE_FILTER_PARAMS, ROUTE_PHOTO_FILTER_PARAMS, NESTED_PATH_PARAMS, CORRIDOR_DISTANCE_PARAM
 _MODULE_PATH = __name__
 
+# Campos que escribe una revisión individual (authorize/deny)
+REVIEW_FIELDS = [
+    'status', 'is_active', 'reviewed_user', 'reviewed_at',
+    'review_claimed_by', 'review_claimed_until', 'updated_at',
+]
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="Listar spots",
@@ -61,6 +80,30 @@ _MODULE_PATH = __name__
                 location=OpenApiParameter.QUERY,
                 description='Filtrar por estado (solo para administradores): PENDING, APPROVED, REJECTED',
                 required=False
+            ),
+            OpenApiParameter(
+                name='min_favorites',
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description='Solo spots con al menos este número de favoritos',
+                required=False
+            ),
+            OpenApiParameter(
+                name='within',
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    'Solo spots dentro del área dibujada: GeoJSON (Polygon/MultiPolygon) '
+                    'o encoded polyline del contorno. Se simplifica a AREA_FILTER_MAX_VERTICES vértices'
+                ),
+                required=False
+            ),
+            OpenApiParameter(
+                name='ordering',
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description='Orden: favorites, routes, captions, created_at (prefijo - para descendente, ej: -favorites)',
+                required=False
             )
         ]
     ),
@@ -112,6 +155,14 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_class = SpotFilter
+    # Consultas SQL máximas por acción, independientes del tamaño de página (core.query_budget)
+    query_budgets = {
+        'list': 4, 'retrieve': 3, 'my_spots': 4,
+        'create': 6, 'update': 6, 'partial_update': 6, 'destroy': 6,
+        'authorize': 6, 'deny': 6,
+        'moderation_claim': 5, 'moderation_decisions': 3,
+        'add_to_favorites': 3, 'remove_from_favorites': 3, 'favorites': 3,
+    }
     
     def get_permissions(self): 
             """Permisos dinámicos según la acción"""
@@ -135,6 +186,9 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
                     status__key="APPROVED"
                 )
 
+        if self.action in ("list", "retrieve", "authorize", "deny"):
+            queryset = SpotSerializer.setup_eager_loading(queryset, user)
+
         return queryset.order_by("-created_at")
     
     def get_serializer_class(self):
@@ -146,7 +200,7 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
         """Asignar usuario y estado inicial al crear"""
         serializer.save(
             user=self.request.user,
-            pending = SpotStatusReview.objects.get(key='PENDING')
+            status=SpotStatusReview.objects.get(key='PENDING')
         )
 
     @extend_schema(
@@ -173,7 +227,9 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
         spot.is_active = True
         spot.reviewed_user = request.user
         spot.reviewed_at = timezone.now()
-        spot.save()
+        spot.review_claimed_by = None
+        spot.review_claimed_until = None
+        spot.save(update_fields=REVIEW_FIELDS)
         
         serializer = self.get_serializer(spot)
         return Response(serializer.data)
@@ -223,10 +279,85 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
         spot.is_active = False
         spot.reviewed_user = request.user
         spot.reviewed_at = timezone.now()
-        spot.save()
+        spot.review_claimed_by = None
+        spot.review_claimed_until = None
+        spot.save(update_fields=REVIEW_FIELDS + ['reject_reason'])
         
         serializer = self.get_serializer(spot)
         return Response(serializer.data)
+
+    @extend_schema(
+        summary="Tomar lote de la cola de moderación",
+        tags=["spots"],
+        request=None,
+        description=(
+            "Reserva para el administrador un lote de spots pendientes (los más viejos primero) "
+            "y lo regresa.\n\n"
+            "- Revisores simultáneos reciben lotes distintos (FOR UPDATE SKIP LOCKED)\n"
+            "- Incluye los spots que el revisor ya tenía reservados\n"
+            "- La reserva vence en `lease_expires_at` y los spots no decididos vuelven a la cola\n\n"
+            f"**Code:** `{_MODULE_PATH}.SpotViewSet_moderation_claim`"
+        ),
+        parameters=[
+            OpenApiParameter(
+                'limit', OpenApiTypes.INT, OpenApiParameter.QUERY,
+                description=f"Tamaño del lote (máximo {settings.MODERATION_CLAIM_MAX})",
+            ),
+        ],
+        responses={
+            200: SpotModerationClaimSerializer,
+            403: OpenApiResponse(description="No tienes permisos de administrador"),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='moderation/claim', permission_classes=[IsAdminUser])
+    def moderation_claim(self, request):
+        """Reservar spots pendientes para el revisor"""
+        try:
+            limit = int(request.query_params.get('limit', settings.MODERATION_CLAIM_MAX))
+        except ValueError:
+            limit = settings.MODERATION_CLAIM_MAX
+        limit = max(1, min(limit, settings.MODERATION_CLAIM_MAX))
+
+        ids, lease_until = SpotModerationService.claim(request.user, limit)
+
+        spots = SpotSerializer.setup_eager_loading(
+            Spot.all_objects.filter(pk__in=ids), request.user
+        ).order_by('created_at')
+        serializer = SpotModerationClaimSerializer(
+            {'lease_expires_at': lease_until, 'results': spots},
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Decidir spots en lote",
+        tags=["spots"],
+        description=(
+            "Aprueba (y activa) o rechaza (y desactiva) varios spots con un solo UPDATE.\n\n"
+            "- `reason` es obligatoria al rechazar\n"
+            "- Se omiten los spots eliminados, inexistentes o reservados por otro revisor\n"
+            "- Libera la reserva de los spots decididos\n\n"
+            f"**Code:** `{_MODULE_PATH}.SpotViewSet_moderation_decisions`"
+        ),
+        request=SpotModerationDecisionSerializer,
+        responses={
+            200: SpotModerationResultSerializer,
+            400: OpenApiResponse(description="Datos inválidos o falta la razón del rechazo"),
+            403: OpenApiResponse(description="No tienes permisos de administrador"),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='moderation/decisions', permission_classes=[IsAdminUser])
+    def moderation_decisions(self, request):
+        """Aprobar o rechazar spots en lote"""
+        serializer = SpotModerationDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        updated, skipped = SpotModerationService.decide(
+            request.user, data['ids'], data['action'], data.get('reason'),
+        )
+        result = {'action': data['action'], 'updated': updated, 'skipped': skipped}
+        return Response(SpotModerationResultSerializer(result).data)
     
     @extend_schema(
         summary="Mis spots",
@@ -247,6 +378,7 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
             deleted_at__isnull=True,
             is_active = True,
         ).order_by('-created_at')
+        queryset = SpotSerializer.setup_eager_loading(queryset, request.user)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -274,19 +406,11 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
     def add_to_favorites(self, request, pk=None):
         """Agregar spot a favoritos"""
         spot = self.get_object()
+        result = FavoritesService.add_spot(request.user, spot)
         
-        favorite, created = UserFavoriteSpot.objects.get_or_create(
-            user=request.user,
-            spot=spot,
-            defaults={'is_active': True}
-        )
-        
-        if not created:
-            # Si ya existe, activarlo
-            if not favorite.is_active:
-                favorite.is_active = True
-                favorite.save()
-                return Response({'status': 'reactivated'})
+        if result == FavoritesService.REACTIVATED:
+            return Response({'status': 'reactivated'})
+        if result == FavoritesService.ALREADY_ACTIVE:
             return Response(
                 {'status': 'already_favorited'},
                 status=status.HTTP_200_OK
@@ -316,19 +440,12 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
         """Remover de favoritos (soft delete)"""
         spot = self.get_object()
         
-        try:
-            favorite = UserFavoriteSpot.objects.get(
-                user=request.user,
-                spot=spot
-            )
-            favorite.is_active = False
-            favorite.save()
+        if FavoritesService.remove_spot(request.user, spot):
             return Response({'status': 'removed'})
-        except UserFavoriteSpot.DoesNotExist:
-            return Response(
-                {'error': 'Este spot no está en tus favoritos'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        return Response(
+            {'error': 'Este spot no está en tus favoritos'},
+            status=status.HTTP_404_NOT_FOUND
+        )
 
     
     @extend_schema(
@@ -342,20 +459,14 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
         spot = self.get_object()
         
         if request.method == 'POST':
-            favorite, created = UserFavoriteSpot.objects.get_or_create(
-                user=request.user,
-                spot=spot,
-                defaults={'is_active': True}
-            )
+            result = FavoritesService.add_spot(request.user, spot)
             
-            if not created:
-                if not favorite.is_active:
-                    favorite.is_active = True
-                    favorite.save()
-                    return Response(
-                        {'status': 'added'},
-                        status=status.HTTP_200_OK
-                    )
+            if result == FavoritesService.REACTIVATED:
+                return Response(
+                    {'status': 'added'},
+                    status=status.HTTP_200_OK
+                )
+            if result == FavoritesService.ALREADY_ACTIVE:
                 return Response(
                     {'status': 'already_exists'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -367,20 +478,12 @@ class SpotViewSet(ViewSetSentryMixin,  viewsets.ModelViewSet):
             )
         
         elif request.method == 'DELETE':
-            try:
-                favorite = UserFavoriteSpot.objects.get(
-                    user=request.user,
-                    spot=spot,
-                    is_active=True
-                )
-                favorite.is_active = False
-                favorite.save()
+            if FavoritesService.remove_spot(request.user, spot):
                 return Response(status=status.HTTP_204_NO_CONTENT)
-            except UserFavoriteSpot.DoesNotExist:
-                return Response(
-                    {'detail': 'No está en favoritos'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            return Response(
+                {'detail': 'No está en favoritos'},
+                status=status.HTTP_404_NOT_FOUND
+            )
     
 @extend_schema(
     summary="Listar mis favoritos",
@@ -398,14 +501,16 @@ class UserFavoriteSpotsView(generics.ListAPIView):
     """Vista para listar favoritos del usuario actual"""
     serializer_class = UserFavoriteSpotSerializer
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
     def get_queryset(self):
+        spots = SpotSerializer.setup_eager_loading(Spot.all_objects.all(), self.request.user)
         return UserFavoriteSpot.objects.filter(
             user=self.request.user,
             is_active=True,
             spot__is_active =True,
             spot__status__key = "APPROVED"
-        ).select_related('spot').order_by('-created_at')
+        ).prefetch_related(Prefetch('spot', queryset=spots)).order_by('-created_at')
 
 
 @extend_schema_view(
@@ -490,6 +595,10 @@ class SpotCaptionViewSet(ViewSetSentryMixin, viewsets.ModelViewSet):
     ViewSet para manejar los captions de spots
     """
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budgets = {
+        'list': 3, 'retrieve': 2,
+        'create': 5, 'update': 5, 'partial_update': 5, 'destroy': 5,
+    }
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -607,19 +716,23 @@ class RouteViewSet(ViewSetSentryMixin, viewsets.ModelViewSet):
     
     filter_backends = [DjangoFilterBackend]
     filterset_class = RouteFilter
+    query_budgets = {
+        'list': 4, 'retrieve': 3,
+        'create': 7, 'update': 6, 'partial_update': 6, 'destroy': 6,
+        'add_favorite': 3, 'remove_favorite': 3,
+        'spots_along': 3, 'photos_along': 3,
+    }
     
     def get_queryset(self):
-        queryset = Route.objects.filter(is_active=True).select_related(
-            'user', 'difficulty', 'travel_mode', 'spot'
-        )
-        
         # Solo cargar fotos si:
         # 1. Es accion retrieve O
         # 2. Se solicita explicitamente con ?expand=photos
         expand = self.request.query_params.get('expand', '')
-        if self.action == 'retrieve' or 'photos' in expand.split(','):
-            queryset = queryset.prefetch_related('photo')
-        
+        photos = self.action == 'retrieve' or 'photos' in expand.split(',')
+
+        queryset = RouteSerializer.setup_eager_loading(
+            Route.objects.filter(is_active=True), self.request.user, photos=photos
+        )
         return queryset.order_by('-created_at')
     
     def get_serializer_class(self):
@@ -687,28 +800,18 @@ class RouteViewSet(ViewSetSentryMixin, viewsets.ModelViewSet):
         Añade la ruta a favoritos del usuario.
         """
         route = self.get_object()
+        result = FavoritesService.add_route(request.user, route)
         
-        # Verificar si ya existe como favorito
-        favorite, created = UserFavoriteRoute.objects.get_or_create(
-            user=request.user,
-            route=route,
-            defaults={'is_active': True}
-        )
-        
-        if not created:
-            # Si ya existía, asegurarse de que esté activo
-            if not favorite.is_active:
-                favorite.is_active = True
-                favorite.save()
-                return Response(
-                    {'message': 'Ruta añadida a favoritos'},
-                    status=status.HTTP_200_OK
-                )
-            else:
-                return Response(
-                    {'message': 'Esta ruta ya está en tus favoritos'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        if result == FavoritesService.REACTIVATED:
+            return Response(
+                {'message': 'Ruta añadida a favoritos'},
+                status=status.HTTP_200_OK
+            )
+        if result == FavoritesService.ALREADY_ACTIVE:
+            return Response(
+                {'message': 'Esta ruta ya está en tus favoritos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response(
             {'message': 'Ruta añadida a favoritos'},
@@ -740,25 +843,74 @@ class RouteViewSet(ViewSetSentryMixin, viewsets.ModelViewSet):
         """
         route = self.get_object()
         
-        try:
-            favorite = UserFavoriteRoute.objects.get(
-                user=request.user,
-                route=route,
-                is_active=True
-            )
-            favorite.is_active = False
-            favorite.save()
-            
+        if FavoritesService.remove_route(request.user, route):
             return Response(
                 {'message': 'Ruta eliminada de favoritos'},
                 status=status.HTTP_200_OK
             )
-        except UserFavoriteRoute.DoesNotExist:
+        return Response(
+            {'message': 'Esta ruta no está en tus favoritos'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    def _along(self, kind, serializer_class):
+        """Respuesta común de spots_along / photos_along"""
+        route = self.get_object()
+        try:
+            meters = CorridorService.clamp_meters(self.request.query_params.get('distance'))
+        except ValueError:
             return Response(
-                {'message': 'Esta ruta no está en tus favoritos'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'distance debe ser un número entero de metros'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
+        rows = CorridorService.along(kind, route, meters)
+        serializer = serializer_class(rows, many=True, context=self.get_serializer_context())
+        return Response({'corridor_meters': meters, 'results': serializer.data})
+
+    @extend_schema(
+        summary="Spots a lo largo de la ruta",
+        tags=["routes"],
+        parameters=[CORRIDOR_DISTANCE_PARAM],
+        description=(
+            "Spots aprobados a `distance` metros o menos del trazo de la ruta, "
+            "en el orden en que se pasan (de inicio a fin).\n\n"
+            "- Cada spot trae su posición sobre la ruta (`position`, `distance_along_km`) "
+            "y su distancia al trazo (`offset_m`)\n"
+            "- El resultado se guarda en cache por versión de la ruta\n\n"
+            f"**Code:** `{_MODULE_PATH}.RouteViewSet_spots_along`"
+        ),
+        responses={
+            200: OpenApiResponse(description="corridor_meters y results (SpotAlongRoute)"),
+            400: OpenApiResponse(description="distance inválido"),
+            404: OpenApiResponse(description="Ruta no encontrada"),
+        },
+    )
+    @action(detail=True, methods=['get'], url_path='along/spots')
+    def spots_along(self, request, pk=None, *args, **kwargs):
+        return self._along(CorridorService.SPOTS, SpotAlongRouteSerializer)
+
+    @extend_schema(
+        summary="Fotos a lo largo de la ruta",
+        tags=["routes", "routes-photos"],
+        parameters=[CORRIDOR_DISTANCE_PARAM],
+        description=(
+            "Fotos de rutas (de esta o de otras) tomadas a `distance` metros o menos del trazo, "
+            "en el orden en que se pasan (de inicio a fin).\n\n"
+            "- Cada foto trae `position`, `distance_along_km` y `offset_m`\n"
+            "- El resultado se guarda en cache por versión de la ruta\n\n"
+            f"**Code:** `{_MODULE_PATH}.RouteViewSet_photos_along`"
+        ),
+        responses={
+            200: OpenApiResponse(description="corridor_meters y results (RoutePhotoAlongRoute)"),
+            400: OpenApiResponse(description="distance inválido"),
+            404: OpenApiResponse(description="Ruta no encontrada"),
+        },
+    )
+    @action(detail=True, methods=['get'], url_path='along/photos')
+    def photos_along(self, request, pk=None, *args, **kwargs):
+        return self._along(CorridorService.PHOTOS, RoutePhotoAlongRouteSerializer)
+
 @extend_schema_view(
     list=extend_schema(
         summary="Listar fotos de rutas",
@@ -845,6 +997,10 @@ class RoutePhotoViewSet(ViewSetSentryMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RoutePhotoFilter
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'my_photos': 2,
+        'create': 5, 'update': 5, 'partial_update': 5, 'destroy': 5,
+    }
     
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
@@ -935,10 +1091,123 @@ class UserFavoriteRouteView(generics.ListAPIView):
     """
     serializer_class = UserFavoriteRouteSerializer
     permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 5}
     
     def get_queryset(self):
+        routes = RouteSerializer.setup_eager_loading(Route.all_objects.all(), self.request.user)
         return UserFavoriteRoute.objects.filter(
             user=self.request.user,
             is_active=True,
             route__deleted_at__isnull=True
-        ).select_related('route').order_by('-created_at')
\ No newline at end of file
+        ).prefetch_related(Prefetch('route', queryset=routes)).order_by('-created_at')
+
+
+@extend_schema(
+    summary="Sincronizar favoritos",
+    tags=["spots-favorite"],
+    description=(
+        "Aplica en lote las operaciones de favoritos que la app encoló sin conexión.\n\n"
+        "- Cada operación: `{type: spot|route, id, state, client_ts}`\n"
+        "- Gana la operación más reciente (last-write-wins) contra lo ya guardado\n"
+        "- Se aplica todo en una transacción\n"
+        "- Regresa los ids de spots y rutas que quedan en favoritos\n\n"
+        f"**Code:** `{_MODULE_PATH}.FavoritesSyncView`"
+    ),
+    request=FavoritesSyncSerializer,
+    responses={
+        200: FavoritesSyncResultSerializer,
+        400: OpenApiResponse(description="Operaciones inválidas"),
+        401: OpenApiResponse(description="No autenticado"),
+    }
+)
+class FavoritesSyncView(generics.GenericAPIView):
+    """
+    Vista para sincronizar los favoritos de la app móvil en un solo request.
+    """
+    serializer_class = FavoritesSyncSerializer
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'post': 6}
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = FavoritesService.sync(request.user, serializer.validated_data['operations'])
+        return Response(FavoritesSyncResultSerializer(result).data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Sincronización incremental",
+    tags=["sync"],
+    description=(
+        "Regresa solo lo que cambió desde el último sync: spots, rutas, captions, fotos y "
+        "favoritos del usuario creados, modificados o dados de baja.\n\n"
+        "- Sin `token`: descarga completa (solo registros visibles)\n"
+        "- Con `token`: cambios desde ese punto; lo que dejó de ser visible llega en `deleted`\n"
+        "- Con `has_more` se repite de inmediato con el `sync_token` nuevo\n"
+        "- Token inválido o vencido: 410, hay que sincronizar desde cero\n\n"
+        f"**Code:** `{_MODULE_PATH}.DeltaSyncView`"
+    ),
+    parameters=[
+        OpenApiParameter('token', OpenApiTypes.STR, OpenApiParameter.QUERY, description="sync_token del sync anterior"),
+    ],
+    responses={
+        200: DeltaSyncSerializer,
+        401: OpenApiResponse(description="No autenticado"),
+        410: OpenApiResponse(description="Token inválido o vencido"),
+    }
+)
+class DeltaSyncView(generics.GenericAPIView):
+    """
+    Vista para la sincronización incremental de la app móvil (ver DeltaSyncService).
+    """
+    serializer_class = DeltaSyncSerializer
+    permission_classes = [IsAuthenticated]
+    query_budgets = {'get': 9}
+
+    def get(self, request):
+        try:
+            result = DeltaSyncService.changes(request.user, request.query_params.get('token'), request)
+        except SyncTokenError:
+            return Response(
+                {'error': 'Token de sincronización inválido o vencido, sincroniza desde cero'},
+                status=status.HTTP_410_GONE
+            )
+        return Response(result, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar paquetes offline",
+        tags=["region-packs"],
+        description=(
+            "Paquetes descargables por región (SQLite comprimido con gzip) con spots, rutas "
+            "simplificadas y miniaturas, para usar la app sin señal.\n\n"
+            "- Se reconstruyen solos cuando cambia el contenido de la región (`version` sube)\n"
+            "- `url` apunta al archivo estático; admite descargas reanudables (Range)\n"
+            "- `sha256` permite verificar la descarga\n\n"
+            f"**Code:** `{_MODULE_PATH}.RegionPackViewSet_list`"
+        ),
+    ),
+    retrieve=extend_schema(
+        summary="Manifiesto de un paquete offline",
+        tags=["region-packs"],
+        description=(
+            "Versión actual del paquete de una región; la app lo consulta para saber si debe "
+            "descargarlo de nuevo.\n\n"
+            f"**Code:** `{_MODULE_PATH}.RegionPackViewSet_retrieve`"
+        ),
+    ),
+)
+class RegionPackViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Manifiestos de los paquetes offline ya construidos (ver spots_routes.region_packs).
+    """
+    serializer_class = RegionPackSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_field = 'slug'
+    pagination_class = None
+    query_budgets = {'list': 1, 'retrieve': 1}
+
+    def get_queryset(self):
+        return RegionPack.objects.filter(version__gt=0).exclude(file='').order_by('name')
@@ -1,11 +1,12 @@
 # users/admin.py
-from pyexpat.errors import messages
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import F
 from django.contrib.auth import get_user_model
 User = get_user_model()
 from django.contrib.auth.admin import UserAdmin
 
 from users.models import UserProfile
+from authentication.backends import UserPrincipalCache
 
 #======================================================= PROFILE =============================================================
 
@@ -24,7 +25,11 @@ class UserProfileInline(admin.StackedInline):
 #======================================================= USER =============================================================
 @admin.action(description="Desactivar usuarios seleccionados")
 def deactivate_users(modeladmin, request, queryset):
-    updated = queryset.filter(is_active=True).update(is_active=False)
+    users = queryset.filter(is_active=True)
+    user_ids = list(users.values_list('id', flat=True))
+    updated = users.update(is_active=False, auth_version=F('auth_version') + 1)
+    # update() no dispara señales: se invalida a mano el cache de autenticación
+    UserPrincipalCache.invalidate(*user_ids)
     modeladmin.message_user(
         request,
         f"{updated} usuario(s) desactivado(s).",
@@ -3,12 +3,19 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
+from authentication.services import LastLoginService
+from core.metrics import track_job
+
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+@track_job
 def cleanup_unverified_users():
     """Elimina usuarios no verificados después de 7 días"""
     try:
+        # Los logins que siguen en el buffer de Redis cuentan para last_login__isnull
+        LastLoginService.flush()
+
         expiration_date = timezone.now() - timedelta(days=7)
         
         users_to_delete = User.objects.filter(
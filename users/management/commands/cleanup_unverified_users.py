@@ -3,6 +3,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth import get_user_model
 
+from authentication.services import LastLoginService
+
 User = get_user_model()
 
 class Command(BaseCommand):
@@ -18,6 +20,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         days = options['days']
+        # Los logins que siguen en el buffer de Redis cuentan para last_login__isnull
+        LastLoginService.flush()
+
         expiration_date = timezone.now() - timedelta(days=days)
         
         unverified_users = User.objects.filter(
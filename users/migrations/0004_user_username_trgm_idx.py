@@ -0,0 +1,22 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models.functions import Cast, Upper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_auth_version'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(Upper(Cast('username', models.TextField())), name='gin_trgm_ops'),
+                name='users_username_trgm_idx',
+            ),
+        ),
+    ]
@@ -7,12 +7,28 @@ from django.db.models import DecimalField, Sum, Value
 from core.utils.upload_image import upload_user_thumbnail
 from spots_routes.models import Route, Spot
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Cast, Upper
 
 
 class User(AbstractUser):
     email = models.EmailField(unique=True) 
+    # Se incrementa para revocar los tokens ya emitidos (ver authentication.backends)
+    auth_version = models.PositiveIntegerField(default=0)
     REQUIRED_FIELDS = ['email']
 
+    class Meta(AbstractUser.Meta):
+        # Las búsquedas por prefijo (LIKE 'base%') usan el índice *_like (varchar_pattern_ops)
+        # que Django ya crea para el unique de username
+        indexes = [
+            # Búsquedas icontains del admin (user__username)
+            GinIndex(OpClass(Upper(Cast('username', models.TextField())), name='gin_trgm_ops'), name='users_username_trgm_idx'),
+        ]
+
+    def bump_auth_version(self):
+        """Invalida los tokens emitidos hasta ahora. Se persiste en el siguiente save()"""
+        self.auth_version += 1
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, verbose_name=("usuario id"), on_delete=models.CASCADE, related_name='profile')
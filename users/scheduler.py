@@ -1,6 +1,7 @@
 # users/scheduler.py
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from django.conf import settings
 import logging
@@ -31,6 +32,67 @@ def start_scheduler():
             max_instances=1,
             misfire_grace_time=60,
         )
+
+        from authentication.jobs import flush_last_login, purge_expired_tokens
+
+        scheduler.add_job(
+            flush_last_login,
+            trigger=IntervalTrigger(seconds=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS),
+            id='flush_last_login',
+            name='Volcar last_login a la BD',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=30,
+        )
+
+        scheduler.add_job(
+            purge_expired_tokens,
+            trigger=CronTrigger(minute=15),
+            id='purge_expired_tokens',
+            name='Purgar tokens JWT expirados',
+            replace_existing=True,
+            max_instances=1,
+            misfire_grace_time=300,
+        )
+
+        from core.jobs import process_email_queue
+
+        # Red de seguridad de la cola de correos: reintentos y correos que no alcanzaron a salir
+        # con el envío inmediato al hacer commit
+        scheduler.add_job(
+            process_email_queue,
+            trigger=IntervalTrigger(seconds=settings.EMAIL_QUEUE_INTERVAL_SECONDS),
+            id='process_email_queue',
+            name='Enviar cola de correos',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=30,
+        )
+
+        from spots_routes.jobs import rebuild_region_packs, reconcile_popularity_counters
+
+        scheduler.add_job(
+            reconcile_popularity_counters,
+            trigger=CronTrigger(hour=4, minute=30),
+            id='reconcile_popularity_counters',
+            name='Reconciliar contadores de popularidad',
+            replace_existing=True,
+            max_instances=1,
+            misfire_grace_time=600,
+        )
+
+        scheduler.add_job(
+            rebuild_region_packs,
+            trigger=IntervalTrigger(seconds=settings.REGION_PACK_REBUILD_INTERVAL_SECONDS),
+            id='rebuild_region_packs',
+            name='Reconstruir paquetes offline por región',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=300,
+        )
     
         scheduler.start()
         
@@ -4,7 +4,10 @@ from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from decimal import Decimal
 from django.contrib.auth.hashers import check_password
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 
+from spots_routes.models import Route, Spot
 from users.models import UserProfile
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -25,13 +28,44 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'spots_created',
         ]
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Queryset de usuarios con el perfil y sus estadísticas ya calculadas (subconsultas),
+        para no hacer tres consultas por usuario al serializar listados
+        """
+        def per_user(model, aggregate):
+            return (
+                model.objects.filter(user=OuterRef('pk'), is_active=True)
+                .order_by().values('user').annotate(total=aggregate).values('total')
+            )
+
+        return queryset.select_related('profile').annotate(
+            profile_routes_created=Coalesce(
+                Subquery(per_user(Route, Count('pk')), output_field=IntegerField()), 0
+            ),
+            profile_spots_created=Coalesce(
+                Subquery(per_user(Spot, Count('pk')), output_field=IntegerField()), 0
+            ),
+            profile_distance_traveled_km=Coalesce(
+                Subquery(per_user(Route, Sum('distance'))), Value(0),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+
     def get_distance_traveled_km(self, obj) -> Decimal:
+        if hasattr(obj.user, 'profile_distance_traveled_km'):
+            return obj.user.profile_distance_traveled_km
         return obj.distance_traveled_km()
     
     def get_routes_created(self, obj) -> int:
+        if hasattr(obj.user, 'profile_routes_created'):
+            return obj.user.profile_routes_created
         return obj.routes_created()
     
     def get_spots_created(self, obj) -> int:
+        if hasattr(obj.user, 'profile_spots_created'):
+            return obj.user.profile_spots_created
         return obj.spots_created()
     
 class UserProfileThumbSerializer(serializers.ModelSerializer):
@@ -77,8 +111,10 @@ class EmailUpdateSerializer(serializers.Serializer):
     def validate(self, data):
         """Valida que la contraseña sea correcta"""
         user = self.context['request'].user
-        
-        if not check_password(data['password'], user.password):
+        # request.user sale de UserPrincipalCache sin el hash del password
+        password = User.objects.filter(pk=user.pk).values_list('password', flat=True).first()
+
+        if not check_password(data['password'], password):
             raise serializers.ValidationError({
                 'password': 'Contraseña incorrecta.'
             })
@@ -1,8 +1,11 @@
 from django.db.models.signals import post_delete, post_save, pre_save  
 from django.dispatch import receiver 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
+from core.utils.background import run_in_background_on_commit
 from core.utils.storages import delete_file_fields, delete_if_changed
+from authentication.backends import UserPrincipalCache
 User = get_user_model()  
 from .models import UserProfile
 
@@ -19,6 +22,14 @@ def crear_perfil_usuario(sender, instance, created, **kwargs):
         print(f"Perfil creado para {instance.username}")
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_autenticacion(sender, instance, **kwargs):
+    """El siguiente request del usuario recarga sus datos (y su auth_version) desde la BD"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: UserPrincipalCache.invalidate(user_id))
+
+
 
 @receiver(pre_save, sender=UserProfile)
 def userprofile_pre_save(sender, instance, **kwargs):
@@ -32,9 +43,9 @@ def userprofile_pre_save(sender, instance, **kwargs):
         return
     
     
-    delete_if_changed(anterior, instance, CAMPOS_USERPROFILE)
+    run_in_background_on_commit(delete_if_changed, anterior, instance, CAMPOS_USERPROFILE)
 
 @receiver(post_delete, sender=UserProfile)
 def userprofile_post_delete(sender, instance, **kwargs):
     """Borra thumbnail cuando se elimina un UserProfile"""
-    delete_file_fields(instance, CAMPOS_USERPROFILE)
\ No newline at end of file
+    run_in_background_on_commit(delete_file_fields, instance, CAMPOS_USERPROFILE)
\ No newline at end of file
@@ -104,6 +104,17 @@ class UserViewSet(
     """
     queryset = User.objects.all()
     http_method_names = ['get', 'put', 'patch', 'delete', 'head', 'options']
+    # Consultas SQL máximas por acción, independientes del tamaño de página (core.query_budget)
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'me': 2, 'active': 2, 'inactive': 2,
+        'update': 4, 'partial_update': 4, 'destroy': 3,
+        'activate': 3, 'deactivate': 3,
+    }
+
+    def get_queryset(self):
+        if self.action in ['list', 'retrieve', 'me', 'active', 'inactive']:
+            return UserProfileSerializer.setup_eager_loading(User.objects.all())
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
@@ -135,6 +146,7 @@ class UserViewSet(
 
     def perform_destroy(self, instance):
         instance.is_active = False
+        instance.bump_auth_version()
         instance.save()
 
     @extend_schema(
@@ -182,6 +194,7 @@ class UserViewSet(
         """
         user = self.get_object()
         user.is_active = False
+        user.bump_auth_version()
         user.save()
         self.logger.info(f'Se activo la cuenta del usuario {user.username}')
         return Response(
@@ -205,7 +218,7 @@ class UserViewSet(
         Lista solo usuarios activos
         GET /users/active/
         """
-        active_users = self.queryset.filter(is_active=True).order_by('-created_at')
+        active_users = self.get_queryset().filter(is_active=True).order_by('-date_joined')
         serializer = self.get_serializer(active_users, many=True)
         return Response(serializer.data)
     
@@ -225,7 +238,7 @@ class UserViewSet(
         Lista solo usuarios inactivos
         GET /users/inactive/
         """
-        inactive_users = self.queryset.filter(is_active=False).order_by('-created_at')
+        inactive_users = self.get_queryset().filter(is_active=False).order_by('-date_joined')
         serializer = self.get_serializer(inactive_users, many=True)
         return Response(serializer.data)
     
@@ -247,7 +260,10 @@ class UserViewSet(
         """
         retorna los datos del usuario actual (sesion iniciada)
         """
-        serializer = self.get_serializer(request.user)
+        user = request.user
+        if user.is_authenticated:
+            user = self.get_queryset().get(pk=user.pk)
+        serializer = self.get_serializer(user)
         return Response(serializer.data) 
 
    
@@ -262,6 +278,7 @@ class UpdateProfileThumbView(SentryErrorHandlerMixin, UpdateAPIView):
     serializer_class = UserProfileThumbSerializer
     permission_classes = [IsAuthenticated]
     queryset = UserProfile.objects.all()
+    query_budgets = {'put': 3, 'patch': 3}
 
     def get_object(self):
         return self.request.user.profile
@@ -285,6 +302,9 @@ class EmailUpdateAPIView(SentryErrorHandlerMixin, UpdateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = EmailUpdateSerializer
     logger = logging.getLogger(__name__)
+    # Solo POST: el PUT/PATCH heredado de UpdateAPIView no tiene queryset ni update()
+    http_method_names = ['post', 'options']
+    query_budgets = {'post': 3}
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(